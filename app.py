@@ -3,7 +3,8 @@ NYS County Health Explorer — Main Entry (Overview Page)
 """
 import streamlit as st
 import plotly.express as px
-from data_utils import load_data, get_counties, get_state_avgs, compute_burden, inject_theme_css, COORDS
+from data_utils import (current_snapshot_id, get_overview_counts, compute_burden, get_query_backend,
+                        inject_theme_css, start_page, end_page, plotly_chart, choropleth_map)
 
 st.set_page_config(
     page_title="NYS Health Explorer",
@@ -12,17 +13,17 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 inject_theme_css()
+start_page('Overview')
 
 # ── Load Data ────────────────────────────────────────────────────────────────
-df_all = load_data()
-df_c   = get_counties(df_all)
-savgs  = get_state_avgs(df_all)
-burden = compute_burden(df_c, savgs)
+snapshot_id = current_snapshot_id()
+counts = get_overview_counts(snapshot_id)
+burden = compute_burden(snapshot_id)
 
-n_counties = df_c['county_name'].nunique()
-n_topics   = df_c['health_topic'].nunique()
-n_indic    = df_c['indicator'].nunique()
-n_records  = len(df_c)
+n_counties = counts['counties']
+n_topics   = counts['topics']
+n_indic    = counts['indicators']
+n_records  = counts['records']
 
 # ── Hero ─────────────────────────────────────────────────────────────────────
 st.markdown("""
@@ -49,7 +50,7 @@ st.markdown(f"""
 # ── Topics Bar ───────────────────────────────────────────────────────────────
 st.subheader("Health Topics at a Glance")
 
-topic_counts = (df_c.groupby('health_topic')['indicator'].count()
+topic_counts = (get_query_backend(snapshot_id).topic_counts()
                 .sort_values(ascending=True).reset_index())
 topic_counts.columns = ['Topic', 'Records']
 topic_counts['Short'] = topic_counts['Topic'].str.replace(' Indicators', '')
@@ -71,35 +72,31 @@ fig.update_layout(
     coloraxis_showscale=False,
     font=dict(family='Inter')
 )
-st.plotly_chart(fig, use_container_width=True)
+plotly_chart(fig)
 
 # ── Quick Map ────────────────────────────────────────────────────────────────
 st.subheader("County Overview Map")
 
 bmap = burden.reset_index()
 bmap.columns = ['County', 'Ratio']
-bmap['lat'] = bmap['County'].map(lambda x: COORDS.get(x, (None, None))[0])
-bmap['lon'] = bmap['County'].map(lambda x: COORDS.get(x, (None, None))[1])
-bmap = bmap.dropna(subset=['lat', 'lon'])
 
-fig = px.scatter_mapbox(
-    bmap, lat='lat', lon='lon',
-    size='Ratio', color='Ratio',
+fig = choropleth_map(
+    bmap, 'County', color='Ratio',
     hover_name='County',
-    hover_data={'Ratio': ':.2f', 'lat': False, 'lon': False},
+    hover_data={'Ratio': ':.2f', 'County': False},
     color_continuous_scale=[[0, '#059669'], [0.45, '#fbbf24'], [1, '#dc2626']],
-    size_max=22, zoom=5.5, opacity=0.85,
-    mapbox_style="carto-positron",
-    center={"lat": 42.85, "lon": -75.5},
+    zoom=5.5, opacity=0.85,
 )
 fig.update_layout(
     height=480,
     margin=dict(l=0, r=0, t=0, b=0),
     coloraxis_colorbar=dict(title="Burden", thickness=14, len=0.5)
 )
-st.plotly_chart(fig, use_container_width=True)
+plotly_chart(fig)
 
 st.info("👈 **Use the sidebar** to navigate between pages — County Map, Rankings, Deep Dive, Topic Spotlight, and ML Clusters.")
 
 # ── Footer ───────────────────────────────────────────────────────────────────
 st.markdown('<div class="foot">NYS County Health Explorer · Vikash Maheshwari · Python · Streamlit · Plotly · scikit-learn</div>', unsafe_allow_html=True)
+
+end_page()
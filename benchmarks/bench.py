@@ -0,0 +1,119 @@
+"""
+Scaling benchmarks for the data and compute stages on synthetic CHIRS data.
+
+    python -m benchmarks.bench [--rows 25000 250000 1000000] [--years 1] [--stages ...]
+                               [--repeat 3] [--save FILE] [--compare FILE]
+
+Wall time is the best of ``--repeat`` runs; peak memory is traced
+(tracemalloc) in one extra run. tracemalloc sees Python and NumPy
+allocations but not Arrow buffers, so snapshot reads under-report. ``--compare`` flags stages that got more
+than ``--tolerance`` slower or bigger than a saved baseline.
+"""
+import argparse, json, os, sys, tempfile, time, tracemalloc
+import pandas as pd
+
+from nyshealth.burden import BurdenEngine
+from nyshealth.clustering import cluster_counties
+from nyshealth.correlation import topic_correlations
+from nyshealth.cube import RollupCube
+from nyshealth.data import county_rows, state_averages
+from nyshealth.features import build_feature_matrix
+from nyshealth.snapshot import SnapshotStore, prepare_frame
+from nyshealth.synthetic import as_raw, synthetic_chirs
+
+
+def _setup(rows, years, workdir):
+    """Raw CSV and snapshot on disk plus the in-memory frames later stages need."""
+    raw = as_raw(synthetic_chirs(rows, n_years=years))
+    csv = os.path.join(workdir, f"chirs_{rows}.csv")
+    raw.to_csv(csv, index=False)
+    store = SnapshotStore(os.path.join(workdir, f"snap_{rows}"))
+    store.commit(prepare_frame(raw), 'synthetic')
+    df = store.read()
+    dfc = county_rows(df)
+    savgs = state_averages(df)
+    topic = dfc['health_topic'].iloc[0]
+    ind = dfc.loc[dfc['health_topic'] == topic, 'indicator'].iloc[0]
+    return dict(csv=csv, store=store, df=df, dfc=dfc, savgs=savgs, topic=topic, ind=ind,
+                cube=RollupCube(df))
+
+
+def _map_scan(ctx):
+    dfc = ctx['dfc']
+    filt = dfc[(dfc['health_topic'] == ctx['topic']) & (dfc['indicator'] == ctx['ind'])]
+    return (filt.groupby('county_name', observed=True)
+            .agg(rate=('percent_rate', 'mean'), lat=('lat', 'first'), lon=('lon', 'first'),
+                 years=('data_years', 'first')).dropna(subset=['lat', 'lon']))
+
+
+STAGES = {
+    'load_data (csv)': lambda c: prepare_frame(pd.read_csv(c['csv'], low_memory=False)),
+    'load_data (snapshot)': lambda c: c['store'].read(),
+    'get_counties': lambda c: county_rows(c['df']),
+    'get_state_avgs': lambda c: state_averages(c['df']),
+    'compute_burden': lambda c: BurdenEngine(c['dfc'], c['savgs']).overall(),
+    'county_map (scan)': _map_scan,
+    'county_map (cube)': lambda c: c['cube'].indicator_counties(c['topic'], c['ind']),
+    'rollup_cube': lambda c: RollupCube(c['df']),
+    'topic_correlations': lambda c: topic_correlations(c['dfc']),
+    'run_clustering': lambda c: cluster_counties(build_feature_matrix(c['dfc']), 2),
+}
+
+
+def measure(fn, ctx, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn(ctx)
+        best = min(best, time.perf_counter() - t0)
+    tracemalloc.start()
+    fn(ctx)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return {'seconds': best, 'peak_mb': peak / 2 ** 20}
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(prog='python -m benchmarks.bench', description="Stage scaling benchmarks.")
+    ap.add_argument('--rows', type=int, nargs='+', default=[25_000, 250_000, 1_000_000])
+    ap.add_argument('--years', type=int, default=1, help="data periods per indicator")
+    ap.add_argument('--stages', nargs='+', choices=list(STAGES), default=list(STAGES))
+    ap.add_argument('--repeat', type=int, default=3)
+    ap.add_argument('--save', help="write results as a JSON baseline")
+    ap.add_argument('--compare', help="baseline JSON to compare against")
+    ap.add_argument('--tolerance', type=float, default=0.25)
+    args = ap.parse_args(argv)
+
+    results = {}
+    with tempfile.TemporaryDirectory() as workdir:
+        for rows in args.rows:
+            ctx = _setup(rows, args.years, workdir)
+            key = f"{len(ctx['df'])}x{args.years}y"
+            results[key] = {}
+            print(f"\n{len(ctx['df']):,} rows ({args.years} period{'s' * (args.years > 1)})")
+            for name in args.stages:
+                r = results[key][name] = measure(STAGES[name], ctx, args.repeat)
+                print(f"  {name:<24} {r['seconds'] * 1000:10.1f} ms {r['peak_mb']:10.1f} MB peak")
+
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump(results, f, indent=2)
+    if args.compare:
+        with open(args.compare) as f:
+            base = json.load(f)
+        print("\nvs baseline (time / memory ratio):")
+        failed = False
+        for key, stages in results.items():
+            for name, r in stages.items():
+                b = base.get(key, {}).get(name)
+                if not b:
+                    continue
+                dt, dm = r['seconds'] / b['seconds'], r['peak_mb'] / max(b['peak_mb'], 1e-9)
+                flag = 'REGRESSION' if max(dt, dm) > 1 + args.tolerance else ''
+                failed |= bool(flag)
+                print(f"  {key:<12} {name:<24} {dt:6.2f}x {dm:6.2f}x {flag}")
+        sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,90 +1,375 @@
 """
 Shared data loading and utilities for the NYS Health Dashboard.
+
+Thin Streamlit adapter: the computation lives in the ``nyshealth`` package;
+this module only adds Streamlit caching and page styling.
 """
-import os, warnings, numpy as np, pandas as pd
+import functools, inspect, os, threading, time, warnings
+import pandas as pd
 import streamlit as st
 
-warnings.filterwarnings('ignore')
+from nyshealth.artifacts import ArtifactStore, artifact_name
+from nyshealth.burden import BurdenEngine
+from nyshealth.clustering import cluster_counties
+from nyshealth.correlation import CorrelationEngine, pivot_correlations
+from nyshealth.cube import COLUMNS as CUBE_COLUMNS, RollupCube
+from nyshealth.data import county_rows, ensure_snapshot, state_averages
+from nyshealth.features import pivot_feature_matrix
+from nyshealth.frozen import freeze
+from nyshealth.geometry import level_for_zoom, load as load_geometry
+from nyshealth.metrics import METRICS
+from nyshealth.model_select import sweep_k
+from nyshealth.peers import PeerIndex
+from nyshealth.query import PandasBackend, backend_name, open_backend
+from nyshealth.refresher import Refresher, refresh_interval
+from nyshealth.result_cache import open_result_cache, source_version
+from nyshealth.shared import SharedDataset, shared_dir
+from nyshealth.snapshot import CORE_COLUMNS, SnapshotStore
+from nyshealth.spatial import SpatialStats
+from nyshealth.stability import ClusterStability
+from nyshealth.uncertainty import COUNT_COLUMNS, BurdenUncertainty
 
-# ── NYS County Coordinates ──────────────────────────────────────────────────
-COORDS = {
-    'Albany': (42.65,-73.76), 'Allegany': (42.26,-78.03), 'Broome': (42.16,-75.82),
-    'Cattaraugus': (42.25,-78.68), 'Cayuga': (42.93,-76.57), 'Chautauqua': (42.30,-79.41),
-    'Chemung': (42.14,-76.76), 'Chenango': (42.49,-75.61), 'Clinton': (44.75,-73.68),
-    'Columbia': (42.25,-73.63), 'Cortland': (42.60,-76.18), 'Delaware': (42.20,-74.97),
-    'Dutchess': (41.77,-73.74), 'Erie': (42.75,-78.78), 'Essex': (44.12,-73.78),
-    'Franklin': (44.59,-74.30), 'Fulton': (43.11,-74.42), 'Genesee': (43.00,-78.19),
-    'Greene': (42.28,-74.13), 'Hamilton': (43.66,-74.50), 'Herkimer': (43.42,-74.96),
-    'Jefferson': (44.00,-75.86), 'Lewis': (43.78,-75.45), 'Livingston': (42.73,-77.79),
-    'Madison': (42.91,-75.67), 'Monroe': (43.16,-77.61), 'Montgomery': (42.91,-74.44),
-    'Nassau': (40.74,-73.59), 'Niagara': (43.17,-78.83), 'Oneida': (43.24,-75.44),
-    'Onondaga': (43.05,-76.15), 'Ontario': (42.85,-77.30), 'Orange': (41.40,-74.27),
-    'Orleans': (43.34,-78.22), 'Oswego': (43.46,-76.21), 'Otsego': (42.63,-75.03),
-    'Putnam': (41.43,-73.76), 'Rensselaer': (42.71,-73.51), 'Rockland': (41.15,-74.02),
-    'Saratoga': (43.10,-73.86), 'Schenectady': (42.81,-74.06), 'Schoharie': (42.59,-74.45),
-    'Schuyler': (42.39,-76.88), 'Seneca': (42.78,-76.82), 'St. Lawrence': (44.49,-75.11),
-    'Steuben': (42.27,-77.39), 'Suffolk': (40.94,-72.68), 'Sullivan': (41.72,-74.77),
-    'Tioga': (42.17,-76.31), 'Tompkins': (42.45,-76.47), 'Ulster': (41.89,-74.26),
-    'Warren': (43.56,-73.84), 'Washington': (43.31,-73.43), 'Wayne': (43.07,-77.06),
-    'Westchester': (41.12,-73.79), 'Wyoming': (42.70,-78.23), 'Yates': (42.63,-77.11),
-    'Bronx': (40.84,-73.86), 'Kings': (40.63,-73.95), 'New York': (40.78,-73.97),
-    'Queens': (40.72,-73.79), 'Richmond': (40.58,-74.15),
-}
+warnings.filterwarnings('ignore')
 
 CLUSTER_COLORS = ['#14b8a6', '#3b82f6', '#f43f5e', '#f59e0b', '#8b5cf6']
+SPATIAL_COLORS = {'Hot spot': '#dc2626', 'Cold spot': '#2563eb', 'High-High': '#dc2626', 'Low-Low': '#2563eb',
+                  'High-Low': '#f59e0b', 'Low-High': '#60a5fa', 'Not significant': '#d1d5db'}
+MAP_CENTER = {'lat': 42.85, 'lon': -75.5}
+# Per cached function: a few snapshot versions × parameter combinations
+CACHE_ENTRIES = 32
+ADMIN_ENV = 'NYSHEALTH_ADMIN_PANEL'
+_calls = threading.local()
+
+
+def versioned(func=None, *, persist=False):
+    """Cache ``func(snapshot_id, *params)`` per process and return its result read-only.
+
+    Keys are a snapshot id plus plain parameters, so Streamlit never hashes a
+    frame; results are shared between sessions without the per-call copy
+    ``st.cache_data`` makes, and ``freeze`` stops anyone mutating them.
+
+    Every call is timed (lookup and argument hashing included) and counted as
+    a hit or miss; misses also time the computation as ``<name>:compute``, and
+    entries dropped by ``max_entries`` or ``clear()`` count as evictions.
+
+    With ``persist=True`` a miss first asks the host's disk result cache, so
+    restarted and sibling processes reuse each other's work; the key includes
+    the source of the module defining ``func``, so editing it invalidates them.
+    """
+    if func is None:
+        return functools.partial(versioned, persist=persist)
+    name = func.__name__
+    sig = inspect.signature(func)
+
+    @functools.wraps(func)
+    def compute(*args, **kwargs):
+        _calls.stack[-1] = True
+        with METRICS.timer(f'{name}:compute'):
+            disk = get_result_cache() if persist else None
+            if disk is None:
+                return freeze(func(*args, **kwargs))
+            bound = sig.bind(*args, **kwargs)
+            bound.apply_defaults()
+            params = dict(bound.arguments)
+            sid = params.pop(next(iter(sig.parameters)))
+            return freeze(disk.get_or_compute(sid, name, params, lambda: func(*args, **kwargs),
+                                              source_version(inspect.getsourcefile(func))))
+
+    opts = dict(max_entries=CACHE_ENTRIES, show_spinner=False)
+    if 'on_release' in inspect.signature(st.cache_resource.__call__).parameters:
+        opts['on_release'] = lambda _: METRICS.count(name, 'evict')
+    cached = st.cache_resource(**opts)(compute)
+
+    @functools.wraps(func)
+    def call(*args, **kwargs):
+        # A stack, since one cached function calls others on a miss
+        stack = _calls.__dict__.setdefault('stack', [])
+        stack.append(False)
+        try:
+            with METRICS.timer(name):
+                return cached(*args, **kwargs)
+        finally:
+            METRICS.count(name, 'miss' if stack.pop() else 'hit')
+    call.clear = cached.clear
+    return call
+
+
+def load_artifact(snapshot_id, name):
+    """Precomputed artifact for a snapshot, or None if not precomputed."""
+    return ArtifactStore(snapshot_id).load(name)
+
+
+@st.cache_resource
+def get_result_cache():
+    """The host's disk result cache; None when ``NYSHEALTH_RESULT_CACHE=off``."""
+    return open_result_cache()
+
+
+@st.cache_resource
+def get_shared_dataset():
+    """Handle on the host's shared snapshot; None unless ``NYSHEALTH_SHARED_DIR`` is set."""
+    return SharedDataset() if shared_dir() else None
+
+
+@versioned
+def load_data(snapshot_id, columns=None):
+    shared = get_shared_dataset()
+    if shared and shared.has(snapshot_id):
+        return shared.frame(snapshot_id, columns)
+    return SnapshotStore().read(columns, snapshot_id)
+
+
+@versioned
+def get_counties(snapshot_id, columns=CORE_COLUMNS):
+    shared = get_shared_dataset()
+    if shared and shared.has(snapshot_id):
+        return shared.counties(snapshot_id, columns)
+    return county_rows(load_data(snapshot_id, columns))
+
+
+@versioned
+def get_state_avgs(snapshot_id):
+    return state_averages(load_data(snapshot_id, CORE_COLUMNS))
+
+
+@versioned(persist=True)
+def get_burden_engine(snapshot_id):
+    cached = load_artifact(snapshot_id, 'burden')
+    if cached is not None:
+        return cached
+    return BurdenEngine(get_counties(snapshot_id), get_state_avgs(snapshot_id))
+
+
+@versioned(persist=True)
+def compute_burden(snapshot_id):
+    return get_burden_engine(snapshot_id).overall()
+
+
+def snapshot_columns(snapshot_id):
+    shared = get_shared_dataset()
+    if shared and shared.has(snapshot_id):
+        return list(shared.frame(snapshot_id).columns)
+    return SnapshotStore().columns(snapshot_id)
+
+
+@versioned(persist=True)
+def get_burden_uncertainty(snapshot_id):
+    cached = load_artifact(snapshot_id, 'uncertainty')
+    if cached is not None:
+        return cached
+    counts = tuple(c for c in COUNT_COLUMNS if c in snapshot_columns(snapshot_id))
+    return BurdenUncertainty(get_counties(snapshot_id, CORE_COLUMNS + counts), get_state_avgs(snapshot_id))
+
+
+@versioned(persist=True)
+def get_cube(snapshot_id):
+    cached = load_artifact(snapshot_id, 'cube')
+    if cached is not None:
+        return cached
+    return RollupCube(load_data(snapshot_id, CUBE_COLUMNS))
+
+
+@versioned(persist=True)
+def get_region_consistency(snapshot_id):
+    return get_cube(snapshot_id).consistency()
+
+
+@versioned(persist=True)
+def get_spatial_stats(snapshot_id):
+    """Moran's I, LISA and Gi* for every indicator and the overall burden, on shared borders."""
+    cached = load_artifact(snapshot_id, 'spatial')
+    if cached is not None:
+        return cached
+    return SpatialStats.from_pivot(get_query_backend(snapshot_id).county_pivot('indicator'),
+                                   compute_burden(snapshot_id))
+
+
+@versioned
+def get_query_backend(snapshot_id):
+    """Aggregation backend for one snapshot (``NYSHEALTH_QUERY_BACKEND``, default pandas)."""
+    if backend_name() == 'pandas':
+        return PandasBackend(get_cube(snapshot_id), get_state_avgs(snapshot_id))
+    return open_backend(snapshot_id=snapshot_id)
+
+
+@versioned
+def get_overview_counts(snapshot_id):
+    """Counties, topics, indicators and county records, from the query backend."""
+    return get_query_backend(snapshot_id).totals()
+
+
+@versioned(persist=True)
+def get_feature_matrix(snapshot_id, thresh=0.6, impute='median'):
+    name = artifact_name('features', thresh=thresh, impute=impute)
+    cached = load_artifact(snapshot_id, name)
+    if cached is not None:
+        return cached
+    return pivot_feature_matrix(get_query_backend(snapshot_id).county_pivot('indicator'), thresh, impute)
+
+
+@versioned(persist=True)
+def get_peer_index(snapshot_id, thresh=0.6, impute='median'):
+    """Peer-county index over the same feature matrix the clustering uses."""
+    name = artifact_name('peers', thresh=thresh, impute=impute)
+    cached = load_artifact(snapshot_id, name)
+    if cached is not None:
+        return cached
+    topic_of = {ind: t for t, inds in get_query_backend(snapshot_id).indicators.items() for ind in inds}
+    return PeerIndex(get_feature_matrix(snapshot_id, thresh, impute), topic_of)
+
+
+@versioned(persist=True)
+def run_clustering(snapshot_id, k, thresh=0.6, impute='median'):
+    name = artifact_name('clusters', k=k, thresh=thresh, impute=impute)
+    cached = load_artifact(snapshot_id, name)
+    if cached is not None:
+        return cached
+    return cluster_counties(get_feature_matrix(snapshot_id, thresh, impute), k)
+
+
+@versioned(persist=True)
+def get_cluster_stability(snapshot_id, k, thresh=0.6, impute='median'):
+    name = artifact_name('stability', k=k, thresh=thresh, impute=impute)
+    cached = load_artifact(snapshot_id, name)
+    if cached is not None:
+        return cached
+    cdf = run_clustering(snapshot_id, k, thresh, impute)[0]
+    return ClusterStability(get_feature_matrix(snapshot_id, thresh, impute), k, cdf.set_index('county')['cluster'])
+
+
+@versioned(persist=True)
+def silhouette_range(snapshot_id, thresh=0.6, impute='median', k_max=7):
+    name = artifact_name('k_sweep', k_max=k_max, thresh=thresh, impute=impute)
+    cached = load_artifact(snapshot_id, name)
+    if cached is not None:
+        return cached
+    return sweep_k(get_feature_matrix(snapshot_id, thresh, impute).X, range(2, k_max + 1))
+
+
+@versioned(persist=True)
+def get_topic_correlations(snapshot_id):
+    cached = load_artifact(snapshot_id, 'topic_corr')
+    if cached is not None:
+        return cached
+    return pivot_correlations(get_query_backend(snapshot_id).county_pivot('health_topic'))
+
+
+@versioned(persist=True)
+def get_correlation_engine(snapshot_id, method='pearson'):
+    cached = load_artifact(snapshot_id, artifact_name('indicator_corr', method=method))
+    if cached is not None:
+        return cached
+    query = get_query_backend(snapshot_id)
+    topics = {ind: t for t, inds in query.indicators.items() for ind in inds}
+    return CorrelationEngine(query.county_pivot('indicator'), topics, method)
+
+
+# ── Maps ─────────────────────────────────────────────────────────────────────
+@st.cache_resource(show_spinner=False)
+def county_geojson(level):
+    """County outlines at one simplification level, decoded once per process."""
+    return load_geometry().geojson(level)
+
+
+def choropleth_map(frame, locations='county_name', zoom=5.5, **kwargs):
+    """Mapbox choropleth of ``frame`` joined to the county outlines on its ``locations`` column.
+
+    Outlines go out at the coarsest level that is exact to a pixel at ``zoom``,
+    and each trace carries only the counties it colors.
+    """
+    import plotly.express as px
+
+    geo = county_geojson(level_for_zoom(zoom))
+    kwargs.setdefault('mapbox_style', 'carto-positron')
+    fig = px.choropleth_mapbox(frame, geojson=geo, locations=locations, featureidkey='id',
+                               zoom=zoom, center=MAP_CENTER, **kwargs)
+    for trace in fig.data:
+        keep = set(trace.locations)
+        trace.geojson = {'type': 'FeatureCollection', 'features': [f for f in geo['features'] if f['id'] in keep]}
+    fig.update_traces(marker_line_width=0.6, marker_line_color='rgba(255,255,255,0.7)')
+    return fig
+
+
+# ── Versions ─────────────────────────────────────────────────────────────────
+@st.cache_resource
+def get_refresher():
+    """Process-wide background refresher; None unless ``NYSHEALTH_REFRESH_SECONDS`` is set."""
+    interval = refresh_interval()
+    if not interval:
+        return None
+    refresher = Refresher(interval, warm=warm_caches)
+    refresher.start()
+    return refresher
+
+
+def warm_caches(snapshot_id):
+    """Fill the caches every page reads for ``snapshot_id`` before it goes live."""
+    for fn in (get_state_avgs, compute_burden, get_cube, get_query_backend, get_overview_counts,
+               get_feature_matrix, get_topic_correlations, get_region_consistency, get_spatial_stats,
+               get_peer_index):
+        fn(snapshot_id)
+
+
+def live_snapshot_id():
+    shared = get_shared_dataset()
+    if shared and shared.live():
+        return shared.live()
+    refresher = get_refresher()
+    return refresher.live if refresher else ensure_snapshot()
+
+
+def current_snapshot_id():
+    """Version this session is pinned to; every cache above is keyed on it.
+
+    A session keeps one version across reruns and pages. When a newer one is
+    live it is offered in the sidebar rather than swapped in mid-session.
+    """
+    live = live_snapshot_id()
+    pinned = st.session_state.get('snapshot_id')
+    if pinned is None or not os.path.exists(SnapshotStore().path(pinned)):
+        pinned = st.session_state['snapshot_id'] = live
+    elif pinned != live and st.sidebar.button("🔄 Newer data available — load it"):
+        pinned = st.session_state['snapshot_id'] = live
+    return pinned
+
+
+# ── Instrumentation ──────────────────────────────────────────────────────────
+def start_page(name):
+    """Start timing this page script; ``end_page()`` records it as ``page:<name>``."""
+    st.session_state['_page_timer'] = (name, time.perf_counter())
+
+
+def end_page():
+    name, t0 = st.session_state.pop('_page_timer', (None, None))
+    if name:
+        METRICS.observe(f'page:{name}', time.perf_counter() - t0)
+    if os.environ.get(ADMIN_ENV):
+        admin_panel()
+
+
+def plotly_chart(fig, **kwargs):
+    """``st.plotly_chart`` timed as the ``plotly_chart`` stage (figure serialization)."""
+    kwargs.setdefault('use_container_width', True)
+    with METRICS.timer('plotly_chart'):
+        return st.plotly_chart(fig, **kwargs)
 
 
-@st.cache_data
-def load_data():
-    cache = os.path.join(os.path.dirname(os.path.abspath(__file__)),
-                         "nys_health_output", "chirs_data_cache.csv")
-    if os.path.exists(cache):
-        df = pd.read_csv(cache)
-    else:
-        import requests
-        records = []
-        for offset in range(0, 30000, 5000):
-            r = requests.get(f"https://health.data.ny.gov/resource/54ci-sdfi.json?$limit=5000&$offset={offset}")
-            if r.status_code != 200 or not r.json(): break
-            records.extend(r.json())
-        df = pd.DataFrame(records)
-        os.makedirs(os.path.dirname(cache), exist_ok=True)
-        df.to_csv(cache, index=False)
-
-    for c in ['event_count', 'average_number_of_denominator', 'percent_rate']:
-        if c in df.columns:
-            df[c] = pd.to_numeric(df[c], errors='coerce')
-
-    df['lat'] = df['county_name'].map(lambda x: COORDS.get(x, (np.nan, np.nan))[0])
-    df['lon'] = df['county_name'].map(lambda x: COORDS.get(x, (np.nan, np.nan))[1])
-    return df
-
-
-@st.cache_data
-def get_counties(df):
-    exclude = ['New York State', 'New York State (excluding NYC)', 'New York City',
-               'Capital Region', 'Central NY', 'Finger Lakes', 'Long Island',
-               'Mid-Hudson', 'Mohawk Valley', 'North Country', 'Southern Tier',
-               'Tug Hill Seaway', 'Western NY']
-    out = df[~df['county_name'].isin(exclude)].copy()
-    return out[~out['county_name'].str.contains('/', na=False)].copy()
-
-
-@st.cache_data
-def get_state_avgs(df):
-    s = df[df['county_name'] == 'New York State']
-    return dict(zip(s['indicator'], s['percent_rate']))
-
-
-@st.cache_data
-def compute_burden(dfc, savgs):
-    rows = []
-    for _, r in dfc.iterrows():
-        sa = savgs.get(r.get('indicator'))
-        cr = r.get('percent_rate')
-        if pd.notna(cr) and pd.notna(sa) and sa != 0:
-            rows.append({'county': r['county_name'], 'ratio': cr / sa})
-    return pd.DataFrame(rows).groupby('county')['ratio'].mean().sort_values(ascending=False)
+def admin_panel():
+    """Sidebar p50/p95 per stage and cache hit rates for this process (``NYSHEALTH_ADMIN_PANEL=1``)."""
+    with st.sidebar.expander("⏱️ Instrumentation"):
+        stages = pd.DataFrame(METRICS.stages())
+        if stages.empty:
+            st.caption("No timings recorded yet.")
+            return
+        st.dataframe(stages[['stage', 'count', 'p50_ms', 'p95_ms']].sort_values('p95_ms', ascending=False),
+                     hide_index=True, use_container_width=True,
+                     column_config={c: st.column_config.NumberColumn(format='%.1f') for c in ('p50_ms', 'p95_ms')})
+        cache = pd.DataFrame.from_dict(METRICS.events(), orient='index').reindex(
+            columns=['hit', 'miss', 'evict', 'disk_hit', 'disk_miss']).fillna(0).astype(int)
+        cache['hit_rate'] = cache['hit'] / (cache['hit'] + cache['miss']).where(lambda n: n > 0)
+        st.dataframe(cache.sort_index(), use_container_width=True,
+                     column_config={'hit_rate': st.column_config.NumberColumn(format='%.2f')})
+        st.download_button("Prometheus text", METRICS.prometheus(), file_name='nyshealth.prom')
 
 
 def inject_theme_css():
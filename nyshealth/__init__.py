@@ -0,0 +1,27 @@
+"""
+Compute core for the NYS Health Dashboard (no Streamlit imports).
+
+Public names are resolved lazily, so ``import nyshealth`` stays cheap and a
+batch job only pays for the submodules it touches.
+"""
+import importlib
+
+_EXPORTS = {
+    'load_snapshot': 'nyshealth.data', 'county_rows': 'nyshealth.data',
+    'state_averages': 'nyshealth.data', 'county_pivot': 'nyshealth.data',
+    'BurdenEngine': 'nyshealth.burden', 'build_feature_matrix': 'nyshealth.features',
+    'cluster_counties': 'nyshealth.clustering',
+    'sweep_k': 'nyshealth.model_select', 'topic_correlations': 'nyshealth.correlation',
+    'SnapshotStore': 'nyshealth.snapshot', 'SocrataClient': 'nyshealth.socrata',
+    'open_backend': 'nyshealth.query', 'RollupCube': 'nyshealth.cube',
+    'SpatialStats': 'nyshealth.spatial', 'BurdenUncertainty': 'nyshealth.uncertainty',
+    'ClusterStability': 'nyshealth.stability',
+}
+
+__all__ = sorted(_EXPORTS)
+
+
+def __getattr__(name):
+    if name in _EXPORTS:
+        return getattr(importlib.import_module(_EXPORTS[name]), name)
+    raise AttributeError(f"module 'nyshealth' has no attribute {name!r}")
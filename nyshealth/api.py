@@ -0,0 +1,272 @@
+"""
+Read-only JSON API over the current snapshot, run as its own process.
+
+    python -m nyshealth.api [--host 127.0.0.1] [--port 8765]
+
+    GET /                     endpoint index
+    GET /burden               every county's burden ratio and rank
+    GET /county/{name}        one county's overall, per-topic and per-indicator ratios
+    GET /indicator/{name}     per-county rates for one indicator
+    GET /clusters?k=3         KMeans cluster assignments and PCA coordinates
+    GET /metrics              request timings in Prometheus text format
+
+Every response body is serialized, gzipped and given an ETag once per
+snapshot, so a request is a dictionary lookup plus headers. Clients get
+``304 Not Modified`` on a matching ``If-None-Match``. A watcher thread checks
+``CURRENT`` every ``--check`` seconds and builds a new snapshot's responses
+before swapping them in, so no request waits on a rebuild.
+"""
+import argparse, gzip, hashlib, json, logging, math, threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlsplit
+
+from nyshealth.constants import COUNTY_REGION
+from nyshealth.metrics import METRICS
+
+CLUSTER_KS = range(2, 6)        # the ML page's K slider
+MAX_K = 10
+MIN_GZIP = 512
+ENDPOINTS = ('', 'burden', 'county', 'indicator', 'clusters')
+
+log = logging.getLogger(__name__)
+
+
+try:
+    from orjson import dumps as _dumps
+except ImportError:
+    def _dumps(obj):
+        return json.dumps(obj, separators=(',', ':'), allow_nan=False).encode()
+
+
+def _num(x, digits=4):
+    """JSON-safe float: NaN/inf become null."""
+    x = float(x)
+    return round(x, digits) if math.isfinite(x) else None
+
+
+class Response:
+    __slots__ = ('body', 'gzipped', 'etag')
+
+    def __init__(self, obj, snapshot_id):
+        self.body = _dumps(obj)
+        self.gzipped = gzip.compress(self.body, 6) if len(self.body) >= MIN_GZIP else None
+        self.etag = f'"{snapshot_id}-{hashlib.sha1(self.body).hexdigest()[:16]}"'
+
+
+class ResponseSet:
+    """Every response for one snapshot, built up front."""
+
+    def __init__(self, snapshot_id, store=None):
+        from nyshealth.artifacts import ArtifactStore
+        from nyshealth.cube import COLUMNS, RollupCube
+        from nyshealth.data import county_rows, state_averages
+        from nyshealth.snapshot import SnapshotStore
+
+        self.snapshot_id = snapshot_id
+        self._artifacts = ArtifactStore(snapshot_id)
+        self._lock = threading.Lock()
+        df = (store or SnapshotStore()).read(COLUMNS, snapshot_id)
+        self._dfc = county_rows(df)
+        engine = self._artifacts.load('burden')
+        if engine is None:
+            from nyshealth.burden import BurdenEngine
+            engine = BurdenEngine(self._dfc, state_averages(df))
+        cube = self._artifacts.load('cube') or RollupCube(df)
+
+        overall = engine.overall()
+        ranks = overall.rank(ascending=False, method='min')
+        self.burden = self._make({'snapshot_id': snapshot_id, 'counties': [
+            {'county': c, 'region': COUNTY_REGION.get(c), 'ratio': _num(r), 'rank': int(ranks[c])}
+            for c, r in overall.items()]})
+
+        by_topic = engine.by_topic()
+        self.counties = {}
+        for c in engine.counties:
+            prof = engine.county_profile(c)
+            self.counties[c.lower()] = self._make({
+                'snapshot_id': snapshot_id, 'county': c, 'region': COUNTY_REGION.get(c),
+                'ratio': _num(overall[c]), 'rank': int(ranks[c]),
+                'topics': {t: _num(v) for t, v in by_topic.loc[c].dropna().items()},
+                'indicators': [{'topic': t, 'indicator': i, 'county_rate': _num(cr), 'state_rate': _num(sr),
+                                'ratio': _num(r)}
+                               for t, i, cr, sr, r in prof.itertuples(index=False)]})
+
+        savgs = state_averages(df)
+        self.indicators = {}
+        for topic, inds in cube.indicators.items():
+            for ind in inds:
+                rows = cube.indicator_counties(topic, ind)
+                self.indicators[ind.lower()] = self._make({
+                    'snapshot_id': snapshot_id, 'indicator': ind, 'topic': topic,
+                    'state_rate': _num(savgs.get(ind, math.nan)),
+                    'counties': [{'county': c, 'rate': _num(r), 'years': y}
+                                 for c, r, y in zip(rows['county_name'], rows['rate'], rows['years'])]})
+
+        self.clusters = {k: self._cluster_response(k) for k in CLUSTER_KS}
+        self.index = self._make({'snapshot_id': snapshot_id, 'endpoints': [
+            '/burden', '/county/{name}', '/indicator/{name}', f'/clusters?k=2..{MAX_K}'],
+            'counties': len(self.counties), 'indicators': len(self.indicators)})
+
+    def _make(self, obj):
+        return Response(obj, self.snapshot_id)
+
+    def _cluster_response(self, k):
+        from nyshealth.artifacts import artifact_name
+
+        res = self._artifacts.load(artifact_name('clusters', k=k, thresh=0.6, impute='median'))
+        if res is None:
+            from nyshealth.clustering import cluster_counties
+            from nyshealth.features import build_feature_matrix
+            res = cluster_counties(build_feature_matrix(self._dfc), k)
+        cdf, sil, var, profiles = res
+        return self._make({
+            'snapshot_id': self.snapshot_id, 'k': k, 'silhouette': _num(sil),
+            'pca_variance': [_num(v) for v in var],
+            'counties': [{'county': c, 'cluster': cl, 'pc1': _num(a), 'pc2': _num(b)}
+                         for c, cl, a, b in zip(cdf['county'], cdf['cluster'], cdf['pc1'], cdf['pc2'])],
+            'profiles': {name: {'members': p['members'],
+                                'concerns': {i: _num(z) for i, z in p['concerns'].items()},
+                                'strengths': {i: _num(z) for i, z in p['strengths'].items()}}
+                         for name, p in profiles.items()}})
+
+    def route(self, path, query):
+        """(status, Response or error message) for a request path."""
+        parts = [unquote(p) for p in path.strip('/').split('/', 1)] if path.strip('/') else []
+        if not parts:
+            return 200, self.index
+        head, rest = parts[0], (parts[1] if len(parts) > 1 else '')
+        if head == 'burden' and not rest:
+            return 200, self.burden
+        if head == 'county' and rest:
+            r = self.counties.get(rest.lower())
+            return (200, r) if r else (404, f"unknown county {rest!r}")
+        if head == 'indicator' and rest:
+            r = self.indicators.get(rest.lower())
+            return (200, r) if r else (404, f"unknown indicator {rest!r}")
+        if head == 'clusters' and not rest:
+            try:
+                k = int(query.get('k', ['3'])[0])
+            except ValueError:
+                return 400, "k must be an integer"
+            if not 2 <= k <= MAX_K:
+                return 400, f"k must be between 2 and {MAX_K}"
+            if k not in self.clusters:
+                with self._lock:
+                    if k not in self.clusters:
+                        self.clusters[k] = self._cluster_response(k)
+            return 200, self.clusters[k]
+        return 404, f"no such endpoint {path!r}"
+
+
+class HealthAPI:
+    """Serves the ``ResponseSet`` of the current snapshot, swapping it when CURRENT moves."""
+
+    def __init__(self, store=None, check_every=30.0, watch=True):
+        from nyshealth.data import ensure_snapshot
+        from nyshealth.snapshot import SnapshotStore
+
+        self.store = store or SnapshotStore()
+        self.check_every = check_every
+        self.responses = ResponseSet(ensure_snapshot(self.store), self.store)
+        self._lock = threading.Lock()
+        self._halt = threading.Event()
+        if watch and check_every > 0:
+            threading.Thread(target=self._watch, name='nyshealth-api-watch', daemon=True).start()
+
+    def current(self):
+        return self.responses
+
+    def reload(self):
+        """Build the responses for a moved CURRENT, then swap them in; True if swapped."""
+        with self._lock:                    # one build at a time; requests keep the old set
+            sid = self.store.current_id()
+            if not sid or sid == self.responses.snapshot_id:
+                return False
+            with METRICS.timer('api:build_responses'):
+                responses = ResponseSet(sid, self.store)
+            self.responses = responses
+            return True
+
+    def stop(self):
+        self._halt.set()
+
+    def _watch(self):
+        while not self._halt.wait(self.check_every):
+            try:
+                self.reload()
+            except Exception:               # keep serving the current set; retry next check
+                log.exception("building API responses failed")
+
+
+def make_handler(api):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'        # keep-alive
+        disable_nagle_algorithm = True       # headers and body go out as separate writes
+        server_version = 'nyshealth-api'
+
+        def do_GET(self):
+            url = urlsplit(self.path)
+            if url.path == '/metrics':
+                return self._send(200, METRICS.prometheus().encode(), content_type='text/plain; version=0.0.4')
+            head = url.path.strip('/').split('/', 1)[0]
+            with METRICS.timer(f"api:/{head if head in ENDPOINTS else 'other'}"):   # bounded label set
+                self._get(url)
+
+        def _get(self, url):
+            status, res = api.current().route(url.path, parse_qs(url.query))
+            if status != 200:
+                return self._send(status, _dumps({'error': res}))
+            inm = self.headers.get('If-None-Match', '')
+            if res.etag in {t.strip().removeprefix('W/') for t in inm.split(',')} or inm.strip() == '*':
+                return self._send(304, b'', res.etag)
+            gz = res.gzipped is not None and 'gzip' in self.headers.get('Accept-Encoding', '')
+            self._send(200, res.gzipped if gz else res.body, res.etag, gz)
+
+        def do_HEAD(self):
+            self.do_GET()
+
+        def _send(self, status, body, etag=None, gz=False, content_type='application/json'):
+            self.send_response(status)
+            self.send_header('Content-Type', content_type)
+            if etag:
+                self.send_header('ETag', etag)
+                self.send_header('Cache-Control', 'public, max-age=60')
+                self.send_header('Vary', 'Accept-Encoding')
+            if gz:
+                self.send_header('Content-Encoding', 'gzip')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            if self.command != 'HEAD' and status != 304:
+                self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    return Handler
+
+
+def serve(host='127.0.0.1', port=8765, check_every=30.0):
+    api = HealthAPI(check_every=check_every)
+    server = ThreadingHTTPServer((host, port), make_handler(api))
+    server.daemon_threads = True
+    print(f"Serving snapshot {api.responses.snapshot_id} on http://{host}:{server.server_port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        api.stop()
+        server.server_close()
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(prog='python -m nyshealth.api', description=__doc__.strip().splitlines()[0])
+    ap.add_argument('--host', default='127.0.0.1')
+    ap.add_argument('--port', type=int, default=8765)
+    ap.add_argument('--check', type=float, default=30.0, help="seconds between CURRENT checks")
+    args = ap.parse_args(argv)
+    serve(args.host, args.port, args.check)
+
+
+if __name__ == '__main__':
+    main()
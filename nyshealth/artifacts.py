@@ -0,0 +1,67 @@
+"""
+Versioned directory of precomputed derived results.
+
+``nys_health_artifacts/<snapshot_id>/`` holds one pickle per artifact plus a
+``manifest.json``; the app loads from it when present and computes live
+otherwise. Artifacts written by a different version of the ``nyshealth``
+code are ignored. Written by ``python -m nyshealth.precompute``.
+"""
+import functools, glob, hashlib, json, os, pickle, time
+
+from nyshealth.snapshot import OUTPUT_DIR
+
+ARTIFACTS_DIR = os.path.join(os.path.dirname(OUTPUT_DIR), "nys_health_artifacts")
+
+
+@functools.lru_cache(maxsize=None)
+def code_version():
+    """Fingerprint of the nyshealth sources the pickled objects depend on."""
+    h = hashlib.sha1()
+    for path in sorted(glob.glob(os.path.join(os.path.dirname(os.path.abspath(__file__)), '*.py'))):
+        with open(path, 'rb') as f:
+            h.update(f.read())
+    return h.hexdigest()[:12]
+
+
+def artifact_name(kind, **params):
+    """Stable artifact name, e.g. ``clusters-impute=median-k=3-thresh=0.6``."""
+    return '-'.join([kind] + [f"{k}={v}" for k, v in sorted(params.items())])
+
+
+class ArtifactStore:
+    def __init__(self, snapshot_id, root=ARTIFACTS_DIR):
+        self.snapshot_id = snapshot_id
+        self.dir = os.path.join(root, str(snapshot_id))
+
+    def _path(self, name):
+        return os.path.join(self.dir, f"{name}.pkl")
+
+    def manifest(self):
+        try:
+            with open(os.path.join(self.dir, 'manifest.json')) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+
+    def load(self, name):
+        """The stored artifact, or None when it was not precomputed."""
+        m = self.manifest()
+        if m.get('code_version') != code_version() or name not in m.get('artifacts', {}):
+            return None
+        with open(self._path(name), 'rb') as f:
+            return pickle.load(f)
+
+    def save(self, name, obj):
+        os.makedirs(self.dir, exist_ok=True)
+        tmp = f"{self._path(name)}.{os.getpid()}.tmp"
+        with open(tmp, 'wb') as f:
+            pickle.dump(obj, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, self._path(name))
+
+    def write_manifest(self, timings):
+        m = {'snapshot_id': self.snapshot_id, 'code_version': code_version(),
+             'created': time.time(), 'artifacts': timings}
+        tmp = os.path.join(self.dir, f"manifest.json.{os.getpid()}.tmp")
+        with open(tmp, 'w') as f:
+            json.dump(m, f, indent=2)
+        os.replace(tmp, os.path.join(self.dir, 'manifest.json'))
@@ -0,0 +1,79 @@
+"""
+Vectorized burden engine.
+
+Builds the county × (topic, indicator) matrix of county rate / state average
+once with array operations. The overall burden, per-topic rollups and
+single-county profiles are all read from that one matrix.
+"""
+import numpy as np, pandas as pd
+
+
+class BurdenEngine:
+    """Ratio sums and counts per county × (topic, indicator) cell."""
+
+    def __init__(self, dfc, savgs):
+        state = pd.Series(savgs, dtype='float64')
+        state = state[~state.index.duplicated(keep='last')]
+        ind = dfc['indicator'].astype('category')
+        sa_lut = np.append(state.reindex(ind.cat.categories).to_numpy(), np.nan)
+        sa = sa_lut[ind.cat.codes.to_numpy()]
+        rate = dfc['percent_rate'].to_numpy(dtype='float64', na_value=np.nan)
+        ok = np.isfinite(rate) & np.isfinite(sa) & (sa != 0)
+
+        # Work on category codes; (topic, indicator) pairs become one int64 key
+        county = dfc['county_name'].astype('category')
+        topic = dfc['health_topic'].astype('category')
+        uc, cc = np.unique(county.cat.codes.to_numpy()[ok], return_inverse=True)
+        self.counties = pd.Index(county.cat.categories[uc], name='county')
+        n_ind = len(ind.cat.categories)
+        key = topic.cat.codes.to_numpy()[ok].astype('int64') * n_ind + ind.cat.codes.to_numpy()[ok]
+        uk, pc = np.unique(key, return_inverse=True)
+        self.columns = pd.MultiIndex.from_arrays(
+            [topic.cat.categories[uk // n_ind], ind.cat.categories[uk % n_ind]], names=['topic', 'indicator'])
+        shape = (len(self.counties), len(self.columns))
+        flat = cc * shape[1] + pc
+
+        def cellsum(w=None):
+            return np.bincount(flat, weights=w, minlength=shape[0] * shape[1]).reshape(shape)
+
+        self.n = cellsum()
+        self.ratio_sum = cellsum(rate[ok] / sa[ok])
+        self.rate_sum = cellsum(rate[ok])
+        self.state_rate = state.reindex(self.columns.get_level_values('indicator')).to_numpy()
+
+        # Column → topic one-hot for per-topic rollups via one matrix product
+        tc, self.topics = pd.factorize(self.columns.get_level_values('topic'), sort=True)
+        self._topic_onehot = np.zeros((shape[1], len(self.topics)))
+        self._topic_onehot[np.arange(shape[1]), tc] = 1.0
+
+    @property
+    def matrix(self):
+        """Mean ratio per county × (topic, indicator); NaN where a county has no data."""
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return pd.DataFrame(self.ratio_sum / self.n, index=self.counties, columns=self.columns)
+
+    def overall(self):
+        """Mean ratio over every county row, highest burden first."""
+        s = pd.Series(self.ratio_sum.sum(axis=1) / self.n.sum(axis=1), index=self.counties)
+        return s.rename('ratio').sort_values(ascending=False)
+
+    def by_topic(self):
+        """Mean ratio per county × topic."""
+        with np.errstate(invalid='ignore', divide='ignore'):
+            r = (self.ratio_sum @ self._topic_onehot) / (self.n @ self._topic_onehot)
+        return pd.DataFrame(r, index=self.counties, columns=pd.Index(self.topics, name='topic'))
+
+    def county_profile(self, county):
+        """One row per (topic, indicator) with data for ``county``."""
+        if county not in self.counties:
+            return pd.DataFrame(columns=['topic', 'indicator', 'county_rate', 'state_rate', 'ratio'])
+        i = self.counties.get_loc(county)
+        has = self.n[i] > 0
+        n = self.n[i, has]
+        return pd.DataFrame({
+            'topic': self.columns.get_level_values('topic')[has],
+            'indicator': self.columns.get_level_values('indicator')[has],
+            'county_rate': self.rate_sum[i, has] / n,
+            'state_rate': self.state_rate[has],
+            'ratio': self.ratio_sum[i, has] / n,
+        })
@@ -0,0 +1,44 @@
+"""
+KMeans + PCA county clustering on the shared feature matrix.
+"""
+import pandas as pd
+
+from nyshealth.constants import COORDS
+
+
+def cluster_counties(fm, k, random_state=42):
+    """(map/PCA frame, silhouette, PCA variance ratio, per-cluster profiles)."""
+    from sklearn.cluster import KMeans
+    from sklearn.decomposition import PCA
+    from sklearn.metrics import silhouette_score
+
+    pivot, X = fm.pivot, fm.X
+    pca = PCA(n_components=2)
+    X2 = pca.fit_transform(X)
+    km = KMeans(n_clusters=k, random_state=random_state, n_init=10)
+    labels = km.fit_predict(X)
+    sil = silhouette_score(X, labels)
+
+    result = pd.DataFrame({
+        'county': pivot.index.astype(object),
+        'pc1': X2[:, 0], 'pc2': X2[:, 1],
+        'cluster': [f'Cluster {l + 1}' for l in labels]
+    })
+    coords = pd.DataFrame.from_dict(COORDS, orient='index', columns=['lat', 'lon'])
+    result = result.join(coords, on='county')
+
+    # Cluster profiles
+    profiles = {}
+    overall_mean = pivot.mean()
+    overall_std = pivot.std()
+    for c_idx in range(k):
+        members = pivot.index[labels == c_idx].tolist()
+        cluster_mean = pivot.loc[members].mean()
+        z = (cluster_mean - overall_mean) / overall_std
+        profiles[f'Cluster {c_idx + 1}'] = {
+            'members': sorted(members),
+            'concerns': z.nlargest(5).to_dict(),
+            'strengths': z.nsmallest(5).to_dict(),
+        }
+
+    return result.dropna(subset=['lat', 'lon']), sil, pca.explained_variance_ratio_[:2], profiles
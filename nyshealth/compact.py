@@ -0,0 +1,70 @@
+"""
+Compact in-memory representation of the CHIRS frame.
+
+Descriptive fields become categoricals (integer codes over small dimension
+tables) and measures drop to float32 where that loses nothing the dashboard
+shows. ``python -m nyshealth.compact`` prints bytes per column before/after
+for the current snapshot.
+"""
+import pandas as pd
+
+DIMENSIONS = ['county_name', 'health_topic', 'indicator', 'data_years']
+# Rates and coordinates are displayed to 1-2 decimals; float32 keeps ~7 digits.
+FLOAT32 = ['percent_rate', 'lat', 'lon']
+# Counts stay exact in float32 only below 2**24.
+COUNTS = ['event_count', 'average_number_of_denominator']
+MAX_CARDINALITY = 0.5
+
+
+def compact_frame(df):
+    """Categorical dimensions, float32 measures; other low-cardinality strings too."""
+    out = {}
+    for c in df.columns:
+        s = df[c]
+        is_text = s.dtype == object or pd.api.types.is_string_dtype(s)
+        if isinstance(s.dtype, pd.CategoricalDtype):
+            pass
+        elif c in DIMENSIONS or (is_text and s.nunique() <= MAX_CARDINALITY * len(s)):
+            s = s.astype('category')
+        elif c in FLOAT32:
+            s = s.astype('float32')
+        elif c in COUNTS and pd.api.types.is_numeric_dtype(s) and not (s.abs() >= 2 ** 24).any():
+            s = s.astype('float32')
+        out[c] = s
+    return pd.DataFrame(out, index=df.index)
+
+
+def expand_frame(df):
+    """Inverse of ``compact_frame``: object strings and float64, as read from CSV."""
+    out = {}
+    for c in df.columns:
+        s = df[c]
+        if isinstance(s.dtype, pd.CategoricalDtype):
+            s = s.astype(object)
+        elif pd.api.types.is_float_dtype(s):
+            s = s.astype('float64')
+        out[c] = s
+    return pd.DataFrame(out, index=df.index)
+
+
+def memory_report(before, after):
+    """Deep bytes per column for two representations of the same frame."""
+    b = before.memory_usage(deep=True, index=False)
+    a = after.memory_usage(deep=True, index=False).reindex(b.index)
+    rep = pd.DataFrame({'dtype_before': before.dtypes.astype(str),
+                        'dtype_after': after.dtypes.reindex(b.index).astype(str),
+                        'bytes_before': b, 'bytes_after': a})
+    rep.loc['TOTAL'] = ['', '', b.sum(), a.sum()]
+    rep['saved'] = 1 - rep['bytes_after'] / rep['bytes_before']
+    return rep
+
+
+if __name__ == '__main__':
+    from nyshealth.snapshot import SnapshotStore
+
+    df = SnapshotStore().read()
+    rep = memory_report(expand_frame(df), compact_frame(df))
+    with pd.option_context('display.width', 120):
+        print(rep.to_string(formatters={'bytes_before': '{:,.0f}'.format,
+                                        'bytes_after': '{:,.0f}'.format,
+                                        'saved': '{:.0%}'.format}))
@@ -0,0 +1,54 @@
+"""
+Static reference data for New York State counties.
+"""
+
+# ── NYS County Coordinates ──────────────────────────────────────────────────
+COORDS = {
+    'Albany': (42.65,-73.76), 'Allegany': (42.26,-78.03), 'Broome': (42.16,-75.82),
+    'Cattaraugus': (42.25,-78.68), 'Cayuga': (42.93,-76.57), 'Chautauqua': (42.30,-79.41),
+    'Chemung': (42.14,-76.76), 'Chenango': (42.49,-75.61), 'Clinton': (44.75,-73.68),
+    'Columbia': (42.25,-73.63), 'Cortland': (42.60,-76.18), 'Delaware': (42.20,-74.97),
+    'Dutchess': (41.77,-73.74), 'Erie': (42.75,-78.78), 'Essex': (44.12,-73.78),
+    'Franklin': (44.59,-74.30), 'Fulton': (43.11,-74.42), 'Genesee': (43.00,-78.19),
+    'Greene': (42.28,-74.13), 'Hamilton': (43.66,-74.50), 'Herkimer': (43.42,-74.96),
+    'Jefferson': (44.00,-75.86), 'Lewis': (43.78,-75.45), 'Livingston': (42.73,-77.79),
+    'Madison': (42.91,-75.67), 'Monroe': (43.16,-77.61), 'Montgomery': (42.91,-74.44),
+    'Nassau': (40.74,-73.59), 'Niagara': (43.17,-78.83), 'Oneida': (43.24,-75.44),
+    'Onondaga': (43.05,-76.15), 'Ontario': (42.85,-77.30), 'Orange': (41.40,-74.27),
+    'Orleans': (43.34,-78.22), 'Oswego': (43.46,-76.21), 'Otsego': (42.63,-75.03),
+    'Putnam': (41.43,-73.76), 'Rensselaer': (42.71,-73.51), 'Rockland': (41.15,-74.02),
+    'Saratoga': (43.10,-73.86), 'Schenectady': (42.81,-74.06), 'Schoharie': (42.59,-74.45),
+    'Schuyler': (42.39,-76.88), 'Seneca': (42.78,-76.82), 'St. Lawrence': (44.49,-75.11),
+    'Steuben': (42.27,-77.39), 'Suffolk': (40.94,-72.68), 'Sullivan': (41.72,-74.77),
+    'Tioga': (42.17,-76.31), 'Tompkins': (42.45,-76.47), 'Ulster': (41.89,-74.26),
+    'Warren': (43.56,-73.84), 'Washington': (43.31,-73.43), 'Wayne': (43.07,-77.06),
+    'Westchester': (41.12,-73.79), 'Wyoming': (42.70,-78.23), 'Yates': (42.63,-77.11),
+    'Bronx': (40.84,-73.86), 'Kings': (40.63,-73.95), 'New York': (40.78,-73.97),
+    'Queens': (40.72,-73.79), 'Richmond': (40.58,-74.15),
+}
+
+# ── Aggregate (non-county) rows in CHIRS ────────────────────────────────────
+AGGREGATE_ROWS = ['New York State', 'New York State (excluding NYC)', 'New York City',
+                  'Capital Region', 'Central NY', 'Finger Lakes', 'Long Island',
+                  'Mid-Hudson', 'Mohawk Valley', 'North Country', 'Southern Tier',
+                  'Tug Hill Seaway', 'Western NY']
+
+# ── NYS DOH regions (the region rows above) → member counties ──────────────
+REGIONS = {
+    'Capital Region': ['Albany', 'Columbia', 'Greene', 'Rensselaer', 'Saratoga', 'Schenectady',
+                       'Warren', 'Washington'],
+    'Central NY': ['Cayuga', 'Cortland', 'Madison', 'Onondaga', 'Oswego'],
+    'Finger Lakes': ['Genesee', 'Livingston', 'Monroe', 'Ontario', 'Orleans', 'Seneca', 'Wayne',
+                     'Wyoming', 'Yates'],
+    'Long Island': ['Nassau', 'Suffolk'],
+    'Mid-Hudson': ['Dutchess', 'Orange', 'Putnam', 'Rockland', 'Sullivan', 'Ulster', 'Westchester'],
+    'Mohawk Valley': ['Fulton', 'Herkimer', 'Montgomery', 'Oneida', 'Otsego', 'Schoharie'],
+    'New York City': ['Bronx', 'Kings', 'New York', 'Queens', 'Richmond'],
+    'North Country': ['Clinton', 'Essex', 'Franklin', 'Hamilton'],
+    'Southern Tier': ['Broome', 'Chemung', 'Chenango', 'Delaware', 'Schuyler', 'Steuben', 'Tioga',
+                      'Tompkins'],
+    'Tug Hill Seaway': ['Jefferson', 'Lewis', 'St. Lawrence'],
+    'Western NY': ['Allegany', 'Cattaraugus', 'Chautauqua', 'Erie', 'Niagara'],
+}
+COUNTY_REGION = {c: r for r, counties in REGIONS.items() for c in counties}
+STATE = 'New York State'
@@ -0,0 +1,149 @@
+"""
+Cross-topic and indicator-level correlations between county health measures.
+
+``CorrelationEngine`` computes the full indicator × indicator matrix with
+pairwise-complete observations in a handful of matrix products, along with
+the per-pair N, p-values and a |r|-ordered pair index for top-k lookups.
+"""
+import numpy as np, pandas as pd
+
+from nyshealth.data import county_pivot
+
+METHODS = ('pearson', 'spearman')
+
+
+def topic_correlations(dfc, min_topics=5, min_counties=10):
+    """Topic × topic correlation of county mean rates; None if too few counties."""
+    return pivot_correlations(county_pivot(dfc, 'health_topic'), min_topics, min_counties)
+
+
+def pivot_correlations(pivot, min_topics=5, min_counties=10):
+    """Same as ``topic_correlations`` from an already built county × topic pivot."""
+    pivot = pivot.dropna(thresh=min_topics)
+    if len(pivot) <= min_counties:
+        return None
+    return pivot.corr()
+
+
+def _spearman(X, M, block=64):
+    """Spearman r with each pair's mid-ranks taken over only the rows both columns have.
+
+    ``C[i, r, s]`` is how much row ``s`` adds to row ``r``'s rank in column ``i``
+    (1 below, ½ tied), so ranks restricted to the rows where column ``j`` is
+    present are ``C[i] @ M[:, j]``: all pairs' ranks come from matrix products,
+    a block of columns at a time.
+    """
+    p = X.shape[1]
+    Mf = M.astype('float64')
+    Xt = X.T
+    C = (Xt[:, None, :] < Xt[:, :, None]) + 0.5 * (Xt[:, None, :] == Xt[:, :, None])
+    r = np.empty((p, p))
+    for a in range(0, p, block):
+        cols = slice(a, a + block)
+        Ri = C[cols] @ Mf + 0.5                               # [i, row, j]: rank in column i over rows j has
+        Rj = (C @ Mf[:, cols] + 0.5).transpose(2, 1, 0)       # [i, row, j]: rank in column j over rows i has
+        W = (M[:, cols].T[:, :, None] & M[None, :, :]).astype('float64')
+        n = W.sum(axis=1)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            sx, sy = (W * Ri).sum(axis=1), (W * Rj).sum(axis=1)
+            cov = (W * Ri * Rj).sum(axis=1) - sx * sy / n
+            vx = (W * Ri * Ri).sum(axis=1) - sx * sx / n
+            vy = (W * Rj * Rj).sum(axis=1) - sy * sy / n
+            r[cols] = cov / np.sqrt(vx * vy)
+    return r
+
+
+def pairwise_corr(X, method='pearson'):
+    """Column correlations over rows where both columns are present; returns (r, n).
+
+    Spearman ranks every pair over its own complete rows, like pandas.
+    """
+    if method not in METHODS:
+        raise ValueError(f"method must be one of {METHODS}, got {method!r}")
+    X = np.asarray(X, dtype='float64')
+    M = ~np.isnan(X)
+    Mf = M.astype('float64')
+    n = Mf.T @ Mf
+    if method == 'spearman':
+        r = _spearman(X, M)
+    else:
+        # Centre first so the sums of squares below do not cancel catastrophically
+        Z = np.where(M, X - np.nanmean(X, axis=0), 0.0)
+        s = Z.T @ Mf                        # s[i, j] = Σ x_i over rows where j is present
+        ss = (Z * Z).T @ Mf
+        with np.errstate(divide='ignore', invalid='ignore'):
+            cov = Z.T @ Z - s * s.T / n
+            var = ss - s * s / n
+            r = cov / np.sqrt(var * var.T)
+    r[n < 3] = np.nan
+    np.fill_diagonal(r, 1.0)
+    return np.clip(r, -1.0, 1.0), n
+
+
+def corr_pvalues(r, n):
+    """Two-sided p-values of the t-test for zero correlation."""
+    from scipy.stats import t
+
+    df = n - 2
+    with np.errstate(divide='ignore', invalid='ignore'):
+        stat = np.abs(r) * np.sqrt(df / np.maximum(1 - r * r, 1e-300))
+    p = 2 * t.sf(stat, np.maximum(df, 1))
+    return np.where(df > 0, p, np.nan)
+
+
+class CorrelationEngine:
+    """Indicator × indicator correlations of a county pivot, grouped by topic."""
+
+    def __init__(self, pivot, topics, method='pearson'):
+        self.method = method
+        self.indicators = pd.Index(pivot.columns, name='indicator')
+        self.topic = pd.Series([topics.get(i) for i in self.indicators], index=self.indicators,
+                               name='health_topic')
+        self.r, self.n = pairwise_corr(pivot.to_numpy(), method)
+        self.p = corr_pvalues(self.r, self.n)
+
+        # Upper-triangle pairs ordered by |r|, so top-k queries are a filtered head()
+        iu, ju = np.triu_indices(len(self.indicators), k=1)
+        ok = ~np.isnan(self.r[iu, ju])
+        iu, ju = iu[ok], ju[ok]
+        order = np.argsort(-np.abs(self.r[iu, ju]), kind='stable')
+        self._pairs = (iu[order], ju[order])
+
+    @classmethod
+    def from_counties(cls, dfc, method='pearson'):
+        pairs = dfc[['indicator', 'health_topic']].drop_duplicates('indicator')
+        return cls(county_pivot(dfc, 'indicator'), dict(zip(pairs['indicator'], pairs['health_topic'])),
+                   method)
+
+    def _mask(self, alpha=None, min_n=10):
+        keep = self.n >= min_n
+        if alpha is not None:
+            keep &= self.p <= alpha
+        return keep
+
+    def matrix(self, topic=None, other=None, alpha=None, min_n=10):
+        """Correlation block for ``topic`` × ``other`` (default: all), NaN where masked."""
+        rows = self._select(topic)
+        cols = self._select(other if other is not None else topic)
+        block = np.where(self._mask(alpha, min_n), self.r, np.nan)[np.ix_(rows, cols)]
+        return pd.DataFrame(block, index=self.indicators[rows], columns=self.indicators[cols])
+
+    def top_pairs(self, k=20, topic=None, alpha=None, min_n=10, sign=None):
+        """The ``k`` strongest pairs, optionally touching ``topic`` or of one ``sign`` (+1/-1)."""
+        i, j = self._pairs
+        keep = self._mask(alpha, min_n)[i, j]
+        if topic is not None:
+            in_topic = (self.topic == topic).to_numpy()
+            keep &= in_topic[i] | in_topic[j]
+        if sign is not None:
+            keep &= np.sign(self.r[i, j]) == sign
+        i, j = i[keep][:k], j[keep][:k]
+        return pd.DataFrame({
+            'indicator_a': self.indicators[i], 'topic_a': self.topic.to_numpy()[i],
+            'indicator_b': self.indicators[j], 'topic_b': self.topic.to_numpy()[j],
+            'r': self.r[i, j], 'n': self.n[i, j].astype(int), 'p': self.p[i, j]})
+
+    def _select(self, topic):
+        if topic is None:
+            return np.arange(len(self.indicators))
+        return np.flatnonzero((self.topic == topic).to_numpy())
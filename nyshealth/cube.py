@@ -0,0 +1,197 @@
+"""
+Rollup cube over geography × content × data period.
+
+Built once per snapshot from the county rows: geography rolls up county →
+region → state, content rolls up indicator → topic, and the data period can
+be kept or summed out. Every cuboid holds additive measures (row counts, rate
+sums, event and denominator sums), so means and pooled rates at any level are
+read off directly and page aggregations become slice lookups. DOH-reported
+region and state rows are kept alongside for ``consistency()``.
+"""
+import numpy as np, pandas as pd
+
+from nyshealth.constants import COORDS, COUNTY_REGION, REGIONS, STATE
+from nyshealth.data import county_rows
+from nyshealth.frozen import freeze
+
+GEO_LEVELS = {'county': ['county'], 'region': ['region'], 'state': []}
+CONTENT_LEVELS = {None: [], 'topic': ['topic'], 'indicator': ['topic', 'indicator']}
+# cells = base (topic, indicator, county, period) cells; at indicator × period grain, counties with data
+MEASURES = ['records', 'n_rate', 'rate_sum', 'events', 'denominator', 'cells']
+COLUMNS = ('county_name', 'health_topic', 'indicator', 'data_years', 'percent_rate',
+           'event_count', 'average_number_of_denominator')
+RENAME = {'county_name': 'county', 'health_topic': 'topic', 'data_years': 'period'}
+UNKNOWN = '(unknown)'       # period of rows without data_years, region of unmapped counties
+
+
+def _runs(codes):
+    """Start/stop positions of consecutive equal rows in a sorted code array."""
+    starts = np.flatnonzero(np.r_[True, (np.diff(codes, axis=0) != 0).any(axis=1)])
+    return starts, np.r_[starts[1:], len(codes)]
+
+
+def _measures(df):
+    """Row-level measure columns; events/denominator only where both are reported."""
+    rate = df['percent_rate'].astype('float64')
+    ev = df['event_count'].astype('float64')
+    dn = df['average_number_of_denominator'].astype('float64')
+    both = ev.notna() & dn.notna() & (dn > 0)
+    return pd.DataFrame({'records': 1, 'n_rate': rate.notna().astype('int64'), 'rate_sum': rate.fillna(0.0),
+                         'events': ev.where(both, 0.0), 'denominator': dn.where(both, 0.0)},
+                        index=df.index)
+
+
+def _derive(c):
+    with np.errstate(divide='ignore', invalid='ignore'):
+        c['mean'] = c['rate_sum'] / c['n_rate'].where(c['n_rate'] > 0)
+        c['event_rate'] = c['events'] / c['denominator'].where(c['denominator'] > 0)
+    return c
+
+
+class RollupCube:
+    def __init__(self, df):
+        dfc = county_rows(df).rename(columns=RENAME)
+        for c in ('county', 'topic', 'indicator', 'period'):
+            dfc[c] = dfc[c].astype('category')
+        dfc['region'] = dfc['county'].map(COUNTY_REGION).astype('category')
+        # groupby drops NaN keys, which would lose these rows from every rollup
+        for c in ('region', 'period'):
+            dfc[c] = dfc[c].cat.add_categories([UNKNOWN]).fillna(UNKNOWN)
+        dims = ['topic', 'indicator', 'county', 'region', 'period']
+        self.base = pd.concat([dfc[dims], _measures(dfc)], axis=1).groupby(
+            dims, observed=True, sort=True)[MEASURES[:-1]].sum().assign(cells=1)
+
+        # Rate multiplier per indicator (per 100, 1,000, 100,000 …) from county rows
+        ratio = dfc['percent_rate'].astype('float64') * dfc['average_number_of_denominator'] / dfc['event_count']
+        ratio = ratio[np.isfinite(ratio) & (ratio > 0)]
+        med = ratio.groupby(dfc.loc[ratio.index, 'indicator'], observed=True).median()
+        self.multiplier = (10.0 ** np.round(np.log10(med))).rename('multiplier')
+
+        self._cuboids = {}
+        for geo in GEO_LEVELS:
+            for content in CONTENT_LEVELS:
+                for by_period in (False, True):
+                    self._cuboids[geo, content, by_period] = self._build(geo, content, by_period)
+
+        self.topics = list(self.rollup('state', 'topic').index.astype(str))
+        self.indicators = {}
+        for topic, ind in self.rollup('state', 'indicator').index:
+            self.indicators.setdefault(str(topic), []).append(str(ind))
+        self._index_lookups()
+
+        rep = df[df['county_name'].isin(list(REGIONS) + [STATE])].rename(columns=RENAME)
+        self.reported = (rep.assign(geo=rep['county'].astype(str))
+                         .groupby(['geo', 'topic', 'indicator', 'period'], observed=True, sort=True)
+                         .agg(rate=('percent_rate', 'first'), events=('event_count', 'first'),
+                              denominator=('average_number_of_denominator', 'first')).astype('float64'))
+
+    def _build(self, geo, content, by_period):
+        keys = CONTENT_LEVELS[content] + GEO_LEVELS[geo] + (['period'] if by_period else [])
+        if keys:
+            c = self.base.groupby(level=keys, observed=True, sort=True).sum()
+            if geo == 'region':
+                c = c[c.index.get_level_values('region') != UNKNOWN]
+        else:
+            c = self.base.sum().to_frame('all').T
+        c = _derive(c)
+        if content == 'indicator':
+            mult = self.multiplier.reindex(c.index.get_level_values('indicator')).to_numpy()
+            c['pooled_rate'] = c['event_rate'] * mult
+        return c
+
+    def rollup(self, geo='county', content='indicator', by_period=False):
+        """Cuboid at ``geo`` (county/region/state) × ``content`` (None/topic/indicator), read-only."""
+        return freeze(self._cuboids[geo, content, by_period])
+
+    # ── Page lookups ─────────────────────────────────────────────────────────
+    def _index_lookups(self):
+        """Flat per-county frames plus (start, stop) spans, so lookups are slices."""
+        ci = self.rollup('county', 'indicator')
+        years = (self.base.reset_index('period')['period']
+                 .groupby(level=['topic', 'indicator', 'county'], observed=True, sort=True).first())
+        county = ci.index.get_level_values('county').astype(str)
+        xy = np.array([COORDS.get(c, (np.nan, np.nan)) for c in county]).reshape(-1, 2)
+        frame = pd.DataFrame({'county_name': county, 'rate': ci['mean'].to_numpy(),
+                              'lat': xy[:, 0], 'lon': xy[:, 1], 'years': years.astype(str).to_numpy()})
+        keep = frame[['lat', 'lon']].notna().all(axis=1).to_numpy()
+        self._ind_frame = frame[keep].reset_index(drop=True)
+        starts, stops = _runs(np.column_stack(ci.index.codes[:2])[keep])
+        topics, inds = ci.index.get_level_values(0)[keep], ci.index.get_level_values(1)[keep]
+        self._ind_spans = {(str(topics[a]), str(inds[a])): (a, b) for a, b in zip(starts, stops)}
+
+        ct = self.rollup('county', 'topic')['mean']
+        self._topic_means = pd.Series(ct.to_numpy(), name='percent_rate',
+                                      index=pd.Index(ct.index.get_level_values('county').astype(str),
+                                                     name='county_name'))
+        starts, stops = _runs(ct.index.codes[0][:, None])
+        self._topic_spans = {str(ct.index.get_level_values(0)[a]): (a, b) for a, b in zip(starts, stops)}
+
+    def indicator_counties(self, topic, indicator):
+        """County mean rate, coordinates and earliest data period for one indicator."""
+        a, b = self._ind_spans.get((topic, indicator), (0, 0))
+        return self._ind_frame.iloc[a:b]
+
+    def topic_counties(self, topic):
+        """County mean rate across every row of ``topic``."""
+        a, b = self._topic_spans.get(topic, (0, 0))
+        return self._topic_means.iloc[a:b]
+
+    def totals(self):
+        """Distinct counties, topics and indicators, plus county records."""
+        idx = self.base.index
+        return {'counties': idx.get_level_values('county').nunique(), 'topics': len(self.topics),
+                'indicators': idx.get_level_values('indicator').nunique(),
+                'records': int(self.base['records'].sum())}
+
+    def topic_counts(self):
+        """County records per topic."""
+        s = self.rollup('state', 'topic')['records']
+        s.index = s.index.astype(str)
+        return s.rename('records')
+
+    def county_pivot(self, columns='indicator'):
+        """County × indicator (or topic) mean rate, like ``data.county_pivot``."""
+        content = 'topic' if columns == 'health_topic' else 'indicator'
+        c = self.rollup('county', content)['mean']
+        if content == 'indicator':
+            c = c.droplevel('topic')
+        p = c.unstack(0).dropna(how='all').dropna(how='all', axis=1).astype('float64')
+        p.index = p.index.astype(str).rename('county_name')
+        p.columns = p.columns.astype(str).rename(columns)
+        return p.sort_index().sort_index(axis=1)
+
+    # ── Reported vs rolled up ────────────────────────────────────────────────
+    def consistency(self, tolerance=0.05):
+        """DOH-reported region/state rows against rollups of their county rows.
+
+        One row per reported (geo, topic, indicator, period) with the pooled
+        county rollup, relative errors, the share of member counties present,
+        and ``consistent`` when the rates agree within ``tolerance``.
+        """
+        keys = ['geo', 'topic', 'indicator', 'period']
+        region = _flat(self.rollup('region', 'indicator', True)).rename(columns={'region': 'geo'})
+        region['expected'] = region['geo'].map({r: len(c) for r, c in REGIONS.items()})
+        state = _flat(self.rollup('state', 'indicator', True)).assign(geo=STATE, expected=len(COUNTY_REGION))
+        rolled = pd.concat([region, state], ignore_index=True)
+        rolled['coverage'] = rolled['cells'] / rolled['expected']
+        rolled = rolled[keys + ['pooled_rate', 'mean', 'events', 'denominator', 'coverage']].rename(
+            columns={'pooled_rate': 'rollup_rate', 'mean': 'county_mean',
+                     'events': 'rollup_events', 'denominator': 'rollup_denominator'})
+
+        out = _flat(self.reported).rename(columns={'rate': 'reported_rate', 'events': 'reported_events',
+                                                   'denominator': 'reported_denominator'})
+        out = out.merge(rolled, on=keys, how='left')
+        with np.errstate(divide='ignore', invalid='ignore'):
+            out['rate_rel_err'] = (out['rollup_rate'] - out['reported_rate']) / out['reported_rate'].abs()
+            out['events_rel_err'] = (out['rollup_events'] - out['reported_events']) / out['reported_events'].abs()
+        out['consistent'] = out['rate_rel_err'].abs() <= tolerance
+        return out
+
+
+def _flat(c):
+    """Cuboid → flat frame with string dimension columns."""
+    c = c.reset_index()
+    for col in ('geo', 'region', 'county', 'topic', 'indicator', 'period'):
+        if col in c.columns:
+            c[col] = c[col].astype(str)
+    return c
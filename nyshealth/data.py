@@ -0,0 +1,42 @@
+"""
+Loading, county filtering, state averages and county pivots without Streamlit.
+"""
+from nyshealth.constants import AGGREGATE_ROWS
+
+
+def ensure_snapshot(store=None):
+    """Current snapshot id, bootstrapping it from a legacy cache or the API if needed."""
+    from nyshealth.snapshot import SnapshotStore
+
+    store = store or SnapshotStore()
+    if store.current_id() is None and not store.migrate_legacy():
+        from nyshealth.delta import full_load
+        from nyshealth.socrata import SocrataClient
+        with SocrataClient() as client:
+            full_load(store, client)
+    return store.current_id()
+
+
+def load_snapshot(columns=None, store=None):
+    """Current snapshot as a frame (see ``ensure_snapshot``)."""
+    from nyshealth.snapshot import SnapshotStore
+
+    store = store or SnapshotStore()
+    return store.read(columns, ensure_snapshot(store))
+
+
+def county_rows(df):
+    """Drop state, region and multi-county ('A/B') rows."""
+    names = df['county_name']
+    return df[~names.isin(AGGREGATE_ROWS) & ~names.str.contains('/', na=False)]
+
+
+def state_averages(df):
+    s = df[df['county_name'] == 'New York State']
+    return dict(zip(s['indicator'], s['percent_rate']))
+
+
+def county_pivot(dfc, columns='indicator'):
+    """County × ``columns`` mean rate (float64), e.g. per indicator or per health_topic."""
+    return dfc.pivot_table(index='county_name', columns=columns, values='percent_rate',
+                           aggfunc='mean', observed=True).astype('float64')
@@ -0,0 +1,84 @@
+"""
+Incremental refresh of the snapshot store from Socrata row metadata.
+
+Rows changed since the current snapshot's ``:updated_at`` watermark are pulled
+and merged by natural key; every refresh commits a new version that can be
+rolled back.
+
+    python -m nyshealth.delta refresh | full | list | rollback [SNAPSHOT_ID]
+"""
+import argparse, time
+import pandas as pd
+
+from nyshealth.snapshot import SnapshotStore, prepare_frame
+from nyshealth.socrata import BASE_URL, COLUMNS, SocrataClient
+
+KEY = ['county_name', 'health_topic', 'indicator', 'data_years']
+SYSTEM = (':id', ':updated_at')
+
+
+def _split(records):
+    """Frame without Socrata system fields, plus the max ``:updated_at`` seen."""
+    df = pd.DataFrame(records)
+    watermark = df[':updated_at'].max() if len(df) else None
+    return df.drop(columns=[c for c in SYSTEM if c in df.columns]), watermark
+
+
+def _key_index(df, keys):
+    """Natural keys as strings, so categorical snapshot columns match raw API values."""
+    return pd.MultiIndex.from_frame(df[keys].astype(object).fillna('').astype(str))
+
+
+def full_load(store, client, activate=True):
+    df, watermark = _split(client.fetch_all(select=COLUMNS + SYSTEM))
+    return store.commit(prepare_frame(df), 'api', activate, updated_at=watermark)
+
+
+def refresh(store, client, activate=True):
+    """Merge rows changed since the current watermark; None when already up to date.
+
+    With ``activate=False`` the new version is written but CURRENT is left for
+    the caller to move once it is ready to serve.
+    """
+    watermark = store.current_info().get('updated_at')
+    if not watermark:
+        return full_load(store, client, activate)
+
+    delta, new_mark = _split(client.fetch_all(
+        select=COLUMNS + SYSTEM, where=f":updated_at > '{watermark.rstrip('Z')}'"))
+    if delta.empty:
+        return None
+
+    base = store.read().drop(columns=['lat', 'lon'])
+    keys = [k for k in KEY if k in delta.columns]
+    # Replace only the base rows a changed key touches; other rows stay as they were
+    kept = base[~_key_index(base, keys).isin(_key_index(delta, keys))]
+    merged = pd.concat([kept, delta], ignore_index=True)
+    return store.commit(prepare_frame(merged), 'delta', activate, updated_at=new_mark, changed=len(delta))
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(prog='python -m nyshealth.delta',
+                                 description="Refresh or roll back the CHIRS snapshot store.")
+    ap.add_argument('action', choices=['refresh', 'full', 'list', 'rollback'])
+    ap.add_argument('snapshot_id', nargs='?')
+    ap.add_argument('--base-url', default=BASE_URL)
+    args = ap.parse_args(argv)
+
+    store = SnapshotStore()
+    if args.action == 'list':
+        cur = store.current_id()
+        for m in store.versions():
+            mark = '*' if m['snapshot_id'] == cur else ' '
+            print(f"{mark} {m['snapshot_id']}  {time.strftime('%Y-%m-%d %H:%M', time.localtime(m['created']))}"
+                  f"  {m['source']:<6} rows={m['rows']:,}  changed={m.get('changed', '—')}")
+    elif args.action == 'rollback':
+        print(f"CURRENT -> {store.rollback(args.snapshot_id)}")
+    else:
+        with SocrataClient(args.base_url) as client:
+            sid = full_load(store, client) if args.action == 'full' else refresh(store, client)
+        print(f"CURRENT -> {sid}" if sid else "Already up to date")
+
+
+if __name__ == '__main__':
+    main()
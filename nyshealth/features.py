@@ -0,0 +1,58 @@
+"""
+Standardized county × indicator feature matrix shared by all clustering code.
+"""
+from dataclasses import dataclass, field
+import numpy as np, pandas as pd
+
+from nyshealth.data import county_pivot
+
+IMPUTERS = ('median', 'mean')
+
+
+@dataclass
+class FeatureMatrix:
+    X: np.ndarray                  # standardized, rows = counties, cols = indicators
+    pivot: pd.DataFrame            # imputed, unscaled county × indicator rates
+    imputed: pd.DataFrame          # True where a cell was filled in
+    dropped_columns: list = field(default_factory=list)
+    dropped_rows: list = field(default_factory=list)
+    thresh: float = 0.6
+    impute: str = 'median'
+
+    @property
+    def counties(self):
+        return self.pivot.index
+
+    @property
+    def indicators(self):
+        return self.pivot.columns
+
+    def summary(self):
+        return {'counties': len(self.pivot), 'indicators': self.pivot.shape[1],
+                'dropped_indicators': len(self.dropped_columns),
+                'dropped_counties': len(self.dropped_rows),
+                'imputed_cells': int(self.imputed.values.sum())}
+
+
+def build_feature_matrix(dfc, thresh=0.6, impute='median'):
+    """Pivot, drop sparse indicators then counties, impute and standardize."""
+    return pivot_feature_matrix(county_pivot(dfc, 'indicator'), thresh, impute)
+
+
+def pivot_feature_matrix(pivot, thresh=0.6, impute='median'):
+    """``build_feature_matrix`` from an already built county × indicator pivot."""
+    if impute not in IMPUTERS:
+        raise ValueError(f"impute must be one of {IMPUTERS}, got {impute!r}")
+    cols = pivot.notna().sum() >= int(len(pivot) * thresh)
+    pivot = pivot.loc[:, cols]
+    rows = pivot.notna().sum(axis=1) >= int(len(pivot.columns) * thresh)
+    dropped_rows = pivot.index[~rows].tolist()
+    pivot = pivot.loc[rows]
+
+    imputed = pivot.isna()
+    pivot = pivot.fillna(pivot.median() if impute == 'median' else pivot.mean())
+
+    # Same as sklearn's StandardScaler: population std, constant columns left at 0
+    std = pivot.std(ddof=0).replace(0, 1.0)
+    X = ((pivot - pivot.mean()) / std).to_numpy()
+    return FeatureMatrix(X, pivot, imputed, cols.index[~cols].tolist(), dropped_rows, thresh, impute)
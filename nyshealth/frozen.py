@@ -0,0 +1,102 @@
+"""
+Read-only wrappers for results shared between sessions without copying.
+
+``freeze`` marks a cached frame, series or dict read-only: writes to the
+shared object raise ``ReadOnlyError``. Anything derived from it (``df[mask]``,
+``reset_index()``, arithmetic, ``.copy()``) is an ordinary writable pandas
+object, and copy-on-write keeps those edits from reaching the shared data.
+"""
+import types
+import pandas as pd
+
+
+class ReadOnlyError(TypeError):
+    pass
+
+
+def _refuse(*args, **kwargs):
+    raise ReadOnlyError("cached result is shared and read-only; take a .copy() to modify it")
+
+
+class _Indexer:
+    """``.loc``/``.iloc``/``.at``/``.iat`` that read but refuse assignment."""
+
+    def __init__(self, indexer):
+        self._indexer = indexer
+
+    def __getitem__(self, key):
+        return self._indexer[key]
+
+    def __call__(self, *args, **kwargs):
+        return _Indexer(self._indexer(*args, **kwargs))
+
+    __setitem__ = _refuse
+
+
+class _ReadOnly:
+    __setitem__ = __delitem__ = _refuse
+    # Every inplace=True method and update() funnel through these
+    _update_inplace = _set_item = _iset_item = _refuse
+    insert = pop = update = _refuse
+
+    def __setattr__(self, name, value):
+        # Axis setters (also used by inplace reset_index/set_index) and ``df.col = ...``
+        if self.__dict__.get('_sealed') and (name in ('index', 'columns', 'name') or
+                                             (not name.startswith('_') and name in self._info_axis)):
+            _refuse()
+        super().__setattr__(name, value)
+
+    @property
+    def loc(self):
+        return _Indexer(super().loc)
+
+    @property
+    def iloc(self):
+        return _Indexer(super().iloc)
+
+    @property
+    def at(self):
+        return _Indexer(super().at)
+
+    @property
+    def iat(self):
+        return _Indexer(super().iat)
+
+
+class FrozenFrame(_ReadOnly, pd.DataFrame):
+    @property
+    def _constructor(self):
+        return pd.DataFrame
+
+    @property
+    def _constructor_sliced(self):
+        return pd.Series
+
+
+class FrozenSeries(_ReadOnly, pd.Series):
+    @property
+    def _constructor(self):
+        return pd.Series
+
+    @property
+    def _constructor_expanddim(self):
+        return pd.DataFrame
+
+
+def freeze(obj):
+    """Read-only view of ``obj`` (frames, series, dicts, tuples); other objects unchanged."""
+    if isinstance(obj, (FrozenFrame, FrozenSeries, types.MappingProxyType)):
+        return obj
+    if isinstance(obj, pd.DataFrame):
+        out = FrozenFrame(obj, copy=False)
+    elif isinstance(obj, pd.Series):
+        out = FrozenSeries(obj, copy=False)
+    elif isinstance(obj, dict):
+        return types.MappingProxyType(obj)
+    elif isinstance(obj, tuple):
+        return tuple(freeze(o) for o in obj)
+    else:
+        return obj
+    out.attrs = dict(obj.attrs)
+    object.__setattr__(out, '_sealed', True)
+    return out
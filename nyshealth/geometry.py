@@ -0,0 +1,234 @@
+"""
+New York county boundaries, bundled and pre-simplified.
+
+``ny_counties.json`` holds the 62 county outlines from the Census Bureau's
+1:500,000 cartographic boundary file as a quantized topology: every shared
+border is stored once as a delta-encoded arc, so neighbouring counties
+simplify identically and never open gaps or overlaps. Each vertex is tagged
+with the coarsest Douglas–Peucker level that keeps it, so the one file serves
+every level and a level is decoded once per process.
+
+    python -m nyshealth.geometry                       # payload per level
+    python -m nyshealth.geometry build counties.geojson  # rebuild the bundle
+"""
+import argparse, functools, json, os
+from collections import defaultdict
+import numpy as np
+
+PATH = os.path.join(os.path.dirname(__file__), 'ny_counties.json')
+LEVELS = (0.0005, 0.002, 0.006, 0.015)     # simplification tolerance per level, degrees, finest first
+QUANT = 1 << 16                            # grid cells per axis across the state's bounding box
+DIGITS = 4                                 # decimals in decoded coordinates (~10 m)
+TILE_PX = 256
+
+
+def level_for_zoom(zoom, pixels=1.0):
+    """Coarsest level whose tolerance stays under ``pixels`` screen pixels at a map zoom."""
+    deg_per_px = 360.0 / (TILE_PX * 2.0 ** zoom)
+    fits = [i for i, tol in enumerate(LEVELS) if tol <= pixels * deg_per_px]
+    return fits[-1] if fits else 0
+
+
+# ── Decoding ─────────────────────────────────────────────────────────────────
+class CountyGeometry:
+    """County outlines keyed by county name, decoded per level on first use."""
+
+    def __init__(self, bundle):
+        self.levels = tuple(bundle['levels'])
+        self.fips = bundle['fips']
+        self.names = sorted(bundle['counties'])
+        self._scale = np.array(bundle['transform']['scale'])
+        self._translate = np.array(bundle['transform']['translate'])
+        self._counties = bundle['counties']
+        self._arcs = []
+        for flat in bundle['arcs']:
+            a = np.array(flat, dtype=np.int64).reshape(-1, 3)
+            self._arcs.append((np.cumsum(a[:, :2], axis=0), a[:, 2]))
+        self._cache = {}
+
+    def _arc(self, i, level):
+        pts, tags = self._arcs[~i if i < 0 else i]
+        pts = pts[tags >= level]
+        return pts[::-1] if i < 0 else pts
+
+    def _ring(self, arcs, level):
+        pts = np.concatenate([self._arc(a, level)[1 if k else 0:] for k, a in enumerate(arcs)])
+        if len(np.unique(pts, axis=0)) < 3:
+            return None
+        return np.round(pts * self._scale + self._translate, DIGITS).tolist()
+
+    def _polygons(self, name, level):
+        out = []
+        for poly in self._counties[name]:
+            outer = self._ring(poly[0], level)
+            if outer is not None:
+                out.append([outer] + [r for r in (self._ring(h, level) for h in poly[1:]) if r is not None])
+        # Never lose a county: fall back to a finer level if every ring collapsed
+        return out if out or level == 0 else self._polygons(name, level - 1)
+
+    def geojson(self, level=0):
+        """FeatureCollection with ``id`` = county name, for ``featureidkey='id'`` joins."""
+        if level not in self._cache:
+            feats = []
+            for name in self.names:
+                polys = self._polygons(name, level)
+                geom = ({'type': 'Polygon', 'coordinates': polys[0]} if len(polys) == 1 else
+                        {'type': 'MultiPolygon', 'coordinates': polys})
+                feats.append({'type': 'Feature', 'id': name, 'geometry': geom,
+                              'properties': {'name': name, 'fips': self.fips[name]}})
+            self._cache[level] = {'type': 'FeatureCollection', 'features': feats}
+        return self._cache[level]
+
+    def for_zoom(self, zoom, pixels=1.0):
+        return self.geojson(level_for_zoom(zoom, pixels))
+
+    def neighbours(self):
+        """County name → counties sharing a border arc with it (rook contiguity)."""
+        owners = defaultdict(set)
+        for name, polys in self._counties.items():
+            for poly in polys:
+                for ring in poly:
+                    for a in ring:
+                        owners[~a if a < 0 else a].add(name)
+        nb = {name: set() for name in self.names}
+        for names in owners.values():
+            for name in names:
+                nb[name] |= names - {name}
+        return {name: sorted(v) for name, v in nb.items()}
+
+    def payload(self):
+        """Serialized GeoJSON bytes per level."""
+        return {lvl: len(json.dumps(self.geojson(i), separators=(',', ':')))
+                for i, lvl in enumerate(self.levels)}
+
+
+@functools.lru_cache(maxsize=1)
+def load(path=PATH):
+    with open(path) as f:
+        return CountyGeometry(json.load(f))
+
+
+# ── Building ─────────────────────────────────────────────────────────────────
+def _features(src, state_fips='36'):
+    """(name, fips, polygons) per county from a GeoJSON FeatureCollection.
+
+    Accepts Census-style properties (``NAME``, ``GEOID``/``STATEFP``) or a
+    5-digit FIPS feature ``id`` as in plotly's ``geojson-counties-fips``.
+    """
+    for f in src['features']:
+        p = f.get('properties', {})
+        fips = str(p.get('GEOID') or f.get('id') or (p.get('STATEFP', '') + p.get('COUNTYFP', '')))
+        if not fips.startswith(state_fips):
+            continue
+        g = f['geometry']
+        yield p['NAME'], fips, ([g['coordinates']] if g['type'] == 'Polygon' else g['coordinates'])
+
+
+def _importance(pts):
+    """Douglas–Peucker tolerance at which each vertex drops out; endpoints never do.
+
+    A vertex is capped by its parent's value, so the levels nest.
+    """
+    n = len(pts)
+    imp = np.full(n, np.inf)
+    stack = [(0, n - 1, np.inf)]
+    while stack:
+        a, b, cap = stack.pop()
+        if b - a < 2:
+            continue
+        seg, rel = pts[b] - pts[a], pts[a + 1:b] - pts[a]
+        norm = np.hypot(*seg)
+        d = np.abs(seg[0] * rel[:, 1] - seg[1] * rel[:, 0]) / norm if norm else np.hypot(rel[:, 0], rel[:, 1])
+        k = int(np.argmax(d))
+        imp[a + 1 + k] = m = min(d[k], cap)
+        stack += [(a, a + 1 + k, m), (a + 1 + k, b, m)]
+    return imp
+
+
+def build(src, levels=LEVELS, state_fips='36'):
+    counties = list(_features(src, state_fips))
+    xy = np.concatenate([np.asarray(r, dtype=float)[:, :2] for _, _, polys in counties
+                         for poly in polys for r in poly])
+    lo, hi = xy.min(axis=0), xy.max(axis=0)
+    scale = (hi - lo) / (QUANT - 1)
+
+    rings = {}          # (county, polygon, ring) → quantized vertices without the closing point
+    for name, _, polys in counties:
+        for p, poly in enumerate(polys):
+            for r, ring in enumerate(poly):
+                q = np.round((np.asarray(ring, dtype=float)[:, :2] - lo) / scale).astype(np.int64)
+                q = q[np.r_[True, (np.diff(q, axis=0) != 0).any(axis=1)]]
+                if (q[0] == q[-1]).all():
+                    q = q[:-1]
+                rings[name, p, r] = [tuple(v) for v in q]
+
+    # Junctions: vertices met with different neighbour pairs, i.e. where borders fork
+    seen = defaultdict(set)
+    for ring in rings.values():
+        for i, v in enumerate(ring):
+            seen[v].add(frozenset((ring[i - 1], ring[(i + 1) % len(ring)])))
+    junction = {v for v, pairs in seen.items() if len(pairs) > 1}
+
+    arcs, index = [], {}
+
+    def arc_id(pts):
+        key = tuple(pts)
+        if key[::-1] in index:
+            return ~index[key[::-1]]
+        if key not in index:
+            index[key] = len(arcs)
+            arcs.append(key)
+        return index[key]
+
+    topo = defaultdict(list)
+    for (name, p, r), ring in rings.items():
+        cuts = [i for i, v in enumerate(ring) if v in junction]
+        start = cuts[0] if cuts else ring.index(min(ring))
+        ring = ring[start:] + ring[:start]
+        cuts = [i - start if i >= start else i - start + len(ring) for i in cuts] or [0]
+        ids = [arc_id(ring[a:b + 1]) for a, b in zip(cuts, cuts[1:])]
+        ids.append(arc_id(ring[cuts[-1]:] + ring[:1]))
+        if r == 0:
+            topo[name].append([])
+        topo[name][-1].append(ids)
+
+    encoded = []
+    for pts in arcs:
+        q = np.array(pts, dtype=np.int64)
+        imp = _importance(q * scale)
+        keep = imp >= levels[0]
+        tags = np.searchsorted(levels, imp[keep], side='right') - 1
+        d = np.diff(q[keep], axis=0, prepend=[[0, 0]])
+        encoded.append(np.column_stack([d, tags]).ravel().tolist())
+
+    return {'source': "US Census Bureau cartographic boundary file, counties 1:500,000",
+            'levels': list(levels),
+            'transform': {'scale': scale.tolist(), 'translate': lo.tolist()},
+            'fips': {name: fips for name, fips, _ in counties},
+            'counties': {name: topo[name] for name, _, _ in counties},
+            'arcs': encoded}
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(prog='python -m nyshealth.geometry', description=__doc__.strip().splitlines()[0])
+    sub = ap.add_subparsers(dest='cmd')
+    b = sub.add_parser('build', help="rebuild the bundle from a county GeoJSON FeatureCollection")
+    b.add_argument('source')
+    b.add_argument('--state', default='36', help="state FIPS code")
+    b.add_argument('--out', default=PATH)
+    args = ap.parse_args(argv)
+
+    if args.cmd == 'build':
+        with open(args.source) as f:
+            bundle = build(json.load(f), state_fips=args.state)
+        with open(args.out, 'w') as f:
+            json.dump(bundle, f, separators=(',', ':'))
+        print(f"{len(bundle['counties'])} counties, {len(bundle['arcs'])} arcs, "
+              f"{os.path.getsize(args.out) / 1024:.0f} KB -> {args.out}")
+    geo = load.__wrapped__(args.out if args.cmd == 'build' else PATH)
+    for i, (tol, size) in enumerate(geo.payload().items()):
+        print(f"  level {i}  tolerance {tol:<7g} {size / 1024:7.1f} KB GeoJSON")
+
+
+if __name__ == '__main__':
+    main()
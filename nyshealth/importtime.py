@@ -0,0 +1,73 @@
+"""
+Import-time report built on ``python -X importtime``.
+
+    python -m nyshealth.importtime [MODULE ...] [--top 12] [--save FILE] [--baseline FILE]
+
+Each module is imported in a fresh interpreter (best of ``--repeat`` runs).
+With ``--baseline`` the exit status is 1 when any module got slower than the
+baseline by more than ``--tolerance``.
+"""
+import argparse, json, os, subprocess, sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TARGETS = ('nyshealth', 'nyshealth.data', 'nyshealth.burden', 'nyshealth.precompute', 'data_utils')
+
+
+def measure(module, repeat=3):
+    """(cumulative µs, [(self µs, cumulative µs, name), ...]) for the fastest run."""
+    best = None
+    for _ in range(repeat):
+        proc = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+                              cwd=ROOT, capture_output=True, text=True)
+        if proc.returncode:
+            raise RuntimeError(f"import {module} failed:\n{proc.stderr[-2000:]}")
+        rows = []
+        for line in proc.stderr.splitlines():
+            if not line.startswith('import time:') or 'self [us]' in line:
+                continue
+            self_us, cum_us, name = line[len('import time:'):].split('|')
+            rows.append((int(self_us), int(cum_us), name.strip()))
+        total = next(c for _, c, n in reversed(rows) if n == module)
+        if best is None or total < best[0]:
+            best = (total, rows)
+    return best
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(prog='python -m nyshealth.importtime', description="Import-time report.")
+    ap.add_argument('modules', nargs='*', default=list(TARGETS))
+    ap.add_argument('--top', type=int, default=12, help="heaviest imports to list per module")
+    ap.add_argument('--repeat', type=int, default=3)
+    ap.add_argument('--save', help="write {module: µs} JSON")
+    ap.add_argument('--baseline', help="compare against a saved JSON")
+    ap.add_argument('--tolerance', type=float, default=0.25)
+    args = ap.parse_args(argv)
+
+    results = {}
+    for mod in args.modules:
+        total, rows = measure(mod, args.repeat)
+        results[mod] = total
+        print(f"\n{mod}: {total / 1000:.1f} ms cumulative")
+        for self_us, cum_us, name in sorted(rows, key=lambda r: -r[0])[:args.top]:
+            print(f"  {self_us / 1000:8.1f} ms self {cum_us / 1000:8.1f} ms cum  {name}")
+
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump(results, f, indent=2)
+    if args.baseline:
+        with open(args.baseline) as f:
+            base = json.load(f)
+        print("\nvs baseline:")
+        failed = False
+        for mod, total in results.items():
+            if mod not in base:
+                continue
+            change = total / base[mod] - 1
+            flag = 'REGRESSION' if change > args.tolerance else ''
+            failed |= bool(flag)
+            print(f"  {mod:<28} {base[mod] / 1000:8.1f} → {total / 1000:8.1f} ms  {change:+.0%} {flag}")
+        sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
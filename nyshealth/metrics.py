@@ -0,0 +1,133 @@
+"""
+In-process stage timings and cache counters.
+
+``METRICS`` keeps a bounded window of durations per stage (for p50/p95) plus
+running counts and totals, and event counters such as cache hits, misses and
+evictions per function. Export as Prometheus text (``prometheus()`` or a file
+rewritten by ``start_export``) or stream every observation to a JSONL log.
+
+    NYSHEALTH_METRICS_JSONL=metrics.jsonl     # append one line per observation
+    NYSHEALTH_METRICS_PROM=metrics.prom       # Prometheus textfile, rewritten every 15 s
+"""
+import collections, contextlib, functools, json, os, threading, time
+import numpy as np
+
+WINDOW = 2048
+JSONL_ENV = 'NYSHEALTH_METRICS_JSONL'
+PROM_ENV = 'NYSHEALTH_METRICS_PROM'
+
+
+class Registry:
+    def __init__(self, window=WINDOW, jsonl=None):
+        self._lock = threading.Lock()
+        self._window = window
+        self._samples = collections.defaultdict(lambda: collections.deque(maxlen=self._window))
+        self._totals = collections.defaultdict(lambda: [0, 0.0])       # stage → [count, seconds]
+        self._events = collections.Counter()                           # (name, event) → n
+        self._log = open(jsonl, 'a', buffering=1) if jsonl else None
+
+    def observe(self, stage, seconds):
+        with self._lock:
+            self._samples[stage].append(seconds)
+            tot = self._totals[stage]
+            tot[0] += 1
+            tot[1] += seconds
+        if self._log:
+            self._write({'stage': stage, 'seconds': round(seconds, 6)})
+
+    def count(self, name, event, n=1):
+        with self._lock:
+            self._events[name, event] += n
+        if self._log:
+            self._write({'name': name, 'event': event, 'n': n})
+
+    def _write(self, rec):
+        rec['ts'] = round(time.time(), 3)
+        rec['pid'] = os.getpid()
+        self._log.write(json.dumps(rec) + '\n')
+
+    @contextlib.contextmanager
+    def timer(self, stage):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - t0)
+
+    def timed(self, stage=None):
+        """Decorator form of ``timer``; the stage defaults to the function name."""
+        def wrap(func):
+            name = stage or func.__name__
+
+            @functools.wraps(func)
+            def inner(*args, **kwargs):
+                with self.timer(name):
+                    return func(*args, **kwargs)
+            return inner
+        return wrap
+
+    # ── Export ───────────────────────────────────────────────────────────────
+    def stages(self):
+        """One row per stage: count, total, p50, p95 and max over the recent window."""
+        with self._lock:
+            snap = {k: (np.array(v), *self._totals[k]) for k, v in self._samples.items()}
+        rows = []
+        for stage, (s, n, total) in sorted(snap.items()):
+            p50, p95 = np.percentile(s, [50, 95]) if len(s) else (np.nan, np.nan)
+            rows.append({'stage': stage, 'count': n, 'total_s': total, 'p50_ms': p50 * 1e3,
+                         'p95_ms': p95 * 1e3, 'max_ms': s.max() * 1e3 if len(s) else np.nan})
+        return rows
+
+    def events(self):
+        """{name: {event: count}}, e.g. cache hits/misses/evictions per function."""
+        with self._lock:
+            items = list(self._events.items())
+        out = collections.defaultdict(dict)
+        for (name, event), n in sorted(items):
+            out[name][event] = n
+        return dict(out)
+
+    def prometheus(self, prefix='nyshealth'):
+        lines = [f'# TYPE {prefix}_stage_seconds summary']
+        for r in self.stages():
+            lab = f'stage="{_escape(r["stage"])}"'
+            lines += [f'{prefix}_stage_seconds{{{lab},quantile="0.5"}} {r["p50_ms"] / 1e3:.6g}',
+                      f'{prefix}_stage_seconds{{{lab},quantile="0.95"}} {r["p95_ms"] / 1e3:.6g}',
+                      f'{prefix}_stage_seconds_sum{{{lab}}} {r["total_s"]:.6g}',
+                      f'{prefix}_stage_seconds_count{{{lab}}} {r["count"]}']
+        lines.append(f'# TYPE {prefix}_events_total counter')
+        for name, evs in self.events().items():
+            for event, n in evs.items():
+                lines.append(f'{prefix}_events_total{{name="{_escape(name)}",event="{_escape(event)}"}} {n}')
+        return '\n'.join(lines) + '\n'
+
+    def write_prometheus(self, path):
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, 'w') as f:
+            f.write(self.prometheus())
+        os.replace(tmp, path)
+
+    def start_export(self, path, every=15.0):
+        """Rewrite a Prometheus textfile from a daemon thread every ``every`` seconds."""
+        def loop():
+            while True:
+                time.sleep(every)
+                self.write_prometheus(path)
+        t = threading.Thread(target=loop, name='nyshealth-metrics', daemon=True)
+        t.start()
+        return t
+
+    def reset(self):
+        with self._lock:
+            self._samples.clear()
+            self._totals.clear()
+            self._events.clear()
+
+
+def _escape(s):
+    return str(s).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+METRICS = Registry(jsonl=os.environ.get(JSONL_ENV))
+if os.environ.get(PROM_ENV):
+    METRICS.start_export(os.environ[PROM_ENV])
@@ -0,0 +1,64 @@
+"""
+Parallel KMeans model selection over a range of K.
+
+Candidate K values are fitted concurrently. Silhouette, inertia and
+Calinski-Harabasz all come from one shared pairwise-distance matrix;
+Davies-Bouldin only needs centroids, so it is computed from X directly.
+"""
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+import numpy as np, pandas as pd
+
+
+def _fit(X, k, random_state, n_init):
+    from sklearn.cluster import KMeans
+    return KMeans(n_clusters=k, random_state=random_state, n_init=n_init).fit_predict(X)
+
+
+def _scores(D, D2, labels):
+    """Silhouette, within-cluster SS and Calinski-Harabasz from precomputed distances."""
+    n = len(labels)
+    k = labels.max() + 1
+    onehot = np.zeros((n, k))
+    onehot[np.arange(n), labels] = 1.0
+    sizes = onehot.sum(axis=0)
+
+    # Mean distance from every point to every cluster; own cluster excludes self
+    sums = D @ onehot
+    own = sums[np.arange(n), labels]
+    own_n = sizes[labels] - 1
+    a = np.divide(own, own_n, out=np.zeros(n), where=own_n > 0)
+    other = np.divide(sums, sizes, out=np.full_like(sums, np.inf), where=sizes > 0)
+    other[np.arange(n), labels] = np.inf
+    b = other.min(axis=1)
+    s = np.where(own_n > 0, (b - a) / np.maximum(a, b), 0.0)
+
+    # Within-cluster SS = sum of squared pairwise distances / (2 * cluster size)
+    within = ((D2 @ onehot) * onehot).sum(axis=0)
+    ssw = np.divide(within, 2 * sizes, out=np.zeros(k), where=sizes > 0).sum()
+    sst = D2.sum() / (2 * n)
+    ch = ((sst - ssw) / (k - 1)) / (ssw / (n - k)) if ssw > 0 else np.inf
+    return s.mean(), ssw, ch
+
+
+def sweep_k(X, ks=range(2, 8), n_init=10, random_state=42, max_workers=None, executor='thread'):
+    """One row per K: silhouette, inertia (elbow), Calinski-Harabasz, Davies-Bouldin."""
+    from sklearn.metrics import davies_bouldin_score
+
+    ks = [k for k in ks if 2 <= k < len(X)]
+    sq = np.einsum('ij,ij->i', X, X)
+    D2 = np.maximum(sq[:, None] + sq[None, :] - 2 * X @ X.T, 0.0)
+    np.fill_diagonal(D2, 0.0)
+    D = np.sqrt(D2)
+
+    pool = ProcessPoolExecutor if executor == 'process' else ThreadPoolExecutor
+    workers = max_workers or min(len(ks), os.cpu_count() or 1)
+    with pool(max_workers=max(workers, 1)) as ex:
+        fits = list(ex.map(_fit, [X] * len(ks), ks, [random_state] * len(ks), [n_init] * len(ks)))
+
+    rows = []
+    for k, labels in zip(ks, fits):
+        sil, inertia, ch = _scores(D, D2, labels)
+        rows.append({'K': k, 'Silhouette': sil, 'Inertia': inertia,
+                     'Calinski-Harabasz': ch, 'Davies-Bouldin': davies_bouldin_score(X, labels)})
+    return pd.DataFrame(rows)
@@ -0,0 +1,83 @@
+"""
+"Counties most like this one" over the standardized feature matrix.
+
+Distances skip indicators either county lacks (cells the feature matrix
+imputed), so a fill-in value never makes two counties look alike. The index
+keeps, per health topic, the pairwise sums the metrics are made of: squared
+differences, products, restricted squared norms and shared-indicator counts.
+Any topic subset is then a sum of a few 62 × 62 arrays, and a lookup is a
+row sort.
+"""
+import numpy as np, pandas as pd
+
+METRICS = ('euclidean', 'cosine')
+MIN_SHARED = 5
+
+
+class PeerIndex:
+    def __init__(self, fm, topic_of):
+        self.counties = fm.counties
+        self.indicators = fm.indicators
+        self.topic_of = pd.Series(self.indicators.map(topic_of), index=self.indicators, name='topic')
+        self.topics = sorted(self.topic_of.dropna().unique())
+        self._z = pd.DataFrame(fm.X, index=self.counties, columns=self.indicators)
+        self._observed = ~fm.imputed.to_numpy()
+        O = self._observed.astype('float64')
+        X = np.where(self._observed, fm.X, 0.0)
+        self._parts = {}
+        for topic in self.topics:
+            cols = (self.topic_of == topic).to_numpy()
+            o, x = O[:, cols], X[:, cols]
+            sq = (x ** 2) @ o.T            # [i, j]: Σ x_i² over indicators j also has
+            dot = x @ x.T
+            self._parts[topic] = np.stack([sq + sq.T - 2 * dot, dot, sq, o @ o.T])
+        self._cache = {}
+
+    def _sums(self, topics):
+        topics = tuple(sorted(topics or self.topics))
+        unknown = set(topics) - set(self._parts)
+        if unknown:
+            raise KeyError(f"unknown topics {sorted(unknown)}")
+        return sum(self._parts[t] for t in topics), topics
+
+    def distances(self, metric='euclidean', topics=None, min_shared=MIN_SHARED):
+        """County × county distances; NaN where two counties share fewer than ``min_shared`` indicators.
+
+        Euclidean distances are rescaled to the full indicator count, like
+        scikit-learn's ``nan_euclidean_distances``; cosine distance is
+        1 − cosine similarity over the shared indicators.
+        """
+        if metric not in METRICS:
+            raise ValueError(f"metric must be one of {METRICS}, got {metric!r}")
+        (sqdiff, dot, sq, shared), topics = self._sums(topics)
+        key = metric, topics, min_shared
+        if key not in self._cache:
+            n_cols = int(self.topic_of.isin(topics).sum())
+            with np.errstate(invalid='ignore', divide='ignore'):
+                if metric == 'euclidean':
+                    d = np.sqrt(np.maximum(sqdiff, 0.0) * n_cols / shared)
+                else:
+                    d = 1.0 - dot / np.sqrt(sq * sq.T)
+            d[shared < min_shared] = np.nan
+            np.fill_diagonal(d, 0.0)
+            self._cache[key] = pd.DataFrame(d, index=self.counties, columns=self.counties)
+        return self._cache[key]
+
+    def peers(self, county, n=5, metric='euclidean', topics=None, min_shared=MIN_SHARED):
+        """The ``n`` nearest counties with their distance and shared-indicator count."""
+        d = self.distances(metric, topics, min_shared).loc[county].drop(county).dropna()
+        (_, _, _, shared), _ = self._sums(topics)
+        top = d.nsmallest(n)
+        i = self.counties.get_loc(county)
+        return pd.DataFrame({'county': top.index, 'distance': top.to_numpy(),
+                             'shared': shared[i, self.counties.get_indexer(top.index)].astype(int)})
+
+    def divergence(self, county, peer, topics=None):
+        """Indicators both counties report, by how far apart their standardized values are."""
+        i, j = self.counties.get_loc(county), self.counties.get_loc(peer)
+        both = self._observed[i] & self._observed[j]
+        if topics:
+            both &= self.topic_of.isin(topics).to_numpy()
+        a, b = self._z.iloc[i, both], self._z.iloc[j, both]
+        out = pd.DataFrame({'topic': self.topic_of[both], 'county_z': a, 'peer_z': b, 'gap': a - b})
+        return out.rename_axis('indicator').reset_index().sort_values('gap', key=np.abs, ascending=False)
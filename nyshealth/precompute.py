@@ -0,0 +1,77 @@
+"""
+Precompute every derived artifact for the current snapshot ahead of deploy.
+
+    python -m nyshealth.precompute [--k 2 3 4 5] [--k-max 15]
+"""
+import argparse, time
+
+from nyshealth.artifacts import ArtifactStore, artifact_name
+from nyshealth.burden import BurdenEngine
+from nyshealth.clustering import cluster_counties
+from nyshealth.cube import RollupCube
+from nyshealth.correlation import METHODS, CorrelationEngine, topic_correlations
+from nyshealth.data import county_rows, load_snapshot, state_averages
+from nyshealth.features import build_feature_matrix
+from nyshealth.model_select import sweep_k
+from nyshealth.peers import PeerIndex
+from nyshealth.snapshot import SnapshotStore
+from nyshealth.spatial import SpatialStats
+from nyshealth.stability import ClusterStability
+from nyshealth.uncertainty import BurdenUncertainty
+
+
+def precompute(ks=(2, 3, 4, 5), k_max=(7, 15), thresh=0.6, impute='median', verbose=True,
+               snapshots=None, snapshot_id=None):
+    """Artifacts for ``snapshot_id`` (default: the current one) of the ``snapshots`` store."""
+    snapshots = snapshots or SnapshotStore()
+    df_all = snapshots.read(None, snapshot_id) if snapshot_id else load_snapshot(store=snapshots)
+    df_c = county_rows(df_all)
+    store = ArtifactStore(df_all.attrs['snapshot_id'])
+    timings = {}
+
+    def step(name, fn):
+        t0 = time.perf_counter()
+        obj = fn()
+        store.save(name, obj)
+        timings[name] = round(time.perf_counter() - t0, 3)
+        if verbose:
+            print(f"  {name:<48} {timings[name]:>7.2f}s")
+        return obj
+
+    if verbose:
+        print(f"Snapshot {store.snapshot_id} → {store.dir}")
+    savgs = state_averages(df_all)
+    engine = step('burden', lambda: BurdenEngine(df_c, savgs))
+    step('uncertainty', lambda: BurdenUncertainty(df_c, savgs))
+    cube = step('cube', lambda: RollupCube(df_all))
+    step('spatial', lambda: SpatialStats.from_pivot(cube.county_pivot('indicator'), engine.overall()))
+    step('topic_corr', lambda: topic_correlations(df_c))
+    for method in METHODS:
+        step(artifact_name('indicator_corr', method=method),
+             lambda: CorrelationEngine.from_counties(df_c, method))
+    fm = step(artifact_name('features', thresh=thresh, impute=impute),
+              lambda: build_feature_matrix(df_c, thresh, impute))
+    topic_of = {ind: t for t, inds in cube.indicators.items() for ind in inds}
+    step(artifact_name('peers', thresh=thresh, impute=impute), lambda: PeerIndex(fm, topic_of))
+    for k in ks:
+        cdf = step(artifact_name('clusters', k=k, thresh=thresh, impute=impute),
+                   lambda: cluster_counties(fm, k))[0]
+        step(artifact_name('stability', k=k, thresh=thresh, impute=impute),
+             lambda: ClusterStability(fm, k, cdf.set_index('county')['cluster']))
+    for km in k_max:
+        step(artifact_name('k_sweep', k_max=km, thresh=thresh, impute=impute),
+             lambda: sweep_k(fm.X, range(2, km + 1)))
+    store.write_manifest(timings)
+    return store
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(prog='python -m nyshealth.precompute', description=__doc__.strip().splitlines()[0])
+    ap.add_argument('--k', type=int, nargs='+', default=[2, 3, 4, 5], help="cluster counts to precompute")
+    ap.add_argument('--k-max', type=int, nargs='+', default=[7, 15], help="upper bounds of the K sweeps")
+    args = ap.parse_args(argv)
+    precompute(args.k, args.k_max)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,240 @@
+"""
+Pluggable query backends for the pages' aggregations.
+
+``PandasBackend`` answers from a ``RollupCube`` of the in-memory frame.
+``DuckDBBackend`` and ``PolarsBackend`` query the Parquet snapshot lazily: the
+county filter, topic/indicator predicates and column selection are pushed into
+the scan, row groups are read in parallel, and only the aggregated result is
+materialized, so a worker never holds the full multi-year history in RAM.
+
+Select with ``NYSHEALTH_QUERY_BACKEND=pandas|duckdb|polars``; an engine that
+is not installed falls back to pandas. Every backend exposes ``topics``,
+``indicators`` (topic → sorted list) and the same query methods.
+"""
+import importlib.util, os, warnings
+import pandas as pd
+
+from nyshealth.constants import AGGREGATE_ROWS
+from nyshealth.data import state_averages
+
+BACKENDS = ('pandas', 'duckdb', 'polars')
+ENV_VAR = 'NYSHEALTH_QUERY_BACKEND'
+
+
+def backend_name(name=None):
+    """Requested backend, or 'pandas' if its engine is not importable."""
+    name = (name or os.environ.get(ENV_VAR) or 'pandas').lower()
+    if name not in BACKENDS:
+        raise ValueError(f"query backend must be one of {BACKENDS}, got {name!r}")
+    if name != 'pandas' and importlib.util.find_spec(name) is None:
+        warnings.warn(f"{name} is not installed; falling back to the pandas query backend")
+        return 'pandas'
+    return name
+
+
+def open_backend(name=None, store=None, snapshot_id=None, threads=None):
+    """Backend over one snapshot version (the current one by default)."""
+    from nyshealth.cube import COLUMNS
+    from nyshealth.snapshot import SnapshotStore
+
+    store = store or SnapshotStore()
+    name = backend_name(name)
+    if name == 'pandas':
+        return PandasBackend.from_frame(store.read(COLUMNS, snapshot_id))
+    engine = DuckDBBackend if name == 'duckdb' else PolarsBackend
+    return engine(store.path(snapshot_id or store.current_id()), threads)
+
+
+def _catalog(pairs):
+    indicators = {}
+    for topic, ind in zip(pairs['health_topic'], pairs['indicator']):
+        indicators.setdefault(topic, []).append(ind)
+    for inds in indicators.values():
+        inds.sort()
+    return sorted(indicators), indicators
+
+
+def _pivot(long, columns):
+    """Long (county, ``columns``, rate) result → county × ``columns`` like ``county_pivot``."""
+    return (long.pivot(index='county_name', columns=columns, values='rate')
+            .astype('float64').sort_index().sort_index(axis=1))
+
+
+# ── In-memory ────────────────────────────────────────────────────────────────
+class PandasBackend:
+    """Slice lookups on a ``RollupCube`` of the in-memory frame."""
+    name = 'pandas'
+
+    def __init__(self, cube, savgs):
+        self.cube = cube
+        self._savgs = savgs
+        self.topics = cube.topics
+        self.indicators = cube.indicators
+
+    @classmethod
+    def from_frame(cls, df):
+        from nyshealth.cube import RollupCube
+        return cls(RollupCube(df), state_averages(df))
+
+    def state_averages(self):
+        return self._savgs
+
+    def indicator_counties(self, topic, indicator):
+        """Per-county rate, lat, lon and data period for one indicator."""
+        return self.cube.indicator_counties(topic, indicator)
+
+    def topic_counties(self, topic):
+        """Per-county mean rate across every row of ``topic``."""
+        return self.cube.topic_counties(topic)
+
+    def totals(self):
+        """Distinct counties, topics and indicators, plus county records."""
+        return self.cube.totals()
+
+    def topic_counts(self):
+        """County records per health topic."""
+        return self.cube.topic_counts()
+
+    def county_pivot(self, columns='indicator'):
+        return self.cube.county_pivot(columns)
+
+
+# ── DuckDB ───────────────────────────────────────────────────────────────────
+def _quote(s):
+    return "'" + str(s).replace("'", "''") + "'"
+
+
+COUNTY_FILTER = (f"county_name NOT IN ({', '.join(map(_quote, AGGREGATE_ROWS))}) "
+                 "AND county_name NOT LIKE '%/%'")
+
+
+class DuckDBBackend:
+    name = 'duckdb'
+
+    def __init__(self, path, threads=None):
+        import duckdb
+
+        self.path = str(path)
+        self._con = duckdb.connect(config={'threads': threads or os.cpu_count() or 1})
+        self._src = f"read_parquet({_quote(self.path)})"
+        self.topics, self.indicators = _catalog(self._sql(
+            f"SELECT DISTINCT health_topic, indicator FROM {self._src} WHERE {COUNTY_FILTER}"))
+        self._savgs = self._sql(
+            f"SELECT indicator, percent_rate FROM {self._src} WHERE county_name = 'New York State'")
+
+    def _sql(self, sql, params=None):
+        # A cursor per query: the connection is shared by Streamlit's script threads
+        return self._con.cursor().execute(sql, params or []).df()
+
+    def state_averages(self):
+        return dict(zip(self._savgs['indicator'], self._savgs['percent_rate']))
+
+    def indicator_counties(self, topic, indicator):
+        return self._sql(f"""
+            SELECT county_name, avg(percent_rate) AS rate, any_value(lat) AS lat,
+                   any_value(lon) AS lon, any_value(data_years) AS years
+            FROM {self._src}
+            WHERE health_topic = ? AND indicator = ? AND {COUNTY_FILTER}
+            GROUP BY county_name
+            HAVING any_value(lat) IS NOT NULL AND any_value(lon) IS NOT NULL
+            ORDER BY county_name""", [topic, indicator])
+
+    def topic_counties(self, topic):
+        r = self._sql(f"""
+            SELECT county_name, avg(percent_rate) AS percent_rate FROM {self._src}
+            WHERE health_topic = ? AND {COUNTY_FILTER}
+            GROUP BY county_name ORDER BY county_name""", [topic])
+        return r.set_index('county_name')['percent_rate']
+
+    def totals(self):
+        r = self._sql(f"""
+            SELECT count(DISTINCT county_name) AS counties, count(DISTINCT health_topic) AS topics,
+                   count(DISTINCT indicator) AS indicators, count(*) AS records
+            FROM {self._src} WHERE {COUNTY_FILTER}""")
+        return {k: int(v) for k, v in r.iloc[0].items()}
+
+    def topic_counts(self):
+        r = self._sql(f"""
+            SELECT health_topic, count(indicator) AS records FROM {self._src}
+            WHERE {COUNTY_FILTER} GROUP BY health_topic ORDER BY health_topic""")
+        return r.set_index('health_topic')['records']
+
+    def county_pivot(self, columns='indicator'):
+        if columns not in ('indicator', 'health_topic'):
+            raise ValueError(f"cannot pivot on {columns!r}")
+        return _pivot(self._sql(f"""
+            SELECT county_name, {columns}, avg(percent_rate) AS rate FROM {self._src}
+            WHERE percent_rate IS NOT NULL AND {COUNTY_FILTER}
+            GROUP BY ALL"""), columns)
+
+
+# ── Polars ───────────────────────────────────────────────────────────────────
+class PolarsBackend:
+    """Lazy Polars scans; thread count comes from ``POLARS_MAX_THREADS``."""
+    name = 'polars'
+
+    def __init__(self, path, threads=None):
+        import polars as pl
+
+        self.path = str(path)
+        self._pl = pl
+        name = pl.col('county_name').cast(pl.String)
+        self._counties = pl.scan_parquet(self.path).filter(
+            ~name.is_in(AGGREGATE_ROWS) & ~name.str.contains('/', literal=True))
+        self.topics, self.indicators = _catalog(self._collect(
+            self._counties.select('health_topic', 'indicator').unique()))
+        self._savgs = self._collect(pl.scan_parquet(self.path)
+                                    .filter(name == 'New York State')
+                                    .select('indicator', 'percent_rate'))
+
+    @staticmethod
+    def _collect(lf):
+        df = lf.collect().to_pandas()
+        for c in df.columns:
+            if isinstance(df[c].dtype, pd.CategoricalDtype):
+                df[c] = df[c].astype(object)
+        return df
+
+    def state_averages(self):
+        return dict(zip(self._savgs['indicator'], self._savgs['percent_rate']))
+
+    def indicator_counties(self, topic, indicator):
+        pl = self._pl
+        return self._collect(
+            self._counties
+            .filter((pl.col('health_topic') == topic) & (pl.col('indicator') == indicator))
+            .group_by('county_name')
+            .agg(pl.col('percent_rate').mean().alias('rate'),
+                 pl.col('lat').drop_nulls().first(), pl.col('lon').drop_nulls().first(),
+                 pl.col('data_years').drop_nulls().first().alias('years'))
+            .drop_nulls(['lat', 'lon'])
+            .sort(pl.col('county_name').cast(pl.String)))
+
+    def topic_counties(self, topic):
+        pl = self._pl
+        r = self._collect(self._counties.filter(pl.col('health_topic') == topic)
+                          .group_by('county_name').agg(pl.col('percent_rate').mean())
+                          .sort(pl.col('county_name').cast(pl.String)))
+        return r.set_index('county_name')['percent_rate']
+
+    def totals(self):
+        pl = self._pl
+        r = self._collect(self._counties.select(
+            pl.col('county_name').drop_nulls().n_unique().alias('counties'),
+            pl.col('health_topic').drop_nulls().n_unique().alias('topics'),
+            pl.col('indicator').drop_nulls().n_unique().alias('indicators'),
+            pl.len().alias('records')))
+        return {k: int(v) for k, v in r.iloc[0].items()}
+
+    def topic_counts(self):
+        pl = self._pl
+        r = self._collect(self._counties.group_by('health_topic')
+                          .agg(pl.col('indicator').count().alias('records')))
+        return r.set_index('health_topic')['records'].sort_index()
+
+    def county_pivot(self, columns='indicator'):
+        pl = self._pl
+        return _pivot(self._collect(
+            self._counties.filter(pl.col('percent_rate').is_not_null())
+            .group_by('county_name', columns)
+            .agg(pl.col('percent_rate').mean().alias('rate'))), columns)
@@ -0,0 +1,115 @@
+"""
+Background refresh with a double-buffered version swap.
+
+``Refresher`` pulls changed rows into the snapshot store on a schedule,
+precomputes the derived artifacts and runs a ``warm(snapshot_id)`` hook, all
+off the request path, and only then publishes the new version. ``live`` and
+``previous`` are swapped as one tuple assignment, so readers see either the
+old pair or the new one, never a half-built version; the previous snapshot
+stays readable for sessions still pinned to it.
+
+    python -m nyshealth.refresher [--interval 3600]     # standalone refresh loop
+"""
+import argparse, logging, os, threading, time
+
+from nyshealth.metrics import METRICS
+
+INTERVAL_ENV = 'NYSHEALTH_REFRESH_SECONDS'
+
+log = logging.getLogger(__name__)
+
+
+def refresh_interval(default=0.0):
+    """Seconds between refreshes from ``NYSHEALTH_REFRESH_SECONDS``; 0 disables."""
+    try:
+        return max(float(os.environ.get(INTERVAL_ENV, default)), 0.0)
+    except ValueError:
+        return default
+
+
+class Refresher(threading.Thread):
+    def __init__(self, interval, store=None, warm=None, artifacts=True, client_factory=None):
+        from nyshealth.data import ensure_snapshot
+        from nyshealth.snapshot import SnapshotStore
+
+        super().__init__(name='nyshealth-refresher', daemon=True)
+        self.interval = interval
+        self.store = store or SnapshotStore()
+        self.warm = warm
+        self.artifacts = artifacts
+        self.client_factory = client_factory
+        self._versions = (ensure_snapshot(self.store), None)
+        self._halt = threading.Event()       # not _stop: Thread uses that name internally
+        self.last_run = self.last_error = None
+
+    @property
+    def live(self):
+        return self._versions[0]
+
+    @property
+    def previous(self):
+        return self._versions[1]
+
+    def run(self):
+        while not self._halt.wait(self.interval):
+            try:
+                self.refresh_once()
+            except Exception as e:          # keep serving the live version; retry next cycle
+                self.last_error = repr(e)
+                log.exception("snapshot refresh failed")
+
+    def stop(self):
+        self._halt.set()
+
+    def refresh_once(self):
+        """Pull changes, build and warm the new version, then publish it; returns the live id."""
+        from nyshealth.delta import refresh
+        from nyshealth.socrata import SocrataClient
+
+        with METRICS.timer('refresh:pull'), (self.client_factory or SocrataClient)() as client:
+            staged = refresh(self.store, client, activate=False)
+        self.last_run = time.time()
+        sid = staged or self.store.current_id()  # also picks up refreshes made by other processes
+        if sid and sid != self.live:
+            with METRICS.timer('refresh:prepare'):
+                self.prepare(sid)
+            if staged:
+                self.store.activate(staged)     # other processes switch only once it is warm
+            self._versions = (sid, self.live)
+            log.info("published snapshot %s", sid)
+        return self.live
+
+    def prepare(self, sid):
+        from nyshealth.shared import publish, shared_dir
+
+        if self.artifacts:
+            from nyshealth.precompute import precompute
+            precompute(verbose=False, snapshots=self.store, snapshot_id=sid)
+        if self.warm:
+            self.warm(sid)
+        if shared_dir():
+            publish(self.store, sid)            # bumps VERSION, which workers follow
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(prog='python -m nyshealth.refresher',
+                                 description="Refresh the snapshot and precompute artifacts on a schedule.")
+    ap.add_argument('--interval', type=float, default=refresh_interval(3600.0) or 3600.0)
+    ap.add_argument('--once', action='store_true', help="run one refresh and exit")
+    args = ap.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(message)s')
+
+    r = Refresher(args.interval)
+    if args.once:
+        print(f"live -> {r.refresh_once()}")
+        return
+    r.start()
+    try:
+        while r.is_alive():
+            r.join(1.0)
+    except KeyboardInterrupt:
+        r.stop()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,223 @@
+"""
+Persistent result cache shared by every process on a host.
+
+Results are pickled into one SQLite database in WAL mode, keyed by the code
+version, snapshot id, function name and bound parameters, so a restarted or
+second replica starts warm. The database is held under ``max_bytes`` by
+evicting least recently used entries, and entries expire ``ttl`` seconds after
+they were written. Concurrent cold misses for the same key compute once:
+threads wait on an in-process lock, and processes wait on a lease row that the
+computing process holds until the result is stored.
+
+    NYSHEALTH_RESULT_CACHE=/path/cache.sqlite   # location; "off" disables
+    python -m nyshealth.result_cache stats|evict|clear [SNAPSHOT_ID]
+"""
+import argparse, contextlib, functools, hashlib, logging, os, pickle, sqlite3, threading, time, uuid
+
+from nyshealth.metrics import METRICS
+from nyshealth.snapshot import OUTPUT_DIR
+
+ENV_VAR = 'NYSHEALTH_RESULT_CACHE'
+PATH = os.path.join(OUTPUT_DIR, 'result_cache.sqlite')
+MAX_BYTES = 512 * 2 ** 20
+TTL = 7 * 24 * 3600.0
+LEASE = 600.0               # seconds before a stalled computing process loses its claim on a key
+POLL = 0.05
+TOUCH_AFTER = 60.0          # seconds before a read rewrites its entry's access time
+
+log = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    key TEXT PRIMARY KEY, snapshot_id TEXT, func TEXT, value BLOB,
+    size INTEGER, created REAL, accessed REAL, expires REAL);
+CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed);
+CREATE TABLE IF NOT EXISTS leases (key TEXT PRIMARY KEY, owner TEXT, expires REAL);
+"""
+
+
+def open_result_cache(path=None, **kwargs):
+    """Cache at ``path`` or ``NYSHEALTH_RESULT_CACHE`` (default under the output dir); None if "off"."""
+    path = path or os.environ.get(ENV_VAR) or PATH
+    return None if path.lower() == 'off' else ResultCache(path, **kwargs)
+
+
+@functools.lru_cache(maxsize=None)
+def source_version(path):
+    """Fingerprint of one source file, e.g. the module defining a cached function."""
+    with open(path, 'rb') as f:
+        return hashlib.sha1(f.read()).hexdigest()[:12]
+
+
+def cache_key(snapshot_id, func, params, version=''):
+    """Key over the nyshealth sources, the caller's ``version``, snapshot, function and parameters."""
+    from nyshealth.artifacts import code_version
+
+    blob = repr((code_version(), version, str(snapshot_id), func, sorted(params.items())))
+    return hashlib.sha1(blob.encode()).hexdigest()
+
+
+class ResultCache:
+    def __init__(self, path=PATH, max_bytes=MAX_BYTES, ttl=TTL, lease=LEASE):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.lease = lease
+        self._owner = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self._local = threading.local()
+        self._locks, self._locks_guard = {}, threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._db().executescript(SCHEMA)
+
+    def _db(self):
+        """One autocommit connection per thread; writers serialize on SQLite's own lock."""
+        con = getattr(self._local, 'con', None)
+        if con is None:
+            con = self._local.con = sqlite3.connect(self.path, timeout=30.0, isolation_level=None)
+            con.execute('PRAGMA journal_mode=WAL')
+            con.execute('PRAGMA synchronous=NORMAL')
+        return con
+
+    # ── Entries ──────────────────────────────────────────────────────────────
+    def get(self, key):
+        """(True, value) for a live entry, else (False, None)."""
+        now = time.time()
+        row = self._db().execute('SELECT value, expires, accessed FROM entries WHERE key = ?', (key,)).fetchone()
+        if row is None or row[1] < now:
+            return False, None
+        try:
+            value = pickle.loads(row[0])
+        except Exception:               # written by code that no longer unpickles
+            self._db().execute('DELETE FROM entries WHERE key = ?', (key,))
+            return False, None
+        if now - row[2] > TOUCH_AFTER:
+            self._db().execute('UPDATE entries SET accessed = ? WHERE key = ?', (now, key))
+        return True, value
+
+    def set(self, key, value, snapshot_id=None, func=None):
+        blob = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        if len(blob) > self.max_bytes // 4:
+            return False
+        now = time.time()
+        self._db().execute('INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                           (key, snapshot_id, func, blob, len(blob), now, now, now + self.ttl))
+        self.evict()
+        return True
+
+    def evict(self):
+        """Drop expired entries, then least recently used ones until under ``max_bytes``."""
+        con = self._db()
+        n = con.execute('DELETE FROM entries WHERE expires < ?', (time.time(),)).rowcount
+        total = con.execute('SELECT COALESCE(SUM(size), 0) FROM entries').fetchone()[0]
+        if total > self.max_bytes:
+            drop = []
+            for key, size in con.execute('SELECT key, size FROM entries ORDER BY accessed'):
+                if total <= self.max_bytes:
+                    break
+                drop.append((key,))
+                total -= size
+            con.executemany('DELETE FROM entries WHERE key = ?', drop)
+            n += len(drop)
+        if n:
+            METRICS.count('result_cache', 'evict', n)
+        return n
+
+    def clear(self, snapshot_id=None):
+        sql, args = ('DELETE FROM entries', ()) if snapshot_id is None else \
+            ('DELETE FROM entries WHERE snapshot_id = ?', (str(snapshot_id),))
+        return self._db().execute(sql, args).rowcount
+
+    def stats(self):
+        con = self._db()
+        entries, size = con.execute('SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries').fetchone()
+        by_func = con.execute('SELECT func, COUNT(*), SUM(size) FROM entries GROUP BY func ORDER BY 3 DESC').fetchall()
+        return {'path': self.path, 'entries': entries, 'bytes': size, 'max_bytes': self.max_bytes,
+                'functions': {f: {'entries': n, 'bytes': b} for f, n, b in by_func}}
+
+    # ── Single flight ────────────────────────────────────────────────────────
+    @contextlib.contextmanager
+    def _thread_lock(self, key):
+        """Per-key lock for this process's threads, dropped once no thread holds or waits on it."""
+        with self._locks_guard:
+            entry = self._locks.setdefault(key, [threading.Lock(), 0])
+            entry[1] += 1
+        try:
+            with entry[0]:
+                yield
+        finally:
+            with self._locks_guard:
+                entry[1] -= 1
+                if not entry[1]:
+                    del self._locks[key]
+
+    def _acquire(self, key):
+        con = self._db()
+        now = time.time()
+        con.execute('BEGIN IMMEDIATE')
+        try:
+            con.execute('DELETE FROM leases WHERE key = ? AND expires < ?', (key, now))
+            won = con.execute('INSERT OR IGNORE INTO leases VALUES (?, ?, ?)',
+                              (key, self._owner, now + self.lease)).rowcount == 1
+            con.execute('COMMIT')
+        except BaseException:
+            con.execute('ROLLBACK')
+            raise
+        return won
+
+    def _release(self, key):
+        self._db().execute('DELETE FROM leases WHERE key = ? AND owner = ?', (key, self._owner))
+
+    def get_or_compute(self, snapshot_id, func, params, compute, version=''):
+        """Cached ``compute()`` for (snapshot, function, params); computed once across threads and processes."""
+        key = cache_key(snapshot_id, func, params, version)
+        computed, value = False, None
+        try:
+            hit, value = self.get(key)
+            if hit:
+                METRICS.count(func, 'disk_hit')
+                return value
+            with self._thread_lock(key):
+                while not self._acquire(key):
+                    time.sleep(POLL)            # another process is computing it
+                    hit, value = self.get(key)
+                    if hit:
+                        METRICS.count(func, 'disk_hit')
+                        return value
+                try:
+                    hit, value = self.get(key)  # stored while we waited for the lock
+                    if hit:
+                        METRICS.count(func, 'disk_hit')
+                        return value
+                    METRICS.count(func, 'disk_miss')
+                    value, computed = compute(), True
+                    self.set(key, value, snapshot_id, func)
+                    return value
+                finally:
+                    self._release(key)
+        except sqlite3.Error:
+            # The cache is an accelerator; a locked or broken database must not break a page
+            log.warning("result cache unavailable at %s", self.path, exc_info=True)
+            return value if computed else compute()      # never compute twice
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(prog='python -m nyshealth.result_cache', description=__doc__.strip().splitlines()[0])
+    ap.add_argument('cmd', choices=['stats', 'evict', 'clear'])
+    ap.add_argument('snapshot_id', nargs='?', help="clear only this snapshot's entries")
+    args = ap.parse_args(argv)
+    cache = open_result_cache()
+    if cache is None:
+        ap.exit(message=f"{ENV_VAR}=off\n")
+    if args.cmd == 'stats':
+        s = cache.stats()
+        print(f"{s['path']}: {s['entries']} entries, {s['bytes'] / 2 ** 20:.1f} / {s['max_bytes'] / 2 ** 20:.0f} MB")
+        for func, f in s['functions'].items():
+            print(f"  {func:<28} {f['entries']:>6} {f['bytes'] / 2 ** 20:>9.2f} MB")
+    elif args.cmd == 'evict':
+        print(f"evicted {cache.evict()}")
+    else:
+        print(f"cleared {cache.clear(args.snapshot_id)}")
+
+
+if __name__ == '__main__':
+    main()
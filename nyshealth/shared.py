@@ -0,0 +1,212 @@
+"""
+One copy of the snapshot per host, mapped read-only by every worker process.
+
+``publish`` writes a snapshot as an uncompressed Arrow IPC file under
+``NYSHEALTH_SHARED_DIR`` (a tmpfs such as ``/dev/shm/nyshealth`` keeps it in
+shared memory) with county rows first, then bumps the counter in ``VERSION``.
+``SharedDataset`` memory-maps the file and wraps its buffers as pandas columns
+without copying: numeric columns are NumPy views, categoricals reuse the
+stored codes and strings stay Arrow arrays. Every worker's frames point at the
+same pages, so host memory no longer grows with the worker count, and the
+county rows are a row slice of the same buffers. Workers re-read ``VERSION``
+at most every ``check_every`` seconds and attach to the new file when it moves.
+
+    NYSHEALTH_SHARED_DIR=/dev/shm/nyshealth python -m nyshealth.shared --watch 30   # loader
+    NYSHEALTH_SHARED_DIR=/dev/shm/nyshealth streamlit run app.py                    # each worker
+"""
+import argparse, json, os, threading, time
+import numpy as np, pandas as pd
+
+from nyshealth.data import county_rows
+
+ENV_VAR = 'NYSHEALTH_SHARED_DIR'
+KEEP = 3                    # published files kept for sessions pinned to older versions
+META_KEY = b'nyshealth'
+
+
+def shared_dir():
+    """``NYSHEALTH_SHARED_DIR``, or None when shared mode is off."""
+    return os.environ.get(ENV_VAR) or None
+
+
+def _path(root, snapshot_id):
+    return os.path.join(root, f"{snapshot_id}.arrow")
+
+
+def read_version(root):
+    """Contents of ``VERSION``: version counter, snapshot id and publish time; {} if unpublished."""
+    try:
+        with open(os.path.join(root, 'VERSION')) as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+def _write_json(path, obj):
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, 'w') as f:
+        json.dump(obj, f)
+    os.replace(tmp, path)
+
+
+# ── Publishing ───────────────────────────────────────────────────────────────
+def _arrow_column(s):
+    """(array, field metadata) with a layout the attach side can wrap without copying."""
+    import pyarrow as pa
+
+    if isinstance(s.dtype, pd.CategoricalDtype):
+        return pa.array(s.cat.codes.to_numpy()), {b'kind': b'category',
+                                                  b'categories': json.dumps(s.cat.categories.tolist()).encode()}
+    if isinstance(s.dtype, pd.StringDtype) and s.dtype.storage == 'pyarrow':
+        return pa.array(s, type=pa.large_string(), from_pandas=True), {b'kind': b'str'}
+    if isinstance(s.dtype, np.dtype) and s.dtype.kind in 'iuf':
+        return pa.array(s.to_numpy()), {}       # NaN stays a value: no validity bitmap
+    return pa.array(s, from_pandas=True), {}    # anything else is converted on attach
+
+
+def publish(store=None, snapshot_id=None, root=None):
+    """Write ``snapshot_id`` (default: current) to the shared directory and point VERSION at it."""
+    import pyarrow as pa, pyarrow.ipc as ipc
+    from nyshealth.data import ensure_snapshot
+    from nyshealth.snapshot import SnapshotStore
+
+    root = root or shared_dir()
+    if not root:
+        raise ValueError(f"set {ENV_VAR} or pass root")
+    store = store or SnapshotStore()
+    sid = snapshot_id or ensure_snapshot(store)
+    os.makedirs(root, exist_ok=True)
+    path = _path(root, sid)
+
+    if not os.path.exists(path):
+        df = store.read(None, sid)
+        is_county = df.index.isin(county_rows(df).index)
+        df = pd.concat([df[is_county], df[~is_county]], ignore_index=True)
+        arrays, fields = [], []
+        for name, s in df.items():
+            arr, meta = _arrow_column(s)
+            if isinstance(arr, pa.ChunkedArray):      # Arrow-backed pandas columns
+                arr = arr.combine_chunks()
+            arrays.append(arr)
+            fields.append(pa.field(name, arr.type, metadata=meta or None))
+        meta = {'snapshot_id': sid, 'rows': len(df), 'county_rows': int(is_county.sum())}
+        schema = pa.schema(fields, metadata={META_KEY: json.dumps(meta).encode()})
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with pa.OSFile(tmp, 'wb') as sink, ipc.new_file(sink, schema) as writer:
+            writer.write_batch(pa.record_batch(arrays, schema=schema))
+        os.replace(tmp, path)
+
+    current = read_version(root)
+    if current.get('snapshot_id') != sid:
+        _write_json(os.path.join(root, 'VERSION'),
+                    {'version': current.get('version', 0) + 1, 'snapshot_id': sid, 'published': time.time()})
+        _prune(root, keep=sid)
+    return read_version(root)
+
+
+def _prune(root, keep):
+    files = sorted((os.path.join(root, f) for f in os.listdir(root) if f.endswith('.arrow')),
+                   key=os.path.getmtime)
+    for path in files[:-KEEP]:
+        if path != _path(root, keep):
+            os.remove(path)      # workers still mapping it keep their pages until they let go
+
+
+# ── Attaching ────────────────────────────────────────────────────────────────
+def _view(arr):
+    """NumPy view over a primitive Arrow array's value buffer."""
+    dtype = np.dtype(arr.type.to_pandas_dtype())
+    return np.frombuffer(arr.buffers()[1], dtype=dtype, count=len(arr), offset=arr.offset * dtype.itemsize)
+
+
+def _column(field, arr):
+    import pyarrow as pa
+
+    kind = (field.metadata or {}).get(b'kind')
+    if kind == b'category':
+        cats = json.loads(field.metadata[b'categories'])
+        return pd.Categorical.from_codes(_view(arr), dtype=pd.CategoricalDtype(cats), validate=False)
+    if kind == b'str':
+        return pd.arrays.ArrowStringArray(pa.chunked_array([arr]), dtype=pd.StringDtype('pyarrow', na_value=np.nan))
+    if arr.null_count == 0 and (pa.types.is_integer(arr.type) or pa.types.is_floating(arr.type)):
+        return _view(arr)
+    return arr.to_pandas()
+
+
+def attach(path):
+    """Read-only frame over a published file, plus its county row count."""
+    import pyarrow as pa, pyarrow.ipc as ipc
+
+    reader = ipc.open_file(pa.memory_map(path, 'r'))
+    batch = reader.get_batch(0)
+    meta = json.loads(reader.schema.metadata[META_KEY])
+    df = pd.DataFrame({f.name: pd.Series(_column(f, batch.column(i)), copy=False)
+                       for i, f in enumerate(reader.schema)}, copy=False)
+    df.attrs['snapshot_id'] = meta['snapshot_id']
+    return df, meta['county_rows']
+
+
+class SharedDataset:
+    """A worker's handle on the published snapshots; one mapping per snapshot id."""
+
+    def __init__(self, root=None, check_every=2.0):
+        self.root = root or shared_dir()
+        self.check_every = check_every
+        self._lock = threading.Lock()
+        self._frames = {}
+        self._version, self._checked = {}, -np.inf
+
+    def version(self):
+        """VERSION contents, re-read at most every ``check_every`` seconds."""
+        now = time.monotonic()
+        if now - self._checked >= self.check_every:
+            self._version, self._checked = read_version(self.root), now
+        return self._version
+
+    def live(self):
+        return self.version().get('snapshot_id')
+
+    def has(self, snapshot_id):
+        return snapshot_id in self._frames or os.path.exists(_path(self.root, snapshot_id))
+
+    def _attach(self, snapshot_id):
+        sid = snapshot_id or self.live()
+        if sid not in self._frames:
+            with self._lock:
+                if sid not in self._frames:
+                    self._frames[sid] = attach(_path(self.root, sid))
+                    for old in list(self._frames)[:-KEEP]:
+                        del self._frames[old]
+        return self._frames[sid]
+
+    def frame(self, snapshot_id=None, columns=None):
+        df, _ = self._attach(snapshot_id)
+        return df[list(columns)] if columns else df
+
+    def counties(self, snapshot_id=None, columns=None):
+        """County rows: a row slice of the same shared buffers."""
+        df, n = self._attach(snapshot_id)
+        return (df[list(columns)] if columns else df).iloc[:n]
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(prog='python -m nyshealth.shared', description=__doc__.strip().splitlines()[0])
+    ap.add_argument('--dir', default=shared_dir(), help=f"shared directory (default: ${ENV_VAR})")
+    ap.add_argument('--watch', type=float, default=0.0, help="republish when CURRENT moves, checking every N s")
+    args = ap.parse_args(argv)
+    if not args.dir:
+        ap.error(f"--dir or {ENV_VAR} is required")
+
+    from nyshealth.snapshot import SnapshotStore
+    store = SnapshotStore()
+    while True:
+        v = publish(store, store.current_id(), args.dir)
+        print(f"version {v['version']}: {v['snapshot_id']} -> {_path(args.dir, v['snapshot_id'])}", flush=True)
+        if not args.watch:
+            return
+        while store.current_id() == v['snapshot_id']:
+            time.sleep(args.watch)
+
+
+if __name__ == '__main__':
+    main()
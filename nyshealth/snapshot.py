@@ -0,0 +1,167 @@
+"""
+Typed columnar snapshots of the cached CHIRS pull (Parquet via pyarrow).
+
+A snapshot stores measures already coerced to numbers, the descriptive
+dimensions dictionary-encoded and the county coordinates joined in, so a cold
+start is a single columnar read with optional column projection. Snapshots are
+versioned in ``SnapshotStore``; ``CURRENT`` names the live one.
+"""
+import glob, json, os, time, uuid
+import numpy as np, pandas as pd
+
+from nyshealth.compact import compact_frame
+from nyshealth.constants import COORDS
+
+OUTPUT_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                          "nys_health_output")
+CSV_CACHE = os.path.join(OUTPUT_DIR, "chirs_data_cache.csv")
+SNAPSHOT = os.path.join(OUTPUT_DIR, "chirs_snapshot.parquet")   # pre-versioning layout
+SNAPSHOT_DIR = os.path.join(OUTPUT_DIR, "snapshots")
+
+NUMERIC = ['event_count', 'average_number_of_denominator', 'percent_rate']
+META_KEY = b'nyshealth'
+# Rows are clustered by topic/indicator in row groups this size, so lazy query
+# backends can skip row groups on those predicates and scan the rest in parallel.
+ROW_GROUP_SIZE = 64_000
+SORT_KEY = ['health_topic', 'indicator']
+
+# Column set shared by pages so projected loads hit the same cache entry.
+CORE_COLUMNS = ('county_name', 'health_topic', 'indicator', 'percent_rate')
+
+
+def prepare_frame(df):
+    """Coerce measures, join coordinates and compact dimensions/measures."""
+    df = df.copy()
+    for c in NUMERIC:
+        if c in df.columns:
+            df[c] = pd.to_numeric(df[c], errors='coerce')
+    df['county_name'] = df['county_name'].astype('category')
+
+    # Join coordinates once per distinct county rather than once per row
+    coords = pd.DataFrame.from_dict(COORDS, orient='index', columns=['lat', 'lon'])
+    counties = df['county_name']
+    lut = coords.reindex(counties.cat.categories)
+    idx = counties.cat.codes.to_numpy()
+    for c in ['lat', 'lon']:
+        vals = np.append(lut[c].to_numpy(dtype='float64'), np.nan)
+        df[c] = vals[idx]          # code -1 (missing county) lands on the NaN sentinel
+    return compact_frame(df)
+
+
+def write_snapshot(df, path, source='api', **extra):
+    """Write a prepared frame atomically; returns the new snapshot id."""
+    import pyarrow as pa, pyarrow.parquet as pq
+
+    meta = {'snapshot_id': extra.pop('snapshot_id', None) or uuid.uuid4().hex[:12],
+            'created': time.time(), 'source': source, 'rows': len(df), **extra}
+    key = [c for c in SORT_KEY if c in df.columns]
+    if key:
+        df = df.sort_values(key, kind='stable', ignore_index=True)
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    table = table.replace_schema_metadata({**(table.schema.metadata or {}),
+                                           META_KEY: json.dumps(meta).encode()})
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    pq.write_table(table, tmp, compression='zstd', row_group_size=ROW_GROUP_SIZE)
+    os.replace(tmp, path)
+    return meta['snapshot_id']
+
+
+def snapshot_info(path):
+    """Snapshot metadata, read from the Parquet footer only."""
+    import pyarrow.parquet as pq
+
+    md = pq.read_schema(path).metadata or {}
+    return json.loads(md.get(META_KEY, b'{}'))
+
+
+def read_snapshot(path, columns=None):
+    """Read the snapshot, deserializing only ``columns`` when given."""
+    import pyarrow.parquet as pq
+
+    table = pq.read_table(path, columns=list(columns) if columns else None)
+    df = table.to_pandas()
+    df.attrs['snapshot_id'] = snapshot_info(path).get('snapshot_id')
+    return df
+
+
+class SnapshotStore:
+    """Versioned snapshots under ``root``; ``CURRENT`` holds the live id."""
+
+    def __init__(self, root=SNAPSHOT_DIR, keep=5):
+        self.root = root
+        self.keep = keep
+
+    def path(self, snapshot_id):
+        return os.path.join(self.root, f"{snapshot_id}.parquet")
+
+    def current_id(self):
+        try:
+            with open(os.path.join(self.root, 'CURRENT')) as f:
+                return f.read().strip() or None
+        except FileNotFoundError:
+            return None
+
+    def current_info(self):
+        sid = self.current_id()
+        return snapshot_info(self.path(sid)) if sid else {}
+
+    def read(self, columns=None, snapshot_id=None):
+        return read_snapshot(self.path(snapshot_id or self.current_id()), columns)
+
+    def columns(self, snapshot_id=None):
+        """Column names stored in a snapshot, read from the Parquet schema only."""
+        import pyarrow.parquet as pq
+
+        return pq.read_schema(self.path(snapshot_id or self.current_id())).names
+
+    def versions(self):
+        """Metadata of every stored version, oldest first."""
+        infos = [snapshot_info(p) for p in glob.glob(os.path.join(self.root, '*.parquet'))]
+        return sorted(infos, key=lambda m: m.get('created', 0))
+
+    def commit(self, df, source, activate=True, **extra):
+        """Write ``df`` as a new version and make it current (later, via ``activate``, if not ``activate``)."""
+        sid = uuid.uuid4().hex[:12]
+        write_snapshot(df, self.path(sid), source, snapshot_id=sid,
+                       parent=self.current_id(), **extra)
+        if activate:
+            self.activate(sid)
+        return sid
+
+    def activate(self, snapshot_id):
+        """Point CURRENT at a written version and prune old ones."""
+        self._set_current(snapshot_id)
+        self.prune()
+
+    def rollback(self, snapshot_id=None):
+        """Point CURRENT at ``snapshot_id`` or, by default, the parent version."""
+        target = snapshot_id or self.current_info().get('parent')
+        if not target or not os.path.exists(self.path(target)):
+            raise ValueError(f"No snapshot to roll back to: {target!r}")
+        self._set_current(target)
+        return target
+
+    def prune(self):
+        cur = self.current_id()
+        for m in self.versions()[:-self.keep or None]:
+            if m['snapshot_id'] != cur:
+                os.remove(self.path(m['snapshot_id']))
+
+    def migrate_legacy(self, csv_path=CSV_CACHE, legacy_path=SNAPSHOT):
+        """Adopt a pre-versioning snapshot or CSV cache; False if neither exists."""
+        if os.path.exists(legacy_path):
+            df, source = compact_frame(read_snapshot(legacy_path)), 'legacy'   # older files predate compaction
+        elif os.path.exists(csv_path):
+            df, source = prepare_frame(pd.read_csv(csv_path, low_memory=False)), 'csv'
+        else:
+            return False
+        self.commit(df, source)
+        return True
+
+    def _set_current(self, snapshot_id):
+        os.makedirs(self.root, exist_ok=True)
+        tmp = os.path.join(self.root, f"CURRENT.{os.getpid()}.tmp")
+        with open(tmp, 'w') as f:
+            f.write(snapshot_id)
+        os.replace(tmp, os.path.join(self.root, 'CURRENT'))
@@ -0,0 +1,86 @@
+"""
+Pooled, retrying client for the Socrata (SODA) API behind health.data.ny.gov.
+
+Pages are fetched concurrently over one keep-alive session after a count
+query, so the full dataset is always retrieved. ``base_url`` (or the
+``CHIRS_API_BASE`` environment variable) can point at a local stand-in server.
+"""
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+BASE_URL = os.environ.get('CHIRS_API_BASE', 'https://health.data.ny.gov')
+DATASET = '54ci-sdfi'
+PAGE_SIZE = 5000
+
+# Columns the dashboard actually uses; projected server-side.
+COLUMNS = ('county_name', 'health_topic', 'indicator', 'data_years',
+           'event_count', 'average_number_of_denominator', 'percent_rate', 'measure_unit')
+
+
+class SocrataClient:
+    def __init__(self, base_url=BASE_URL, dataset=DATASET, page_size=PAGE_SIZE,
+                 max_workers=4, timeout=30, retries=5, backoff=0.5,
+                 app_token=os.environ.get('SOCRATA_APP_TOKEN')):
+        self.url = f"{base_url.rstrip('/')}/resource/{dataset}.json"
+        self.page_size = page_size
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self.session = self._session(retries, backoff, app_token)
+
+    def _session(self, retries, backoff, app_token):
+        import requests
+        from requests.adapters import HTTPAdapter
+        from urllib3.util.retry import Retry
+
+        retry = Retry(total=retries, backoff_factor=backoff,
+                      status_forcelist=(429, 500, 502, 503, 504),
+                      allowed_methods=('GET',), respect_retry_after_header=True)
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.max_workers,
+                              max_retries=retry)
+        s = requests.Session()
+        s.mount('http://', adapter)
+        s.mount('https://', adapter)
+        s.headers.update({'Accept': 'application/json', 'Accept-Encoding': 'gzip'})
+        if app_token:
+            s.headers['X-App-Token'] = app_token
+        return s
+
+    def get(self, **params):
+        """One SODA query; keyword ``select`` becomes ``$select`` and so on."""
+        r = self.session.get(self.url, timeout=self.timeout,
+                             params={f'${k}': v for k, v in params.items() if v is not None})
+        r.raise_for_status()
+        return r.json()
+
+    def count(self, where=None):
+        rows = self.get(select='count(*)', where=where)
+        return int(next(iter(rows[0].values()))) if rows else 0
+
+    def fetch_all(self, select=COLUMNS, where=None, order=':id'):
+        """All matching rows, paged concurrently with a stable ``$order``."""
+        total = self.count(where)
+        select = ','.join(select) if select else None
+
+        def page(offset):
+            return self.get(select=select, where=where, order=order,
+                            limit=self.page_size, offset=offset)
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as ex:
+            pages = list(ex.map(page, range(0, total, self.page_size)))
+        records = [rec for p in pages for rec in p]
+        if len(records) < total:
+            raise RuntimeError(f"Socrata returned {len(records)} of {total} rows")
+        return records
+
+    def fetch_frame(self, **kwargs):
+        import pandas as pd
+        return pd.DataFrame(self.fetch_all(**kwargs))
+
+    def close(self):
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,200 @@
+"""
+Spatial autocorrelation across counties for every indicator at once.
+
+Weights are a sparse binary county × county matrix: shared borders from the
+bundled county outlines (islands get their nearest neighbour) or the k
+nearest centroids. ``SpatialStats`` takes a county × column frame (one column
+per indicator, plus the overall burden) and computes global Moran's I, local
+Moran (LISA) and Getis–Ord Gi* for all columns with sparse matrix products.
+Significance comes from permutations drawn for every column in one batch of
+arrays. Local statistics hold each county's own value fixed: its value is
+swapped back into place, so its neighbourhood is drawn from the other n - 1.
+Missing values are left out per column.
+"""
+import numpy as np, pandas as pd
+
+from nyshealth.constants import COORDS
+
+BURDEN = 'Overall burden'
+WEIGHTS = ('contiguity', 'knn')
+PERMUTATIONS = 999
+BATCH = 50                  # permutations per array batch
+ALPHA = 0.05
+QUADRANTS = np.array(['High-High', 'Low-Low', 'High-Low', 'Low-High'])
+
+
+class SpatialWeights:
+    """Binary neighbour matrix over ``names``; rows are standardized per column at use."""
+
+    def __init__(self, names, pairs, kind):
+        from scipy import sparse
+
+        self.names = pd.Index(names, name='county')
+        self.kind = kind
+        pos = {n: i for i, n in enumerate(self.names)}
+        ij = np.array([(pos[a], pos[b]) for a, b in pairs if a in pos and b in pos]).reshape(-1, 2)
+        n = len(self.names)
+        B = sparse.csr_array((np.ones(len(ij)), (ij[:, 0], ij[:, 1])), shape=(n, n))
+        B.data[:] = 1.0          # duplicate pairs summed above
+        self.B = B
+
+    @property
+    def cardinalities(self):
+        return pd.Series(np.diff(self.B.indptr), index=self.names, name='neighbours')
+
+
+def _xyz(names):
+    lat, lon = np.radians(np.array([COORDS[n] for n in names])).T
+    return np.column_stack([np.cos(lat) * np.cos(lon), np.cos(lat) * np.sin(lon), np.sin(lat)])
+
+
+def _nearest(names, k):
+    """Each county's ``k`` nearest centroids (great-circle order)."""
+    xyz = _xyz(names)
+    d = ((xyz[:, None, :] - xyz[None, :, :]) ** 2).sum(-1)
+    np.fill_diagonal(d, np.inf)
+    return np.argsort(d, axis=1)[:, :k]
+
+
+def knn_weights(names=None, k=5):
+    names = sorted(names or COORDS)
+    nn = _nearest(names, k)
+    pairs = [(names[i], names[j]) for i in range(len(names)) for j in nn[i]]
+    # Symmetrize so every neighbour relation counts both ways
+    return SpatialWeights(names, pairs + [(b, a) for a, b in pairs], 'knn')
+
+
+def contiguity_weights(names=None):
+    """Shared-border neighbours; a county with none (an island) gets its nearest centroid."""
+    from nyshealth.geometry import load
+
+    nb = load().neighbours()
+    names = sorted(names or nb)
+    pairs = [(a, b) for a in names for b in nb.get(a, ())]
+    nn = _nearest(names, 1)
+    linked = {a for a, _ in pairs}
+    for i, a in enumerate(names):
+        if a not in linked:
+            pairs += [(a, names[nn[i, 0]]), (names[nn[i, 0]], a)]
+    return SpatialWeights(names, pairs, 'contiguity')
+
+
+def spatial_weights(kind='contiguity', names=None, k=5):
+    if kind not in WEIGHTS:
+        raise ValueError(f"weights must be one of {WEIGHTS}, got {kind!r}")
+    return contiguity_weights(names) if kind == 'contiguity' else knn_weights(names, k)
+
+
+def _pseudo_p(larger, permutations):
+    """Folded pseudo p-value from the count of permuted statistics >= the observed one."""
+    return (np.minimum(larger, permutations - larger) + 1.0) / (permutations + 1.0)
+
+
+class SpatialStats:
+    """Global and local spatial statistics for each column of a county × column frame."""
+
+    def __init__(self, values, weights=None, permutations=PERMUTATIONS, seed=0):
+        weights = weights or contiguity_weights()
+        values = values.reindex(weights.names).astype('float64')
+        self.weights = weights
+        self.columns = values.columns
+        self.permutations = permutations
+        X = values.to_numpy()
+        M = np.isfinite(X)
+        n_obs = M.sum(axis=0)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mean = np.where(M, X, 0.0).sum(axis=0) / n_obs
+            Z = np.where(M, X - mean, 0.0)
+            m2 = (Z ** 2).sum(axis=0) / n_obs
+
+        B = weights.B
+        Bd = B.toarray()
+        D = B @ M.astype('float64')                    # observed neighbours per county × column
+        has = M & (D > 0)
+        S0 = has.sum(axis=0)
+        lagsum = B @ Z
+        with np.errstate(invalid='ignore', divide='ignore'):
+            lag = np.where(has, lagsum / D, 0.0)
+            scale = n_obs / S0 / (Z ** 2).sum(axis=0)
+            moran = (Z * lag).sum(axis=0) * scale
+            lisa = np.where(has, Z * lag / m2, np.nan)
+
+            # Getis–Ord Gi* with binary weights including the county itself
+            W = D + M
+            s = np.sqrt(m2)
+            gi = np.where(M, (lagsum + Z) / (s * np.sqrt((n_obs * W - W ** 2) / (n_obs - 1))), np.nan)
+
+        # Permutations: shuffle observed values among observed counties, every column at once
+        rng = np.random.default_rng(seed)
+        order = np.argsort(~M, axis=0, kind='stable')        # observed rows first
+        moran_perm = np.empty((permutations, len(self.columns)))
+        local_ge = np.zeros(X.shape)                         # permuted lag >= observed lag
+        gi_ge = np.zeros(X.shape)
+        done = 0
+        while done < permutations:
+            b = min(BATCH, permutations - done)
+            keys = rng.random((X.shape[0], X.shape[1] * b))
+            keys[~np.tile(M, b)] = np.inf
+            src = np.argsort(keys, axis=0)
+            cols = np.arange(X.shape[1] * b)
+            Zt = np.tile(Z, b)
+            Zp = np.empty_like(Zt)
+            dest = np.tile(order, b)
+            Zp[dest, cols] = Zt[src, cols]
+            lsp = B @ Zp
+            with np.errstate(invalid='ignore', divide='ignore'):
+                lagp = np.where(has[:, None], lsp.reshape(X.shape[0], b, X.shape[1]) / D[:, None], 0.0)
+            moran_perm[done:done + b] = (Zp.reshape(X.shape[0], b, X.shape[1]) * lagp).sum(axis=0) * scale
+
+            # Local: swap each county's own value back from the row it landed on,
+            # which hands that row the value drawn for the county
+            home = np.empty_like(src)
+            home[src, cols] = dest
+            lsp += Bd[np.arange(X.shape[0])[:, None], home] * (Zp - Zt)
+            lsp = lsp.reshape(X.shape[0], b, X.shape[1])
+            with np.errstate(invalid='ignore', divide='ignore'):
+                lagp = np.where(has[:, None], lsp / D[:, None], 0.0)
+            local_ge += (Z[:, None] * lagp >= (Z * lag)[:, None]).sum(axis=1)
+            gi_ge += (lsp >= lagsum[:, None]).sum(axis=1)
+            done += b
+
+        with np.errstate(invalid='ignore', divide='ignore'):
+            ge = (moran_perm >= moran).sum(axis=0)
+            self.global_ = pd.DataFrame({
+                'moran_i': moran, 'expected': -1.0 / (n_obs - 1),
+                'z_sim': (moran - moran_perm.mean(axis=0)) / moran_perm.std(axis=0),
+                'p_sim': _pseudo_p(ge, permutations), 'counties': n_obs,
+            }, index=self.columns)
+        self.global_.loc[S0 < 3, ['moran_i', 'z_sim', 'p_sim']] = np.nan
+
+        self._x = np.where(M, X, np.nan)
+        self._lag = np.where(has, lag + mean, np.nan)
+        self._lisa = lisa
+        self._lisa_p = np.where(has, _pseudo_p(local_ge, permutations), np.nan)
+        self._gi = gi
+        self._gi_p = np.where(has, _pseudo_p(gi_ge, permutations), np.nan)
+        self._quad = np.where(Z > 0, np.where(lag > 0, 0, 2), np.where(lag > 0, 3, 1))
+        self._has = has
+
+    def local(self, column, alpha=ALPHA):
+        """Per-county value, neighbour mean, LISA and Gi* with pseudo p-values and labels."""
+        j = self.columns.get_loc(column)
+        out = pd.DataFrame({
+            'value': self._x[:, j], 'neighbour_mean': self._lag[:, j],
+            'lisa': self._lisa[:, j], 'lisa_p': self._lisa_p[:, j],
+            'gi_z': self._gi[:, j], 'gi_p': self._gi_p[:, j],
+        }, index=self.weights.names)
+        sig = self._has[:, j] & (out['lisa_p'] <= alpha)
+        out['cluster'] = np.where(sig, QUADRANTS[self._quad[:, j]], 'Not significant')
+        hot = self._has[:, j] & (out['gi_p'] <= alpha)
+        out['hotspot'] = np.where(hot & (out['gi_z'] > 0), 'Hot spot',
+                                  np.where(hot & (out['gi_z'] < 0), 'Cold spot', 'Not significant'))
+        return out[np.isfinite(self._x[:, j])]
+
+    @classmethod
+    def from_pivot(cls, pivot, burden=None, weights=None, permutations=PERMUTATIONS, seed=0):
+        """Stats for a county × indicator pivot, plus the overall burden ratio as ``BURDEN``."""
+        values = pivot.copy()
+        if burden is not None:
+            values[BURDEN] = pd.Series(burden, dtype='float64')
+        return cls(values, weights, permutations, seed)
@@ -0,0 +1,145 @@
+"""
+Bootstrap stability of a KMeans clustering.
+
+Each resample draws counties and indicators with replacement. Both draws
+become weights (how often a county or an indicator was drawn), so every
+resample is a weighted KMeans on the same standardized matrix and all of
+them run as one batched Lloyd iteration: k-means++ seeding, distances and
+centroid updates are array operations over a (resample × init) axis.
+Batches run on a thread pool, and NumPy releases the GIL inside the
+products. Across resamples the counties drawn together give a consensus
+(co-assignment) matrix. That matrix scores each county by how often it stays
+with its reference cluster-mates, and the adjusted Rand index compares each
+resample's labels with the reference clustering.
+"""
+import os
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np, pandas as pd
+
+RESAMPLES = 200
+N_INIT = 4                  # k-means++ starts per resample, best inertia kept
+MAX_ITER = 100
+BATCH = 25                  # resamples per thread-pool task
+UNSTABLE = 0.6              # stability below which a county is flagged
+
+
+def _kmeans_pp(X, sqXF, W, F, k, rng):
+    """Batched weighted k-means++ seeding: (R, k, d) initial centres."""
+    R, n = W.shape
+    idx = np.empty((R, k), dtype=np.int64)
+    p = W / W.sum(axis=1, keepdims=True)
+    idx[:, 0] = (p.cumsum(axis=1) < rng.random((R, 1))).sum(axis=1)
+    d2 = np.full((R, n), np.inf)
+    for j in range(1, k):
+        c = X[idx[:, j - 1]][:, None]                                    # (R, 1, d)
+        d2 = np.minimum(d2, _distances(X, sqXF, c, F)[:, :, 0])
+        p = W * np.maximum(d2, 0.0)
+        p /= p.sum(axis=1, keepdims=True)
+        idx[:, j] = (p.cumsum(axis=1) < rng.random((R, 1))).sum(axis=1)
+    return X[np.minimum(idx, n - 1)]
+
+
+def _distances(X, sqXF, C, F):
+    """Weighted squared distances, (R, n, k)."""
+    return (sqXF[:, :, None] - 2 * np.einsum('id,rkd->rik', X, C * F[:, None])
+            + ((C ** 2) * F[:, None]).sum(axis=2)[:, None, :])
+
+
+def batched_kmeans(X, W, F, k, n_init=N_INIT, max_iter=MAX_ITER, seed=0):
+    """Weighted KMeans for every row of county weights ``W`` and indicator weights ``F`` at once.
+
+    Returns (R, n) labels for all counties (weightless ones assigned to their
+    nearest centre) and the (R,) weighted inertia of the best start.
+    """
+    rng = np.random.default_rng(seed)
+    R = len(W)
+    Wr, Fr = np.repeat(W, n_init, axis=0), np.repeat(F, n_init, axis=0)
+    sqXF = Fr @ (X ** 2).T                                               # (R·n_init, n)
+    C = _kmeans_pp(X, sqXF, Wr, Fr, k, rng)
+    labels = None
+    for _ in range(max_iter):
+        D = _distances(X, sqXF, C, Fr)
+        new = D.argmin(axis=2)
+        if labels is not None and (new == labels).all():
+            break
+        labels = new
+        onehot = (labels[:, :, None] == np.arange(k)) * Wr[:, :, None]   # (R, n, k) weighted
+        size = onehot.sum(axis=1)                                        # (R, k)
+        sums = np.einsum('rik,id->rkd', onehot, X)
+        C = np.where(size[:, :, None] > 0, sums / np.maximum(size, 1e-12)[:, :, None], C)   # empty: keep centre
+    D = _distances(X, sqXF, C, Fr)
+    labels = D.argmin(axis=2)
+    inertia = (np.take_along_axis(D, labels[:, :, None], axis=2)[:, :, 0] * Wr).sum(axis=1)
+    best = inertia.reshape(R, n_init).argmin(axis=1) + np.arange(R) * n_init
+    return labels[best], inertia[best]
+
+
+def adjusted_rand(labels, reference, mask):
+    """ARI of each row of ``labels`` against ``reference`` over the counties in each row of ``mask``."""
+    R, n = labels.shape
+    ka, kb = labels.max() + 1, reference.max() + 1
+    table = np.zeros((R, ka, kb))
+    r = np.repeat(np.arange(R), n)
+    np.add.at(table, (r, labels.ravel(), np.tile(reference, R)), mask.ravel().astype(float))
+
+    def pairs(x):
+        return (x * (x - 1) / 2).sum(axis=-1)
+
+    total = pairs(mask.sum(axis=1).astype(float)[:, None])
+    index = pairs(table.reshape(R, -1))
+    a, b = pairs(table.sum(axis=2)), pairs(table.sum(axis=1))
+    expected = a * b / total
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return (index - expected) / ((a + b) / 2 - expected)
+
+
+class ClusterStability:
+    """Consensus matrix, per-county stability and ARI over bootstrap re-clusterings."""
+
+    def __init__(self, fm, k, reference, resamples=RESAMPLES, n_init=N_INIT, seed=0, max_workers=None):
+        X = np.asarray(fm.X, dtype='float64')
+        n, d = X.shape
+        self.counties = pd.Index(fm.counties, name='county')
+        self.k, self.resamples = k, resamples
+        ref = pd.Series(reference).reindex(self.counties)
+        ref_codes, self.cluster_names = pd.factorize(ref, sort=True)
+
+        rng = np.random.default_rng(seed)
+        W = rng.multinomial(n, np.full(n, 1.0 / n), size=resamples).astype('float64')
+        F = rng.multinomial(d, np.full(d, 1.0 / d), size=resamples).astype('float64')
+        starts = range(0, resamples, BATCH)
+        seeds = rng.integers(2 ** 32, size=len(starts))
+        workers = max_workers or min(len(starts), os.cpu_count() or 1)
+        with ThreadPoolExecutor(max_workers=max(workers, 1)) as ex:
+            fits = list(ex.map(lambda a, s: batched_kmeans(X, W[a:a + BATCH], F[a:a + BATCH], k, n_init, seed=s),
+                               starts, seeds))
+        labels = np.concatenate([f[0] for f in fits])
+        drawn = W > 0
+
+        # Co-assignment over resamples that drew both counties
+        S = drawn.astype('float64')
+        together = sum(np.einsum('ri,rj->ij', (labels == c) * S, (labels == c) * S) for c in range(k))
+        both = S.T @ S
+        with np.errstate(invalid='ignore', divide='ignore'):
+            M = together / both
+        self.consensus = pd.DataFrame(M, index=self.counties, columns=self.counties)
+
+        same = ref_codes[:, None] == ref_codes[None, :]
+        np.fill_diagonal(same, False)
+        with np.errstate(invalid='ignore'):
+            stability = np.nanmean(np.where(same, M, np.nan), axis=1)
+            outside = np.nanmean(np.where(~same & ~np.eye(n, dtype=bool), M, np.nan), axis=1)
+        self.county = pd.DataFrame({
+            'cluster': ref.to_numpy(), 'stability': stability, 'outside': outside,
+            'drawn': drawn.mean(axis=0)}, index=self.counties)
+        self.clusters = self.county.groupby('cluster')['stability'].agg(['mean', 'min', 'size'])
+        self.ari = pd.Series(adjusted_rand(labels, ref_codes, drawn), name='ari').rename_axis('resample')
+
+    def order(self):
+        """Counties grouped by reference cluster, most stable first, for plotting ``consensus``."""
+        return self.county.sort_values(['cluster', 'stability'], ascending=[True, False]).index
+
+    def summary(self):
+        return {'resamples': self.resamples, 'ari_mean': float(self.ari.mean()),
+                'ari_low': float(self.ari.quantile(0.05)), 'stability': float(self.county['stability'].mean()),
+                'unstable': int((self.county['stability'] < UNSTABLE).sum())}
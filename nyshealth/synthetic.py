@@ -0,0 +1,68 @@
+"""
+Synthetic CHIRS-shaped data for benchmarks and local development.
+
+Frames have the Socrata columns the dashboard uses, one row per
+(indicator, data period, geography) for the 62 ``COORDS`` counties plus the
+state/region rows and a few multi-county rows that ``county_rows`` excludes.
+Everything is generated with NumPy, so millions of rows take seconds.
+"""
+import numpy as np, pandas as pd
+
+from nyshealth.constants import AGGREGATE_ROWS, COORDS
+
+MULTI_COUNTY = ['Bronx/Kings', 'Nassau/Suffolk', 'Erie/Niagara']
+TOPICS = ['Cancer', 'Cardiovascular Disease', 'Child and Adolescent Health', 'Cirrhosis/Diabetes',
+          'Family Planning/Natality', 'HIV/AIDS and Other Sexually Transmitted Infections',
+          'Injury', 'Maternal and Infant Health', 'Obesity and Related', 'Occupational Health',
+          'Oral Health', 'Respiratory Disease', 'Socio-Economic Status and General Health',
+          'Substance Use and Mental Health', 'Tobacco, Alcohol and Other Substances']
+GEOGRAPHIES = list(COORDS) + AGGREGATE_ROWS + MULTI_COUNTY
+
+
+def rows_per_indicator(n_years=1):
+    return len(GEOGRAPHIES) * n_years
+
+
+def synthetic_chirs(rows=25_000, n_years=1, n_topics=15, missing=0.05, seed=0):
+    """About ``rows`` rows; indicators scale to fit ``n_years`` data periods."""
+    rng = np.random.default_rng(seed)
+    n_ind = max(1, round(rows / rows_per_indicator(n_years)))
+    n_geo, n_cty = len(GEOGRAPHIES), len(COORDS)
+    topics = [f"{TOPICS[i % len(TOPICS)]}{'' if i < len(TOPICS) else f' {i // len(TOPICS) + 1}'} Indicators"
+              for i in range(n_topics)]
+    years = [f"{2008 + 3 * y}-{2010 + 3 * y}" for y in range(n_years)]
+
+    ind = np.repeat(np.arange(n_ind), n_years * n_geo)
+    yr = np.tile(np.repeat(np.arange(n_years), n_geo), n_ind)
+    geo = np.tile(np.arange(n_geo), n_ind * n_years)
+
+    # Rate = indicator base × county effect × period drift × noise
+    base = rng.lognormal(2.5, 1.0, n_ind)
+    county_fx = np.r_[rng.lognormal(0, 0.2, n_cty), np.ones(n_geo - n_cty)]
+    drift = rng.normal(1.0, 0.03, (n_ind, n_years))
+    rate = base[ind] * county_fx[geo] * drift[ind, yr] * rng.lognormal(0, 0.1, len(ind))
+    pop = rng.lognormal(11, 1.1, n_cty)
+    pop = np.r_[pop, np.full(n_geo - n_cty, pop.sum() / 4)]
+    denom = np.round(pop[geo] * rng.uniform(0.05, 1.0, n_ind)[ind])
+    events = np.round(rate / 100 * denom)
+    rate = np.round(rate, 1)
+    gone = rng.random(len(ind)) < missing
+    gone &= GEOGRAPHIES.index('New York State') != geo     # state averages always present
+
+    df = pd.DataFrame({
+        'county_name': pd.Categorical.from_codes(geo, GEOGRAPHIES),
+        'health_topic': pd.Categorical.from_codes(np.arange(n_ind)[ind] % n_topics, topics),
+        'indicator': pd.Categorical.from_codes(ind, [f"Indicator {i:04d}" for i in range(n_ind)]),
+        'data_years': pd.Categorical.from_codes(yr, years),
+        'event_count': events,
+        'average_number_of_denominator': denom,
+        'percent_rate': rate,
+        'measure_unit': pd.Categorical.from_codes(np.zeros(len(ind), dtype=np.int8), ['Percent']),
+    })
+    df.loc[gone, ['event_count', 'average_number_of_denominator', 'percent_rate']] = np.nan
+    return df
+
+
+def as_raw(df):
+    """The frame as the Socrata API returns it: every field a string."""
+    return df.astype(object).astype(str).mask(df.isna())
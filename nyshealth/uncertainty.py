@@ -0,0 +1,142 @@
+"""
+Sampling uncertainty of county rates and of the burden ranking built on them.
+
+Every county row reports a rate with the event count behind it. Percent
+indicators are treated as binomial (``n = events / p``) and all others as
+Poisson counts; each row's rate per event (``rate / events``) converts counts
+back to the reported scale, falling back to the indicator's median multiplier
+over the row's denominator when no events were recorded. Snapshots without
+count columns get no intervals and a ranking without uncertainty. Confidence
+intervals are exact (Clopper–Pearson, Garwood).
+
+For the ranking, plausible true rates are drawn from each row's Jeffreys
+posterior (Beta or Gamma) for every row at once, in batches of draws. Each
+draw is turned into burden ratios and ranks exactly as ``BurdenEngine.overall``
+ranks the point estimates. The result is a rank interval and a probability
+for every county and rank. Small counties whose handful of events could put
+them almost anywhere show up as wide intervals.
+"""
+import numpy as np, pandas as pd
+
+ALPHA = 0.05
+DRAWS = 4000
+BATCH = 250                 # draws per array batch
+TOP = 10                    # "top/bottom N" probabilities
+COUNT_COLUMNS = ('event_count', 'average_number_of_denominator', 'measure_unit')
+
+
+def rate_intervals(events, scale, binomial, alpha=ALPHA):
+    """Exact (lower, upper) rate limits from an event count and the rate per event.
+
+    Binomial rows are percentages with ``n = 100 / scale`` trials.
+    """
+    from scipy import stats
+
+    k = np.asarray(events, dtype='float64')
+    with np.errstate(invalid='ignore', divide='ignore'):
+        # Poisson (Garwood): gamma quantiles of the count
+        lo = np.where(k > 0, stats.gamma.ppf(alpha / 2, np.maximum(k, 1e-12)), 0.0) * scale
+        hi = stats.gamma.ppf(1 - alpha / 2, k + 1) * scale
+        # Binomial (Clopper–Pearson)
+        n = 100.0 / scale
+        p_lo = np.where(k > 0, stats.beta.ppf(alpha / 2, np.maximum(k, 1e-12), n - k + 1), 0.0)
+        p_hi = np.where(n > k, stats.beta.ppf(1 - alpha / 2, k + 1, np.maximum(n - k, 1e-12)), 1.0)
+    lo = np.where(binomial, p_lo * 100.0, lo)
+    hi = np.where(binomial, p_hi * 100.0, hi)
+    missing = ~np.isfinite(scale)
+    return np.where(missing, np.nan, lo), np.where(missing, np.nan, hi)
+
+
+class BurdenUncertainty:
+    """Per-row rate intervals plus Monte Carlo burden rank intervals for every county."""
+
+    def __init__(self, dfc, savgs, alpha=ALPHA, draws=DRAWS, seed=0):
+        """``dfc``: county rows with ``CORE_COLUMNS`` plus whichever ``COUNT_COLUMNS`` the snapshot has."""
+        from scipy import sparse
+
+        state = pd.Series(savgs, dtype='float64')
+        state = state[~state.index.duplicated(keep='last')]
+        rate = dfc['percent_rate'].to_numpy(dtype='float64', na_value=np.nan)
+        sa = state.reindex(dfc['indicator'].astype(str)).to_numpy()
+        ok = np.isfinite(rate) & np.isfinite(sa) & (sa != 0)
+        rows = dfc[ok]
+        rate, sa = rate[ok], sa[ok]
+        self.alpha, self.draws = alpha, draws
+
+        def column(name):
+            if name not in rows:
+                return np.full(len(rows), np.nan)
+            return rows[name].to_numpy(dtype='float64', na_value=np.nan)
+
+        ev, dn = column('event_count'), column('average_number_of_denominator')
+        unit = rows['measure_unit'].astype(str) if 'measure_unit' in rows else pd.Series('', index=rows.index)
+        binomial = unit.str.contains('percent', case=False).to_numpy() & (rate <= 100.0)
+
+        # Rate per event; rows without events borrow the indicator's multiplier over their denominator
+        with np.errstate(invalid='ignore', divide='ignore'):
+            per_event = np.where(ev > 0, rate / ev, np.nan)
+            mult = pd.Series(per_event * dn).groupby(rows['indicator'].astype(str).to_numpy()).transform('median')
+            scale = np.where(ev > 0, per_event, mult.to_numpy() / dn)
+            scale = np.where(np.isfinite(scale) & (scale > 0), scale, np.nan)
+            # Suppressed (or zero against a positive rate) counts, recovered from the rate
+            ev = np.where((ev > 0) | ((ev == 0) & (rate == 0)), ev, rate / scale)
+        binomial &= np.isfinite(scale)
+        lower, upper = rate_intervals(ev, scale, binomial, alpha)
+
+        county = rows['county_name'].astype(str).to_numpy()
+        self.intervals = pd.DataFrame({
+            'county': county, 'topic': rows['health_topic'].astype(str).to_numpy(),
+            'indicator': rows['indicator'].astype(str).to_numpy(), 'rate': rate, 'lower': lower, 'upper': upper,
+            'events': ev, 'family': np.where(binomial, 'binomial', 'poisson'),
+            'ratio': rate / sa, 'ratio_lower': lower / sa, 'ratio_upper': upper / sa})
+
+        # Row → county averaging matrix: a draw's burden ratios are one product
+        codes, self.counties = pd.factorize(county, sort=True)
+        self.counties = pd.Index(self.counties, name='county')
+        n_rows = np.bincount(codes)
+        A = sparse.csr_array((1.0 / n_rows[codes], (np.arange(len(codes)), codes)),
+                             shape=(len(codes), len(self.counties)))
+        self.ratio = pd.Series(A.T @ (rate / sa), index=self.counties, name='ratio')
+
+        rng = np.random.default_rng(seed)
+        fixed = ~np.isfinite(scale)
+        n_bin = np.where(binomial, 100.0 / scale, np.nan)
+        sim = np.empty((draws, len(self.counties)))
+        done = 0
+        while done < draws:
+            b = min(BATCH, draws - done)
+            with np.errstate(invalid='ignore'):
+                # Jeffreys posteriors: Gamma(k + ½) counts, Beta(k + ½, n − k + ½) proportions
+                r = rng.gamma(np.where(fixed, 1.0, ev + 0.5), size=(b, len(rate))) * np.where(fixed, 0.0, scale)
+                pb = rng.beta(np.where(binomial, ev + 0.5, 1.0),
+                              np.where(binomial, np.maximum(n_bin - ev, 0.0) + 0.5, 1.0),
+                              size=(b, len(rate))) * 100.0
+            r = np.where(binomial, pb, r)
+            r = np.where(fixed, rate, r)
+            sim[done:done + b] = (r / sa) @ A
+            done += b
+
+        # Rank 1 = highest burden, as on the Rankings page
+        ranks = np.empty(sim.shape, dtype=np.int16)
+        ranks[np.arange(draws)[:, None], np.argsort(-sim, axis=1, kind='stable')] = np.arange(1, sim.shape[1] + 1)
+        n = len(self.counties)
+        counts = np.zeros((n, n))
+        np.add.at(counts, (np.tile(np.arange(n), draws), ranks.ravel() - 1), 1.0)
+        self.rank_probabilities = pd.DataFrame(counts / draws, index=self.counties,
+                                               columns=pd.RangeIndex(1, n + 1, name='rank'))
+        q = [alpha / 2, 0.5, 1 - alpha / 2]
+        r_lo, r_med, r_hi = np.quantile(ranks, q, axis=0, method='inverted_cdf')
+        v_lo, v_hi = np.quantile(sim, [alpha / 2, 1 - alpha / 2], axis=0)
+        point = self.ratio.rank(ascending=False, method='first').astype(int)
+        self.ranks = pd.DataFrame({
+            'ratio': self.ratio, 'ratio_lower': v_lo, 'ratio_upper': v_hi,
+            'rank': point, 'rank_lower': r_lo.astype(int), 'rank_median': r_med.astype(int),
+            'rank_upper': r_hi.astype(int),
+            'p_top': (ranks <= TOP).mean(axis=0), 'p_bottom': (ranks > n - TOP).mean(axis=0),
+            'rows': n_rows, 'median_events': pd.Series(ev).groupby(codes).median().to_numpy(),
+        }, index=self.counties).sort_values('rank')
+
+    def county(self, county):
+        """Rate intervals for one county's indicators, least precise first."""
+        out = self.intervals[self.intervals['county'] == county].drop(columns='county')
+        return out.assign(width=(out['upper'] - out['lower']) / out['rate']).sort_values('width', ascending=False)
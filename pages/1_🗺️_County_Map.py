@@ -2,17 +2,18 @@
 Page 1 — Interactive County Health Map
 """
 import streamlit as st
-import numpy as np, pandas as pd
-import plotly.express as px
+import pandas as pd
 import plotly.graph_objects as go
-from data_utils import load_data, get_counties, get_state_avgs, inject_theme_css, COORDS
+from data_utils import (current_snapshot_id, get_query_backend, get_spatial_stats, inject_theme_css, start_page,
+                        end_page, plotly_chart, choropleth_map, SPATIAL_COLORS)
 
 st.set_page_config(page_title="County Map", page_icon="🗺️", layout="wide")
 inject_theme_css()
+start_page('County Map')
 
-df_all = load_data()
-df_c   = get_counties(df_all)
-savgs  = get_state_avgs(df_all)
+snapshot_id = current_snapshot_id()
+query  = get_query_backend(snapshot_id)
+savgs  = query.state_averages()
 
 # ── Header ───────────────────────────────────────────────────────────────────
 st.markdown("""
@@ -25,46 +26,61 @@ st.markdown("""
 # ── Filters ──────────────────────────────────────────────────────────────────
 c1, c2 = st.columns(2)
 with c1:
-    topic = st.selectbox("Health Topic", sorted(df_c['health_topic'].unique()))
+    topic = st.selectbox("Health Topic", query.topics)
 with c2:
-    indicators = sorted(df_c[df_c['health_topic'] == topic]['indicator'].unique())
-    indicator = st.selectbox("Indicator", indicators)
+    indicator = st.selectbox("Indicator", query.indicators[topic])
 
 # ── Data ─────────────────────────────────────────────────────────────────────
-filt = df_c[(df_c['health_topic'] == topic) & (df_c['indicator'] == indicator)]
-mdata = (filt.groupby('county_name')
-         .agg(rate=('percent_rate', 'mean'), lat=('lat', 'first'), lon=('lon', 'first'),
-              years=('data_years', 'first'))
-         .dropna(subset=['lat', 'lon']).reset_index())
+mdata = query.indicator_counties(topic, indicator)
 
 if len(mdata) == 0:
     st.warning("No data for this selection.")
+    end_page()
     st.stop()
 
 sa = savgs.get(indicator)
 
 # ── Metrics ──────────────────────────────────────────────────────────────────
-c1, c2, c3 = st.columns(3)
+spatial = get_spatial_stats(snapshot_id)
+moran = spatial.global_.loc[indicator] if indicator in spatial.columns else None
+
+c1, c2, c3, c4 = st.columns(4)
 c1.metric("Counties with Data", len(mdata))
 if sa: c2.metric("State Average", f"{sa:.1f}")
 c3.metric("Data Period", mdata['years'].iloc[0] if len(mdata) > 0 else "—")
+if moran is not None and pd.notna(moran['moran_i']):
+    c4.metric("Moran's I", f"{moran['moran_i']:.2f}", help=f"Spatial autocorrelation across bordering counties; "
+              f"permutation p = {moran['p_sim']:.3f}. Above 0 means similar rates cluster together.")
 
 # ── Map ──────────────────────────────────────────────────────────────────────
-fig = px.scatter_mapbox(
-    mdata, lat='lat', lon='lon',
-    size='rate', color='rate',
-    hover_name='county_name',
-    hover_data={'rate': ':.1f', 'lat': False, 'lon': False},
-    color_continuous_scale=[[0, '#059669'], [0.5, '#fbbf24'], [1, '#dc2626']],
-    size_max=24, zoom=5.8, opacity=0.85,
-    mapbox_style="carto-positron",
-    center={"lat": 42.85, "lon": -75.5},
-)
+color_by = st.radio("Color by:", ["Rate", "Hot spots (Getis-Ord Gi*)", "Local Moran clusters"], horizontal=True)
+if color_by == "Rate" or moran is None:
+    fig = choropleth_map(
+        mdata, 'county_name', color='rate',
+        hover_name='county_name',
+        hover_data={'rate': ':.1f', 'county_name': False},
+        color_continuous_scale=[[0, '#059669'], [0.5, '#fbbf24'], [1, '#dc2626']],
+        zoom=5.8, opacity=0.85,
+    )
+else:
+    col = 'hotspot' if color_by.startswith("Hot") else 'cluster'
+    local = mdata[['county_name', 'rate']].join(spatial.local(indicator), on='county_name')
+    fig = choropleth_map(
+        local, 'county_name', color=col,
+        hover_name='county_name',
+        hover_data={'rate': ':.1f', 'neighbour_mean': ':.1f', 'gi_z': ':.2f', 'gi_p': ':.3f',
+                    'lisa_p': ':.3f', 'county_name': False},
+        color_discrete_map=SPATIAL_COLORS,
+        zoom=5.8, opacity=0.85,
+    )
+    st.caption("Counties significant at p ≤ 0.05 under 999 permutations of the rates among counties; "
+               "neighbours share a border.")
 fig.update_layout(
     height=500, margin=dict(l=0, r=0, t=0, b=0),
-    coloraxis_colorbar=dict(title="Rate", thickness=14, len=0.5)
+    coloraxis_colorbar=dict(title="Rate", thickness=14, len=0.5),
+    legend=dict(orientation='h', y=-0.05, xanchor='center', x=0.5, font_size=11)
 )
-st.plotly_chart(fig, use_container_width=True)
+plotly_chart(fig)
 
 # ── Bar Ranking ──────────────────────────────────────────────────────────────
 st.subheader("County Ranking")
@@ -92,9 +108,11 @@ fig.update_layout(
     plot_bgcolor='rgba(0,0,0,0)', paper_bgcolor='rgba(0,0,0,0)',
     font=dict(family='Inter')
 )
-st.plotly_chart(fig, use_container_width=True)
+plotly_chart(fig)
 
 # ── Data Table ───────────────────────────────────────────────────────────────
 with st.expander("📋 Raw Data"):
     st.dataframe(mdata[['county_name', 'rate', 'years']].sort_values('rate', ascending=False).reset_index(drop=True),
                  use_container_width=True)
+
+end_page()
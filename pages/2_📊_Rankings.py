@@ -2,18 +2,19 @@
 Page 2 — County Health Burden Rankings
 """
 import streamlit as st
-import numpy as np, pandas as pd
+import numpy as np
 import plotly.graph_objects as go
-import plotly.express as px
-from data_utils import load_data, get_counties, get_state_avgs, compute_burden, inject_theme_css, COORDS
+from data_utils import (current_snapshot_id, compute_burden, get_burden_uncertainty, get_cube,
+                        get_region_consistency, get_spatial_stats, inject_theme_css, start_page, end_page,
+                        plotly_chart, choropleth_map, SPATIAL_COLORS)
+from nyshealth.spatial import BURDEN
 
 st.set_page_config(page_title="Rankings", page_icon="📊", layout="wide")
 inject_theme_css()
+start_page('Rankings')
 
-df_all = load_data()
-df_c   = get_counties(df_all)
-savgs  = get_state_avgs(df_all)
-burden = compute_burden(df_c, savgs)
+snapshot_id = current_snapshot_id()
+burden = compute_burden(snapshot_id)
 
 # ── Header ───────────────────────────────────────────────────────────────────
 st.markdown("""
@@ -27,6 +28,20 @@ burden_df = burden.reset_index()
 burden_df.columns = ['County', 'Ratio']
 
 n_show = st.slider("Show top N:", 8, 30, 12)
+unc = None
+if st.toggle("Sampling uncertainty", help="Confidence intervals from each indicator's event count, "
+                                          "and rank intervals from simulated rankings."):
+    unc = get_burden_uncertainty(snapshot_id)
+    burden_df['Low'] = burden_df['County'].map(unc.ranks['ratio_lower'])
+    burden_df['High'] = burden_df['County'].map(unc.ranks['ratio_upper'])
+
+
+def whiskers(d):
+    if unc is None:
+        return None
+    return dict(type='data', array=d['High'] - d['Ratio'], arrayminus=d['Ratio'] - d['Low'],
+                color='rgba(55,65,81,0.6)', thickness=1.2, width=3)
+
 
 c1, c2 = st.columns(2)
 
@@ -35,6 +50,7 @@ with c1:
     top = burden_df.head(n_show).sort_values('Ratio')
     fig = go.Figure(go.Bar(
         x=top['Ratio'], y=top['County'], orientation='h',
+        error_x=whiskers(top),
         marker=dict(color=top['Ratio'],
                     colorscale=[[0, '#fca5a5'], [1, '#991b1b']], cornerradius=4),
         text=top['Ratio'].apply(lambda x: f'{x:.2f}x'),
@@ -49,13 +65,14 @@ with c1:
         plot_bgcolor='rgba(0,0,0,0)', paper_bgcolor='rgba(0,0,0,0)',
         font=dict(family='Inter')
     )
-    st.plotly_chart(fig, use_container_width=True)
+    plotly_chart(fig)
 
 with c2:
     st.subheader("🟢 Healthiest Counties")
     bot = burden_df.tail(n_show).sort_values('Ratio', ascending=False)
     fig = go.Figure(go.Bar(
         x=bot['Ratio'], y=bot['County'], orientation='h',
+        error_x=whiskers(bot),
         marker=dict(color=bot['Ratio'],
                     colorscale=[[0, '#065f46'], [1, '#a7f3d0']], cornerradius=4),
         text=bot['Ratio'].apply(lambda x: f'{x:.2f}x'),
@@ -70,29 +87,152 @@ with c2:
         plot_bgcolor='rgba(0,0,0,0)', paper_bgcolor='rgba(0,0,0,0)',
         font=dict(family='Inter')
     )
-    st.plotly_chart(fig, use_container_width=True)
+    plotly_chart(fig)
+
+if unc is not None:
+    st.caption(f"Whiskers: {1 - unc.alpha:.0%} interval of the burden ratio given each indicator's event count "
+               f"(Poisson or binomial, {unc.draws:,} simulated draws).")
+
+    # Rank uncertainty
+    st.subheader("How Certain Is Each Rank?")
+    rk = unc.ranks.rename_axis('County').reset_index()
+    fig = go.Figure(go.Scatter(
+        x=rk['County'], y=rk['rank'], mode='markers',
+        error_y=dict(type='data', array=rk['rank_upper'] - rk['rank'], arrayminus=rk['rank'] - rk['rank_lower'],
+                     color='rgba(59,130,246,0.55)', thickness=1.5, width=2),
+        marker=dict(size=7, color=rk['ratio'], colorscale=[[0, '#059669'], [0.45, '#fbbf24'], [1, '#dc2626']]),
+        customdata=rk[['rank_lower', 'rank_upper', 'p_top', 'p_bottom']],
+        hovertemplate=('%{x}: rank %{y} (%{customdata[0]}–%{customdata[1]})<br>'
+                       'P(top 10) %{customdata[2]:.0%} · P(bottom 10) %{customdata[3]:.0%}<extra></extra>')
+    ))
+    fig.update_layout(
+        height=420, margin=dict(l=0, r=0, t=10, b=0),
+        xaxis=dict(showgrid=False, tickangle=-60, tickfont=dict(size=9)),
+        yaxis=dict(title='Burden rank (1 = highest)', autorange='reversed', gridcolor='rgba(0,0,0,0.06)'),
+        plot_bgcolor='rgba(0,0,0,0)', paper_bgcolor='rgba(0,0,0,0)',
+        font=dict(family='Inter')
+    )
+    plotly_chart(fig)
+
+    c1, c2 = st.columns([3, 2])
+    with c1:
+        wide = rk.assign(span=rk['rank_upper'] - rk['rank_lower']).sort_values('span', ascending=False).head(10)
+        st.dataframe(wide[['County', 'rank', 'rank_lower', 'rank_upper', 'p_top', 'p_bottom', 'median_events']],
+                     use_container_width=True, hide_index=True,
+                     column_config={'rank': 'Rank', 'rank_lower': 'From', 'rank_upper': 'To',
+                                    'p_top': st.column_config.ProgressColumn('P(top 10)', format='%.2f',
+                                                                            min_value=0, max_value=1),
+                                    'p_bottom': st.column_config.ProgressColumn('P(bottom 10)', format='%.2f',
+                                                                               min_value=0, max_value=1),
+                                    'median_events': st.column_config.NumberColumn('Median events', format='%.0f')})
+        st.caption(f"Least certain ranks: {1 - unc.alpha:.0%} of simulated rankings fall between From and To.")
+    with c2:
+        county = st.selectbox("Indicator intervals for", list(unc.ranks.index), index=len(unc.ranks) - 1)
+        civ = unc.county(county)
+        st.dataframe(civ[['indicator', 'rate', 'lower', 'upper', 'events']].head(15),
+                     use_container_width=True, hide_index=True,
+                     column_config={c: st.column_config.NumberColumn(format='%.1f') for c in ('rate', 'lower', 'upper')}
+                     | {'events': st.column_config.NumberColumn('Events', format='%.0f')})
+        st.caption("Widest relative intervals first: the indicators resting on the fewest events.")
 
 # ── Map ──────────────────────────────────────────────────────────────────────
 st.subheader("Geographic View")
 
 bmap = burden_df.copy()
-bmap['lat'] = bmap['County'].map(lambda x: COORDS.get(x, (np.nan, np.nan))[0])
-bmap['lon'] = bmap['County'].map(lambda x: COORDS.get(x, (np.nan, np.nan))[1])
-bmap['Status'] = bmap['Ratio'].apply(lambda x: 'Above Avg' if x > 1 else 'Below Avg')
-bmap = bmap.dropna(subset=['lat', 'lon'])
-
-fig = px.scatter_mapbox(
-    bmap, lat='lat', lon='lon',
-    size='Ratio', color='Ratio',
+bmap['Status'] = np.where(bmap['Ratio'] > 1, 'Above Avg', 'Below Avg')
+
+fig = choropleth_map(
+    bmap, 'County', color='Ratio',
     hover_name='County',
-    hover_data={'Ratio': ':.2f', 'Status': True, 'lat': False, 'lon': False},
+    hover_data={'Ratio': ':.2f', 'Status': True, 'County': False},
     color_continuous_scale=[[0, '#059669'], [0.45, '#fbbf24'], [1, '#dc2626']],
-    size_max=22, zoom=5.5, opacity=0.85,
-    mapbox_style="carto-positron",
-    center={"lat": 42.85, "lon": -75.5},
+    zoom=5.5, opacity=0.85,
 )
 fig.update_layout(
     height=480, margin=dict(l=0, r=0, t=0, b=0),
     coloraxis_colorbar=dict(title="Ratio", thickness=14, len=0.5)
 )
-st.plotly_chart(fig, use_container_width=True)
+plotly_chart(fig)
+
+# ── Spatial Clustering ───────────────────────────────────────────────────────
+st.subheader("Do High-Burden Counties Cluster?")
+spatial = get_spatial_stats(snapshot_id)
+g = spatial.global_
+moran = g.loc[BURDEN]
+
+c1, c2 = st.columns([1, 2])
+with c1:
+    st.metric("Moran's I (burden)", f"{moran['moran_i']:.2f}",
+              help="Spatial autocorrelation of the burden ratio across bordering counties; 0 means no pattern.")
+    st.metric("Permutation p-value", f"{moran['p_sim']:.3f}")
+    sig = g.drop(BURDEN)
+    sig = sig[sig['p_sim'] <= 0.05]
+    st.caption(f"{(sig['moran_i'] > 0).sum()} of {len(g) - 1} indicators cluster significantly "
+               f"(p ≤ 0.05, {spatial.permutations} permutations).")
+    st.dataframe(sig.sort_values('moran_i', ascending=False).head(10)[['moran_i', 'p_sim']]
+                 .rename_axis('Most clustered indicators'),
+                 use_container_width=True,
+                 column_config={'moran_i': st.column_config.NumberColumn("Moran's I", format='%.2f'),
+                                'p_sim': st.column_config.NumberColumn('p', format='%.3f')})
+with c2:
+    local = spatial.local(BURDEN).rename_axis('County').reset_index()
+    fig = choropleth_map(
+        local, 'County', color='hotspot',
+        hover_name='County',
+        hover_data={'value': ':.2f', 'neighbour_mean': ':.2f', 'gi_z': ':.2f', 'gi_p': ':.3f', 'County': False},
+        color_discrete_map=SPATIAL_COLORS,
+        zoom=5.5, opacity=0.85,
+        labels={'hotspot': 'Getis-Ord Gi*', 'value': 'Ratio', 'neighbour_mean': 'Neighbour mean'},
+    )
+    fig.update_layout(
+        height=420, margin=dict(l=0, r=0, t=0, b=0),
+        legend=dict(orientation='h', y=-0.05, xanchor='center', x=0.5, font_size=11)
+    )
+    plotly_chart(fig)
+
+# ── Regions ──────────────────────────────────────────────────────────────────
+st.subheader("Region Comparison")
+cube = get_cube(snapshot_id)
+topic = st.selectbox("Health Topic", cube.topics, format_func=lambda t: t.replace(' Indicators', ''))
+
+reg = cube.rollup('region', 'topic').loc[topic].reset_index()
+reg['region'] = reg['region'].astype(str)
+reg = reg.sort_values('mean')
+
+fig = go.Figure(go.Bar(
+    x=reg['mean'], y=reg['region'], orientation='h',
+    marker=dict(color=reg['mean'], colorscale=[[0, '#bfdbfe'], [0.5, '#3b82f6'], [1, '#1e3a8a']],
+                cornerradius=4),
+    text=reg['mean'].apply(lambda x: f'{x:.1f}'),
+    textposition='outside', textfont=dict(size=10),
+    customdata=reg[['records']], hovertemplate='%{y}: %{x:.1f} (%{customdata[0]} county records)<extra></extra>'
+))
+fig.update_layout(
+    height=max(300, len(reg) * 32),
+    margin=dict(l=0, r=50, t=10, b=0),
+    xaxis=dict(showgrid=False, title='Mean county rate'),
+    yaxis=dict(showgrid=False),
+    plot_bgcolor='rgba(0,0,0,0)', paper_bgcolor='rgba(0,0,0,0)',
+    font=dict(family='Inter')
+)
+plotly_chart(fig)
+
+with st.expander("DOH-reported region rows vs. county rollups"):
+    check = get_region_consistency(snapshot_id)
+    check = check[check['topic'] == topic]
+    if check.empty:
+        st.caption("No region rows reported for this topic.")
+    else:
+        summary = (check.groupby('geo')
+                   .agg(indicators=('indicator', 'size'), consistent=('consistent', lambda c: 100 * c.mean()),
+                        median_rel_err=('rate_rel_err', lambda e: e.abs().median()),
+                        coverage=('coverage', 'mean'))
+                   .reset_index().rename(columns={'geo': 'Region'}))
+        st.dataframe(summary, use_container_width=True, hide_index=True,
+                     column_config={'consistent': st.column_config.ProgressColumn('Within 5%', format='%.0f%%',
+                                                                                  min_value=0, max_value=100),
+                                    'median_rel_err': st.column_config.NumberColumn('Median |rel. error|', format='%.3f'),
+                                    'coverage': st.column_config.NumberColumn('County coverage', format='%.2f')})
+        st.caption("Rollups pool county events over denominators, scaled by each indicator's rate multiplier.")
+
+end_page()
@@ -2,16 +2,17 @@
 Page 3 — County Deep Dive
 """
 import streamlit as st
-import numpy as np, pandas as pd
 import plotly.graph_objects as go
-from data_utils import load_data, get_counties, get_state_avgs, inject_theme_css
+from data_utils import (current_snapshot_id, get_burden_engine, get_peer_index, inject_theme_css, start_page,
+                        end_page, plotly_chart)
+from nyshealth.peers import METRICS
 
 st.set_page_config(page_title="County Dive", page_icon="🔍", layout="wide")
 inject_theme_css()
+start_page('County Dive')
 
-df_all = load_data()
-df_c   = get_counties(df_all)
-savgs  = get_state_avgs(df_all)
+snapshot_id = current_snapshot_id()
+engine = get_burden_engine(snapshot_id)
 
 # ── Header ───────────────────────────────────────────────────────────────────
 st.markdown("""
@@ -21,30 +22,17 @@ st.markdown("""
 </div>
 """, unsafe_allow_html=True)
 
-county = st.selectbox("Choose a County", sorted(df_c['county_name'].unique()))
-
-cd = df_c[df_c['county_name'] == county]
-comps = []
-for _, r in cd.iterrows():
-    sa = savgs.get(r.get('indicator'))
-    cr = r.get('percent_rate')
-    if pd.notna(cr) and pd.notna(sa) and sa != 0:
-        comps.append({
-            'topic': r['health_topic'],
-            'indicator': r['indicator'],
-            'county_rate': cr,
-            'state_rate': sa,
-            'ratio': cr / sa
-        })
-
-if not comps:
+county = st.selectbox("Choose a County", sorted(engine.counties))
+
+df_comp = engine.county_profile(county)
+
+if df_comp.empty:
     st.warning("No comparison data available.")
+    end_page()
     st.stop()
 
-df_comp = pd.DataFrame(comps)
-
 # ── Summary Metrics ──────────────────────────────────────────────────────────
-overall = df_comp['ratio'].mean()
+overall = engine.overall()[county]
 above = (df_comp['ratio'] > 1.0).sum()
 below = (df_comp['ratio'] <= 1.0).sum()
 
@@ -57,7 +45,7 @@ c3.metric("Indicators Below State", f"{below}")
 # ── Topic Ratio Bar ──────────────────────────────────────────────────────────
 st.subheader(f"{county} — Disparity by Health Topic")
 
-topic_avg = (df_comp.groupby('topic')['ratio'].mean()
+topic_avg = (engine.by_topic().loc[county].dropna()
              .sort_values(ascending=True).reset_index())
 topic_avg.columns = ['Topic', 'Ratio']
 topic_avg['Short'] = topic_avg['Topic'].str.replace(' Indicators', '').str[:30]
@@ -80,7 +68,7 @@ fig.update_layout(
     plot_bgcolor='rgba(0,0,0,0)', paper_bgcolor='rgba(0,0,0,0)',
     font=dict(family='Inter')
 )
-st.plotly_chart(fig, use_container_width=True)
+plotly_chart(fig)
 
 # ── Top / Bottom Indicators ─────────────────────────────────────────────────
 c1, c2 = st.columns(2)
@@ -97,7 +85,55 @@ with c2:
     for _, r in best.iterrows():
         st.markdown(f"🟢 **{r['ratio']:.2f}x** — {r['indicator'][:55]}")
 
+# ── Peer Counties ────────────────────────────────────────────────────────────
+st.subheader(f"Counties Most Like {county}")
+peers_idx = get_peer_index(snapshot_id)
+
+if county not in peers_idx.counties:
+    st.caption(f"{county} reports too few indicators to be compared.")
+else:
+    c1, c2, c3 = st.columns([1, 3, 1])
+    metric = c1.radio("Distance", METRICS, format_func=str.title, horizontal=True)
+    topics = c2.multiselect("Compare on topics", peers_idx.topics, placeholder="All topics",
+                            format_func=lambda t: t.replace(' Indicators', ''))
+    n_peers = c3.slider("Peers", 3, 10, 5)
+    peers = peers_idx.peers(county, n_peers, metric, topics)
+
+    if peers.empty:
+        st.caption("No county shares enough indicators on these topics.")
+    else:
+        c1, c2 = st.columns([2, 3])
+        with c1:
+            peers['ratio'] = engine.overall().reindex(peers['county']).to_numpy()
+            st.dataframe(peers, use_container_width=True, hide_index=True,
+                         column_config={'county': 'County',
+                                        'distance': st.column_config.NumberColumn('Distance', format='%.2f'),
+                                        'shared': st.column_config.NumberColumn('Shared indicators'),
+                                        'ratio': st.column_config.NumberColumn('Overall ratio', format='%.2fx')})
+            st.caption("Distances use only indicators both counties report, on standardized rates.")
+        with c2:
+            peer = st.selectbox("Where they diverge", peers['county'])
+            gap = peers_idx.divergence(county, peer, topics).head(10).iloc[::-1]
+            fig = go.Figure([
+                go.Bar(name=county, y=gap['indicator'].str[:45], x=gap['county_z'], orientation='h',
+                       marker=dict(color='#14b8a6', cornerradius=3)),
+                go.Bar(name=peer, y=gap['indicator'].str[:45], x=gap['peer_z'], orientation='h',
+                       marker=dict(color='#94a3b8', cornerradius=3)),
+            ])
+            fig.update_layout(
+                barmode='group', height=max(300, len(gap) * 40),
+                margin=dict(l=0, r=10, t=10, b=0),
+                xaxis=dict(showgrid=False, title='Standardized rate (z)'),
+                yaxis=dict(showgrid=False),
+                legend=dict(orientation='h', y=1.08, x=0),
+                plot_bgcolor='rgba(0,0,0,0)', paper_bgcolor='rgba(0,0,0,0)',
+                font=dict(family='Inter')
+            )
+            plotly_chart(fig)
+
 # ── Full Table ───────────────────────────────────────────────────────────────
 with st.expander("📋 All Indicators"):
     st.dataframe(df_comp.sort_values('ratio', ascending=False).reset_index(drop=True),
                  use_container_width=True)
+
+end_page()
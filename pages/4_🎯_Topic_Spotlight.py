@@ -2,16 +2,17 @@
 Page 4 — Health Topic Spotlight
 """
 import streamlit as st
-import numpy as np, pandas as pd
 import plotly.graph_objects as go
 import plotly.express as px
-from data_utils import load_data, get_counties, inject_theme_css
+from data_utils import (current_snapshot_id, get_query_backend, get_topic_correlations, get_correlation_engine,
+                        inject_theme_css, start_page, end_page, plotly_chart)
 
 st.set_page_config(page_title="Topic Spotlight", page_icon="🎯", layout="wide")
 inject_theme_css()
+start_page('Topic Spotlight')
 
-df_all = load_data()
-df_c   = get_counties(df_all)
+snapshot_id = current_snapshot_id()
+query = get_query_backend(snapshot_id)
 
 # ── Header ───────────────────────────────────────────────────────────────────
 st.markdown("""
@@ -24,11 +25,10 @@ st.markdown("""
 tab1, tab2 = st.tabs(["Topic Explorer", "Cross-Topic Correlations"])
 
 with tab1:
-    topic = st.selectbox("Choose Topic", sorted(df_c['health_topic'].unique()))
+    topic = st.selectbox("Choose Topic", query.topics)
 
-    filt = df_c[df_c['health_topic'] == topic]
-    county_avg = (filt.groupby('county_name')['percent_rate']
-                  .mean().sort_values(ascending=False).head(15).reset_index())
+    county_avg = (query.topic_counties(topic)
+                  .sort_values(ascending=False).head(15).reset_index())
     county_avg.columns = ['County', 'Rate']
 
     st.subheader(f"Top 15 Counties — {topic.replace(' Indicators', '')}")
@@ -51,16 +51,15 @@ with tab1:
         plot_bgcolor='rgba(0,0,0,0)', paper_bgcolor='rgba(0,0,0,0)',
         font=dict(family='Inter')
     )
-    st.plotly_chart(fig, use_container_width=True)
+    plotly_chart(fig)
 
     # Indicator breakdown
     st.subheader("Indicators in This Topic")
-    inds = sorted(filt['indicator'].unique())
+    inds = query.indicators[topic]
     st.caption(f"{len(inds)} indicators available")
 
     pick_ind = st.selectbox("Explore indicator:", inds)
-    ind_data = filt[filt['indicator'] == pick_ind]
-    ind_avg = (ind_data.groupby('county_name')['percent_rate'].mean()
+    ind_avg = (query.indicator_counties(topic, pick_ind).set_index('county_name')['rate']
                .sort_values(ascending=False).head(20).reset_index())
     ind_avg.columns = ['County', 'Rate']
 
@@ -80,18 +79,16 @@ with tab1:
         plot_bgcolor='rgba(0,0,0,0)', paper_bgcolor='rgba(0,0,0,0)',
         font=dict(family='Inter')
     )
-    st.plotly_chart(fig, use_container_width=True)
+    plotly_chart(fig)
 
 
 with tab2:
     st.subheader("Which Health Topics Co-Occur?")
     st.caption("Positive correlation = topics tend to be high or low in the same counties")
 
-    pivot = df_c.pivot_table(index='county_name', columns='health_topic',
-                             values='percent_rate', aggfunc='mean').dropna(thresh=5)
+    corr = get_topic_correlations(snapshot_id)
 
-    if len(pivot) > 10:
-        corr = pivot.corr()
+    if corr is not None:
         labels = [c.replace(' Indicators', '').replace(' and ', ' & ')[:25] for c in corr.columns]
 
         fig = px.imshow(
@@ -105,6 +102,47 @@ with tab2:
             font=dict(family='Inter', size=9),
             plot_bgcolor='rgba(0,0,0,0)', paper_bgcolor='rgba(0,0,0,0)',
         )
-        st.plotly_chart(fig, use_container_width=True)
+        plotly_chart(fig)
 
         st.info("**Example:** If Obesity and Diabetes are positively correlated (red), counties with high obesity also tend to have high diabetes — they share underlying risk factors.")
+
+    # ── Indicator drill-down ─────────────────────────────────────────────────
+    st.subheader("Drill Down to Indicators")
+    short = lambda t: t.replace(' Indicators', '')
+    d1, d2 = st.columns(2)
+    row_topic = d1.selectbox("Topic", query.topics, format_func=short, key='corr_row')
+    col_topic = d2.selectbox("Against topic", query.topics, format_func=short, key='corr_col',
+                             index=query.topics.index(row_topic))
+    o1, o2, o3 = st.columns(3)
+    method = o1.radio("Method", ["pearson", "spearman"], horizontal=True, format_func=str.title)
+    min_n = o2.slider("Min. counties per pair", 5, 60, 10)
+    alpha = 0.05 if o3.checkbox("Only p < 0.05", value=False) else None
+
+    engine = get_correlation_engine(snapshot_id, method)
+    block = engine.matrix(row_topic, col_topic, alpha=alpha, min_n=min_n)
+
+    if block.size == 0:
+        st.warning("No indicators with enough county data for this pair of topics.")
+    else:
+        fig = px.imshow(
+            block.values, x=[c[:40] for c in block.columns], y=[c[:40] for c in block.index],
+            color_continuous_scale='RdBu_r', zmin=-1, zmax=1,
+        )
+        fig.update_layout(
+            height=max(360, min(900, 22 * len(block) + 120)),
+            margin=dict(l=0, r=0, t=10, b=0),
+            font=dict(family='Inter', size=9),
+            plot_bgcolor='rgba(0,0,0,0)', paper_bgcolor='rgba(0,0,0,0)',
+        )
+        plotly_chart(fig)
+        st.caption("Blank cells: fewer counties than the minimum"
+                   + (" or not significant at p < 0.05" if alpha else ""))
+
+    st.markdown("**Strongest indicator pairs involving this topic**")
+    top = engine.top_pairs(15, topic=row_topic, alpha=alpha, min_n=min_n)
+    st.dataframe(top.assign(topic_a=top['topic_a'].map(short), topic_b=top['topic_b'].map(short)),
+                 use_container_width=True, hide_index=True,
+                 column_config={'r': st.column_config.NumberColumn(format='%.2f'),
+                                'p': st.column_config.NumberColumn(format='%.1e')})
+
+end_page()
@@ -2,78 +2,18 @@
 Page 5 — ML Health Clusters
 """
 import streamlit as st
-import numpy as np, pandas as pd
 import plotly.express as px
-from sklearn.preprocessing import StandardScaler
-from sklearn.decomposition import PCA
-from sklearn.cluster import KMeans
-from sklearn.metrics import silhouette_score
-from data_utils import load_data, get_counties, inject_theme_css, COORDS, CLUSTER_COLORS
+from data_utils import (current_snapshot_id, get_cluster_stability, get_feature_matrix, run_clustering,
+                        silhouette_range,
+                        inject_theme_css, start_page, end_page, plotly_chart, choropleth_map, CLUSTER_COLORS)
+from nyshealth.features import IMPUTERS
+from nyshealth.stability import UNSTABLE
 
 st.set_page_config(page_title="ML Clusters", page_icon="🧠", layout="wide")
 inject_theme_css()
+start_page('ML Clusters')
 
-df_all = load_data()
-df_c   = get_counties(df_all)
-
-
-@st.cache_data
-def run_clustering(k):
-    pivot = df_c.pivot_table(index='county_name', columns='indicator',
-                             values='percent_rate', aggfunc='mean')
-    pivot = pivot.dropna(axis=1, thresh=int(len(pivot) * 0.6))
-    pivot = pivot.dropna(axis=0, thresh=int(len(pivot.columns) * 0.6))
-    pivot = pivot.fillna(pivot.median())
-
-    X = StandardScaler().fit_transform(pivot.values)
-    pca = PCA(n_components=2)
-    X2 = pca.fit_transform(X)
-    km = KMeans(n_clusters=k, random_state=42, n_init=10)
-    labels = km.fit_predict(X)
-    sil = silhouette_score(X, labels)
-
-    result = pd.DataFrame({
-        'county': pivot.index,
-        'pc1': X2[:, 0], 'pc2': X2[:, 1],
-        'cluster': [f'Cluster {l + 1}' for l in labels]
-    })
-    result['lat'] = result['county'].map(lambda x: COORDS.get(x, (np.nan, np.nan))[0])
-    result['lon'] = result['county'].map(lambda x: COORDS.get(x, (np.nan, np.nan))[1])
-
-    # Cluster profiles
-    profile_data = pivot.copy()
-    profile_data['_cluster'] = labels
-    profiles = {}
-    overall_mean = pivot.mean()
-    overall_std = pivot.std()
-    for c_idx in range(k):
-        members = pivot.index[labels == c_idx].tolist()
-        cluster_mean = pivot.loc[members].mean()
-        z = (cluster_mean - overall_mean) / overall_std
-        profiles[f'Cluster {c_idx + 1}'] = {
-            'members': sorted(members),
-            'concerns': z.nlargest(5).to_dict(),
-            'strengths': z.nsmallest(5).to_dict(),
-        }
-
-    return result.dropna(subset=['lat', 'lon']), sil, pca.explained_variance_ratio_[:2], profiles
-
-
-@st.cache_data
-def silhouette_range():
-    pivot = df_c.pivot_table(index='county_name', columns='indicator',
-                             values='percent_rate', aggfunc='mean')
-    pivot = pivot.dropna(axis=1, thresh=int(len(pivot) * 0.6))
-    pivot = pivot.dropna(axis=0, thresh=int(len(pivot.columns) * 0.6))
-    pivot = pivot.fillna(pivot.median())
-    X = StandardScaler().fit_transform(pivot.values)
-    scores = []
-    for k in range(2, 8):
-        km = KMeans(n_clusters=k, random_state=42, n_init=10)
-        lbl = km.fit_predict(X)
-        scores.append({'K': k, 'Score': silhouette_score(X, lbl)})
-    return pd.DataFrame(scores)
-
+snapshot_id = current_snapshot_id()
 
 # ── Header ───────────────────────────────────────────────────────────────────
 st.markdown("""
@@ -84,7 +24,14 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 k = st.slider("Number of Clusters (K)", 2, 5, 2)
-cdf, sil, var, profiles = run_clustering(k)
+with st.expander("⚙️ Feature Matrix"):
+    f1, f2 = st.columns(2)
+    thresh = f1.slider("Min. coverage per indicator / county", 0.3, 0.9, 0.6, 0.05)
+    impute = f2.selectbox("Impute missing values with", IMPUTERS)
+    fm = get_feature_matrix(snapshot_id, thresh, impute)
+    st.caption("{counties} counties × {indicators} indicators · {dropped_indicators} sparse indicators "
+               "and {dropped_counties} counties dropped · {imputed_cells:,} cells imputed".format(**fm.summary()))
+cdf, sil, var, profiles = run_clustering(snapshot_id, k, thresh, impute)
 
 c1, c2 = st.columns(2)
 c1.metric("Silhouette Score", f"{sil:.4f}")
@@ -95,19 +42,17 @@ c1, c2 = st.columns(2)
 
 with c1:
     st.subheader("Geographic Distribution")
-    fig = px.scatter_mapbox(
-        cdf, lat='lat', lon='lon',
-        color='cluster', hover_name='county',
+    fig = choropleth_map(
+        cdf, 'county', color='cluster', hover_name='county',
+        hover_data={'county': False},
         color_discrete_sequence=CLUSTER_COLORS[:k],
-        zoom=5.5, mapbox_style="carto-positron",
-        center={"lat": 42.85, "lon": -75.5},
+        zoom=5.5, opacity=0.85,
     )
-    fig.update_traces(marker=dict(size=13, opacity=0.9))
     fig.update_layout(
         height=440, margin=dict(l=0, r=0, t=0, b=0),
         legend=dict(orientation='h', y=-0.05, xanchor='center', x=0.5, font_size=11)
     )
-    st.plotly_chart(fig, use_container_width=True)
+    plotly_chart(fig)
 
 with c2:
     st.subheader("PCA Projection")
@@ -124,7 +69,7 @@ with c2:
         legend=dict(orientation='h', y=-0.1, xanchor='center', x=0.5, font_size=11),
         font=dict(family='Inter')
     )
-    st.plotly_chart(fig, use_container_width=True)
+    plotly_chart(fig)
 
 # ── Cluster Profiles ─────────────────────────────────────────────────────────
 st.subheader("Cluster Profiles")
@@ -141,18 +86,73 @@ for name, info in profiles.items():
             for ind, sc in info['strengths'].items():
                 st.markdown(f"- ↓ **{sc:.2f}σ** — {ind[:50]}")
 
+# ── Stability ────────────────────────────────────────────────────────────────
+st.subheader("Is This Clustering Stable?")
+if st.toggle("Stability analysis", help="Re-cluster bootstrap resamples of counties and indicators "
+                                        "and measure how often each county keeps its cluster-mates."):
+    stab = get_cluster_stability(snapshot_id, k, thresh, impute)
+    info = stab.summary()
+    c1, c2, c3 = st.columns(3)
+    c1.metric("Mean ARI vs. this clustering", f"{info['ari_mean']:.2f}",
+              help="Adjusted Rand index of each resample's clustering against the one above; 1 = identical.")
+    c2.metric("Mean county stability", f"{info['stability']:.0%}")
+    c3.metric(f"Counties below {UNSTABLE:.0%}", info['unstable'])
+
+    c1, c2 = st.columns(2)
+    with c1:
+        order = stab.order()
+        fig = px.imshow(stab.consensus.loc[order, order], zmin=0, zmax=1,
+                        color_continuous_scale=[[0, '#f8fafc'], [1, '#0f766e']],
+                        labels={'color': 'Co-assigned'})
+        fig.update_layout(
+            height=440, margin=dict(l=0, r=0, t=10, b=0),
+            xaxis=dict(showticklabels=False, title=None), yaxis=dict(tickfont=dict(size=8), title=None),
+            coloraxis_colorbar=dict(thickness=12, len=0.5), font=dict(family='Inter')
+        )
+        plotly_chart(fig)
+        st.caption(f"Share of {stab.resamples} bootstrap resamples in which two counties drawn together "
+                   "landed in the same cluster, ordered by cluster.")
+    with c2:
+        sc = stab.county.rename_axis('county').reset_index()
+        fig = choropleth_map(
+            sc, 'county', color='stability', hover_name='county',
+            hover_data={'cluster': True, 'stability': ':.0%', 'county': False},
+            color_continuous_scale=[[0, '#dc2626'], [0.5, '#fbbf24'], [1, '#059669']], range_color=(0, 1),
+            zoom=5.5, opacity=0.85,
+        )
+        fig.update_layout(
+            height=440, margin=dict(l=0, r=0, t=0, b=0),
+            coloraxis_colorbar=dict(title="Stability", thickness=12, len=0.5, tickformat='.0%')
+        )
+        plotly_chart(fig)
+    st.dataframe(sc.sort_values('stability').head(10)[['county', 'cluster', 'stability', 'outside']],
+                 use_container_width=True, hide_index=True,
+                 column_config={'stability': st.column_config.ProgressColumn('With own cluster', format='%.2f',
+                                                                             min_value=0, max_value=1),
+                                'outside': st.column_config.NumberColumn('With other clusters', format='%.2f')})
+
 # ── Silhouette Chart ─────────────────────────────────────────────────────────
 st.subheader("Optimal K Analysis")
-sil_df = silhouette_range()
-fig = px.line(sil_df, x='K', y='Score', markers=True,
-              color_discrete_sequence=['#14b8a6'])
-fig.update_traces(marker=dict(size=10), line=dict(width=3))
-fig.update_layout(
-    height=300,
-    margin=dict(l=0, r=0, t=10, b=0),
-    xaxis=dict(title='Number of Clusters (K)', dtick=1),
-    yaxis=dict(title='Silhouette Score', showgrid=True, gridcolor='rgba(128,128,128,0.1)'),
-    plot_bgcolor='rgba(0,0,0,0)', paper_bgcolor='rgba(0,0,0,0)',
-    font=dict(family='Inter')
-)
-st.plotly_chart(fig, use_container_width=True)
+wide = st.checkbox("Extended range (K = 2–15)")
+sil_df = silhouette_range(snapshot_id, thresh, impute, 15 if wide else 7)
+
+metrics = [('Silhouette', 'Silhouette Score (higher is better)'),
+           ('Inertia', 'Inertia — look for the elbow'),
+           ('Calinski-Harabasz', 'Calinski-Harabasz (higher is better)'),
+           ('Davies-Bouldin', 'Davies-Bouldin (lower is better)')]
+for tab, (col, title) in zip(st.tabs([m for m, _ in metrics]), metrics):
+    with tab:
+        fig = px.line(sil_df, x='K', y=col, markers=True,
+                      color_discrete_sequence=['#14b8a6'])
+        fig.update_traces(marker=dict(size=10), line=dict(width=3))
+        fig.update_layout(
+            height=300,
+            margin=dict(l=0, r=0, t=10, b=0),
+            xaxis=dict(title='Number of Clusters (K)', dtick=1),
+            yaxis=dict(title=title, showgrid=True, gridcolor='rgba(128,128,128,0.1)'),
+            plot_bgcolor='rgba(0,0,0,0)', paper_bgcolor='rgba(0,0,0,0)',
+            font=dict(family='Inter')
+        )
+        plotly_chart(fig)
+
+end_page()
@@ -0,0 +1,36 @@
+import numpy as np, pandas as pd
+
+from nyshealth.compact import expand_frame
+from nyshealth.cube import UNKNOWN, RollupCube
+from nyshealth.data import county_pivot, county_rows
+from nyshealth.synthetic import synthetic_chirs
+
+
+def _frame():
+    """Synthetic rows plus one county row without data_years and one county with no region."""
+    df = expand_frame(synthetic_chirs(4000))
+    rows = county_rows(df).index
+    df.loc[rows[0], 'data_years'] = np.nan
+    df.loc[rows[1], 'county_name'] = 'Nowhere'
+    return df
+
+
+def test_rollups_keep_rows_without_period_or_region():
+    df = _frame()
+    dfc = county_rows(df)
+    cube = RollupCube(df)
+
+    assert cube.rollup('state', None)['records'].iloc[0] == len(dfc)
+    assert cube.rollup('state', None, by_period=True)['records'].sum() == len(dfc)
+    assert cube.totals() == {'counties': dfc['county_name'].nunique(), 'topics': dfc['health_topic'].nunique(),
+                             'indicators': dfc['indicator'].nunique(), 'records': len(dfc)}
+    expected = dfc.groupby('health_topic').size()
+    pd.testing.assert_series_equal(cube.topic_counts().sort_index(), expected.rename('records').sort_index(),
+                                   check_names=False, check_index_type=False, check_dtype=False)
+    pd.testing.assert_frame_equal(cube.county_pivot(), county_pivot(dfc), check_dtype=False,
+                                  check_index_type=False, check_column_type=False)
+
+
+def test_unmapped_county_is_not_a_region():
+    regions = RollupCube(_frame()).rollup('region', 'topic').index.get_level_values('region')
+    assert UNKNOWN not in set(regions.astype(str))
@@ -0,0 +1,49 @@
+import pandas as pd
+
+from nyshealth.delta import refresh
+from nyshealth.snapshot import SnapshotStore, prepare_frame
+
+
+class _Client:
+    def __init__(self, records):
+        self.records = records
+        self.calls = []
+
+    def fetch_all(self, select=None, where=None):
+        self.calls.append(where)
+        return self.records
+
+
+def _row(county, indicator, years, rate):
+    return {'county_name': county, 'health_topic': 'Cancer Indicators', 'indicator': indicator,
+            'data_years': years, 'percent_rate': rate}
+
+
+def test_refresh_replaces_only_changed_keys(tmp_path):
+    base = pd.DataFrame([_row('Albany', 'A', '2019-2021', 1.0),
+                         _row('Albany', 'A', '2019-2021', 2.0),     # duplicate key the delta leaves alone
+                         _row('Bronx', 'B', '2019-2021', 3.0),
+                         _row('Bronx', 'B', '2019-2021', 4.0),      # duplicate key the delta replaces
+                         _row('Kings', 'C', '2019-2021', 5.0)])
+    store = SnapshotStore(str(tmp_path))
+    store.commit(prepare_frame(base), 'api', updated_at='2024-01-01T00:00:00.000')
+
+    delta = [{**_row('Bronx', 'B', '2019-2021', '9.5'), ':id': 'row-1', ':updated_at': '2024-02-01T00:00:00.000'},
+             {**_row('Erie', 'D', '2019-2021', '7.0'), ':id': 'row-2', ':updated_at': '2024-02-02T00:00:00.000'}]
+    client = _Client(delta)
+    sid = refresh(store, client)
+
+    assert client.calls == [":updated_at > '2024-01-01T00:00:00.000'"]
+    assert store.current_id() == sid
+    assert store.current_info()['updated_at'] == '2024-02-02T00:00:00.000'
+    out = store.read()
+    rates = out.groupby('county_name', observed=True)['percent_rate'].apply(sorted).to_dict()
+    assert rates == {'Albany': [1.0, 2.0], 'Bronx': [9.5], 'Erie': [7.0], 'Kings': [5.0]}
+
+
+def test_refresh_without_changes_keeps_current(tmp_path):
+    store = SnapshotStore(str(tmp_path))
+    sid = store.commit(prepare_frame(pd.DataFrame([_row('Albany', 'A', '2019-2021', 1.0)])), 'api',
+                       updated_at='2024-01-01T00:00:00.000')
+    assert refresh(store, _Client([])) is None
+    assert store.current_id() == sid
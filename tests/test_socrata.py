@@ -0,0 +1,91 @@
+import gzip, json, threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlsplit
+
+import pytest, requests
+
+from nyshealth.socrata import SocrataClient
+
+ROWS = [{':id': f'row-{i:04d}', ':updated_at': f'2024-01-{1 + i % 28:02d}T00:00:00.000',
+         'county_name': f'County {i % 7}', 'percent_rate': str(i)} for i in range(53)]
+
+
+class _StandIn(BaseHTTPRequestHandler):
+    """Minimal SODA endpoint: count(*), $where on :updated_at, $order/$limit/$offset, $select."""
+    failures = {}                           # $offset (or 'count') -> 503s still to send
+    seen = []
+
+    def do_GET(self):
+        q = dict(parse_qsl(urlsplit(self.path).query))
+        kind = 'count' if q.get('$select') == 'count(*)' else q.get('$offset', '0')
+        self.seen.append(kind)
+        if self.failures.get(kind, 0) > 0:
+            self.failures[kind] -= 1
+            return self._send(503, b'')
+        rows = ROWS
+        if '$where' in q:
+            mark = q['$where'].split("'")[1]
+            rows = [r for r in rows if r[':updated_at'] > mark]
+        if q.get('$select') == 'count(*)':
+            out = [{'count': str(len(rows))}]
+        else:
+            rows = sorted(rows, key=lambda r: r[q.get('$order', ':id')])
+            offset = int(q.get('$offset', 0))
+            cols = q['$select'].split(',') if '$select' in q else None
+            out = [{c: r[c] for c in cols} if cols else r for r in rows[offset:offset + int(q['$limit'])]]
+        self._send(200, gzip.compress(json.dumps(out).encode()), gz=True)
+
+    def _send(self, status, body, gz=False):
+        self.send_response(status)
+        if gz:
+            self.send_header('Content-Encoding', 'gzip')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    _StandIn.failures, _StandIn.seen = {}, []
+    srv = ThreadingHTTPServer(('127.0.0.1', 0), _StandIn)
+    threading.Thread(target=srv.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{srv.server_port}"
+    srv.shutdown()
+    srv.server_close()
+
+
+def _client(url, **kwargs):
+    return SocrataClient(url, dataset='test', page_size=10, backoff=0, **kwargs)
+
+
+def test_fetch_all_pages_through_every_row(server):
+    with _client(server) as client:
+        records = client.fetch_all(select=(':id', 'percent_rate'))
+    assert [r[':id'] for r in records] == [r[':id'] for r in ROWS]
+    assert set(records[0]) == {':id', 'percent_rate'}
+    assert sorted(_StandIn.seen) == ['0', '10', '20', '30', '40', '50', 'count']   # 53 rows, 10 per page
+
+
+def test_updated_at_filter(server):
+    mark = '2024-01-20T00:00:00.000'
+    with _client(server) as client:
+        records = client.fetch_all(select=(':id', ':updated_at'), where=f":updated_at > '{mark}'")
+    assert records and all(r[':updated_at'] > mark for r in records)
+    assert len(records) == sum(r[':updated_at'] > mark for r in ROWS)
+
+
+def test_retries_error_responses(server):
+    _StandIn.failures.update({'count': 2, '20': 1})
+    with _client(server) as client:
+        records = client.fetch_all(select=(':id',))
+    assert len(records) == len(ROWS)
+    assert _StandIn.seen.count('count') == 3 and _StandIn.seen.count('20') == 2
+
+
+def test_gives_up_after_retries(server):
+    _StandIn.failures['count'] = 5
+    with _client(server, retries=1) as client, pytest.raises(requests.exceptions.RetryError):
+        client.fetch_all()